@@ -0,0 +1,198 @@
+# app/advisor.py
+# EXPLAIN QUERY PLAN de las consultas de crud/task/standings/valuation (liga-admin explain).
+# Las sentencias se capturan ejecutando un recorrido de todas las operaciones contra una base
+# SQLite temporal creada desde los modelos; después se explican contra la base configurada,
+# que aporta su esquema real (índices creados o no) y sus estadísticas de ANALYZE.
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from . import crud, events, models, schemas, seasons, standings, task, valuation
+
+logger = logging.getLogger("liga")
+
+# Pasos que recorren la tabla entera a propósito: listados sin filtro (keyset con LIMIT sobre el id)
+# y los recálculos completos (el cierre de temporada congela todas las estadísticas)
+EXPECTED_SCANS = {
+    "list_teams",
+    "list_players",
+    "list_games",
+    "check_team_records_all",
+    "revalue_all",
+    "rebuild_standings",
+    "list_seasons",
+    "close_season",
+    "archive_season",
+}
+
+# "SCAN tabla" sin "USING ... INDEX": recorrido completo de la tabla
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+_DML = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+class StatementLog:
+    # Sentencias distintas vistas en el engine, con sus parámetros y los pasos que las lanzaron
+    def __init__(self):
+        self.label = None
+        self.statements: dict[str, dict] = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(_DML):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        entry = self.statements.setdefault(statement, {"parameters": parameters, "labels": []})
+        if self.label not in entry["labels"]:
+            entry["labels"].append(self.label)
+
+    @contextmanager
+    def step(self, label: str):
+        self.label = label
+        try:
+            yield
+        finally:
+            self.label = None
+
+
+def _workload(db, log: StatementLog, archive_dir: str) -> None:
+    # Una llamada (o varias con filtros distintos) a cada operación de lectura y escritura
+    with log.step("create_team"):
+        a = crud.create_team(db, schemas.TeamCreate(nombre="Advisor A"))
+        b = crud.create_team(db, schemas.TeamCreate(nombre="Advisor B"))
+    with log.step("create_player"):
+        p = crud.create_player(db, schemas.PlayerCreate(nombre="Jugador A", dorsal=9, posicion="delantero", equipo_id=a.id))
+    with log.step("create_players_bulk"):
+        player_ids, _ = crud.create_players_bulk(db, [
+            {"nombre": f"Jugador {i}", "dorsal": i + 1, "posicion": "defensa", "equipo_id": b.id} for i in range(3)
+        ])
+    with log.step("upsert_stats_for_player"):
+        crud.upsert_stats_for_player(db, p.id, {"tiros": 3, "tiros_a_puerta": 2})
+    with log.step("increment_stats_for_player"):
+        crud.increment_stats_for_player(db, p.id, {"tiros": 1, "paradas": 1})
+    with log.step("upsert_stats_bulk"):
+        crud.upsert_stats_bulk(db, [{"player_id": pid, "tiros": 1} for pid in player_ids + [p.id]])
+    with log.step("create_game"):
+        g1 = crud.create_game(db, a.id, b.id, jornada=1)
+        g2 = crud.create_game(db, b.id, a.id, fecha=datetime(2025, 1, 1), jornada=2)
+    with log.step("set_game_result"):
+        crud.set_game_result(db, g1.id, 2, 1)
+    with log.step("set_game_results_bulk"):
+        crud.set_game_results_bulk(db, [{"game_id": g2.id, "goles_local": 0, "goles_visitante": 0}])
+
+    with log.step("ingest_events"):
+        events.ingest(db, [(0, {"game_id": g1.id, "player_id": p.id, "tipo": "gol"}),
+                           (1, {"game_id": g1.id, "player_id": p.id, "tipo": "tiro_a_puerta"})])
+    with log.step("aggregate_events"):
+        events.aggregate(db)
+        events.aggregate(db)
+
+    with log.step("list_teams"):
+        crud.list_teams(db)
+        crud.list_teams(db, cursor=b.id)
+    with log.step("get_team"):
+        crud.get_team(db, a.id)
+    with log.step("get_team_players"):
+        crud.get_team_players(db, a.id)
+    with log.step("update_team"):
+        crud.update_team(db, a.id, schemas.TeamUpdate(nombre="Advisor A2"))
+    with log.step("list_players"):
+        crud.list_players(db)
+        crud.list_players(db, cursor=p.id)
+    with log.step("list_players_filtered"):
+        crud.list_players(db, equipo_id=a.id, include={"stats", "team"})
+        crud.list_players(db, posicion="delantero", equipo_id=a.id)
+    with log.step("get_player"):
+        crud.get_player(db, p.id)
+        crud.get_player_with(db, p.id, include={"stats", "team"})
+    with log.step("get_stats"):
+        crud.get_stats(db, p.id)
+    with log.step("get_players_without_team"):
+        crud.get_players_without_team(db)
+    with log.step("update_player"):
+        crud.update_player(db, p.id, {"goles": 5, "equipo_id": b.id})
+    with log.step("list_games"):
+        crud.list_games(db)
+        crud.list_games(db, cursor=g2.id)
+    with log.step("list_games_filtered"):
+        crud.list_games(db, team_id=a.id)
+        crud.list_games(db, team_id=a.id, estado="jugado")
+        crud.list_games(db, jornada=1)
+        crud.list_games(db, fecha_desde=datetime(2024, 1, 1), fecha_hasta=datetime(2026, 1, 1))
+        crud.list_games(db, temporada=seasons.current())
+    with log.step("get_standings"):
+        standings.get_standings(db)
+        standings.get_standings(db, jornada=1)
+        standings.get_standings(db, temporada=2024)
+    with log.step("list_seasons"):
+        seasons.list_seasons(db)
+    with log.step("seasons"):
+        seasons.team_records(db, seasons.current())
+        seasons.player_seasons(db, p.id)
+
+    with log.step("recompute_player_value"):
+        task._recompute_player_value(db, p.id)
+        db.commit()
+    with log.step("check_team_records"):
+        task._check_team_records(db, [a.id, b.id])
+        db.commit()
+    with log.step("check_team_records_all"):
+        task._check_team_records(db)
+        db.commit()
+    with log.step("revalue"):
+        valuation.revalue(db, player_ids=[p.id])
+        valuation.revalue(db, team_ids=[a.id])
+    with log.step("revalue_all"):
+        valuation.revalue(db)
+    with log.step("rebuild_standings"):
+        standings.rebuild(db)
+    with log.step("close_season"):
+        seasons.close(db, 2024)
+    with log.step("archive_season"):
+        seasons.archive(db, 2024, archive_dir)
+
+    with log.step("delete_player"):
+        crud.delete_player(db, p.id)
+    with log.step("delete_team"):
+        crud.delete_team(db, b.id)
+
+
+def capture_statements() -> dict[str, dict]:
+    log = StatementLog()
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = create_engine(f"sqlite:///{os.path.join(tmp, 'advisor.db')}")
+        models.DecBase.metadata.create_all(bind=scratch)
+        event.listen(scratch, "before_cursor_execute", log)
+        db = sessionmaker(bind=scratch, autoflush=False)()
+        try:
+            _workload(db, log, tmp)
+        finally:
+            db.close()
+            scratch.dispose()
+    return log.statements
+
+
+def explain(bind, statements: dict[str, dict]) -> list[dict]:
+    if bind.dialect.name != "sqlite":
+        raise ValueError(f"EXPLAIN QUERY PLAN solo está disponible en SQLite (dialecto: {bind.dialect.name})")
+    report = []
+    with bind.connect() as conn:
+        for statement, entry in statements.items():
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", entry["parameters"])]
+            # anon_N son subconsultas de SQLAlchemy ya materializadas, no tablas
+            scans = [m.group(1) for m in map(FULL_SCAN.match, plan) if m and not m.group(1).startswith("anon_")]
+            expected = all(label in EXPECTED_SCANS for label in entry["labels"])
+            report.append({
+                "labels": entry["labels"],
+                "statement": statement,
+                "plan": plan,
+                "full_scans": scans,
+                "flagged": bool(scans) and not expected,
+            })
+    logger.info("[advisor] %s consultas explicadas, %s con recorrido completo", len(report), sum(r['flagged'] for r in report))
+    return report
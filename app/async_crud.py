@@ -0,0 +1,107 @@
+# app/async_crud.py
+# Equivalentes asíncronos de las lecturas de crud.py: mismas sentencias (crud._*_stmt),
+# ejecutadas con AsyncSession. Las escrituras solo existen en crud.py.
+import logging
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, seasons, standings
+
+logger = logging.getLogger("liga")
+
+
+async def _paginate(db: AsyncSession, stmt, id_column, limit: int, cursor: int | None) -> tuple[list, int | None]:
+    rows = (await db.execute(crud._keyset(stmt, id_column, limit, cursor))).all()
+    return crud._page(rows, limit)
+
+
+#Teams
+async def list_teams(db: AsyncSession, limit: int = crud.DEFAULT_PAGE_SIZE, cursor: int | None = None) -> tuple[list, int | None]:
+    logger.debug("[async_crud] Listando equipos limit=%s cursor=%s", limit, cursor)
+    teams, next_cursor = await _paginate(db, select(*crud._columns(models.Team)), models.Team.id, limit, cursor)
+    logger.info("[async_crud] Se encontraron %s equipos", len(teams))
+    return teams, next_cursor
+
+async def get_team(db: AsyncSession, team_id: int) -> models.Team | None:
+    logger.debug("[async_crud] Buscando equipo id=%s", team_id)
+    team = await db.get(models.Team, team_id)
+    if team:
+        logger.info("[async_crud] Equipo encontrado: %s - %s", team.id, team.nombre)
+    else:
+        logger.warning("[async_crud] Equipo no encontrado: %s", team_id)
+    return team
+
+async def get_team_players(db: AsyncSession, team_id: int) -> list | None:
+    logger.debug("[async_crud] Listando jugadores del equipo id=%s", team_id)
+    if await db.scalar(select(models.Team.id).where(models.Team.id == team_id)) is None:
+        logger.warning("[async_crud] Equipo no encontrado: %s", team_id)
+        return None
+    players = (await db.execute(crud._team_players_stmt(team_id))).all()
+    logger.info("[async_crud] Se encontraron %s jugadores en el equipo %s", len(players), team_id)
+    return players
+
+
+#Players
+async def list_players(
+    db: AsyncSession,
+    limit: int = crud.DEFAULT_PAGE_SIZE,
+    cursor: int | None = None,
+    posicion: str | None = None,
+    equipo_id: int | None = None,
+    include=(),
+) -> tuple[list, int | None]:
+    logger.debug("[async_crud] Listando jugadores limit=%s cursor=%s posicion=%s equipo_id=%s include=%s", limit, cursor, posicion, equipo_id, include)
+    stmt = crud._players_stmt(posicion, equipo_id, include)
+    players, next_cursor = await _paginate(db, stmt, models.Player.id, limit, cursor)
+    logger.info("[async_crud] Se encontraron %s jugadores", len(players))
+    return players, next_cursor
+
+async def get_player_with(db: AsyncSession, player_id: int, include=()) -> models.Player | None:
+    logger.debug("[async_crud] Buscando jugador id=%s include=%s", player_id, include)
+    player = (await db.execute(crud._player_with_stmt(player_id, include))).unique().scalar_one_or_none()
+    if player:
+        logger.info("[async_crud] Jugador encontrado: %s - %s", player.id, player.nombre)
+    else:
+        logger.warning("[async_crud] Jugador no encontrado: %s", player_id)
+    return player
+
+
+#Partidos
+async def list_games(
+    db: AsyncSession,
+    team_id: int | None = None,
+    limit: int = crud.DEFAULT_PAGE_SIZE,
+    cursor: int | None = None,
+    estado: str | None = None,
+    jornada: int | None = None,
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    temporada: int | None = None,
+) -> tuple[list, int | None]:
+    logger.debug(
+        "[async_crud] Listando partidos team_id=%s limit=%s cursor=%s estado=%s jornada=%s fecha_desde=%s fecha_hasta=%s temporada=%s",
+        team_id, limit, cursor, estado, jornada, fecha_desde, fecha_hasta, temporada,
+    )
+    stmt = crud._games_stmt(team_id, estado, jornada, fecha_desde, fecha_hasta, temporada)
+    games, next_cursor = await _paginate(db, stmt, models.Game.id, limit, cursor)
+    logger.info("[async_crud] Se encontraron %s partidos", len(games))
+    return games, next_cursor
+
+async def get_game(db: AsyncSession, game_id: int) -> models.Game | None:
+    return await db.get(models.Game, game_id)
+
+
+#Clasificacion
+async def get_standings(db: AsyncSession, jornada: int | None = None, temporada: int | None = None) -> tuple[int | None, list]:
+    temporada = seasons.current() if temporada is None else temporada
+    snapshot = await db.scalar(standings._snapshot_stmt(jornada, temporada))
+    if snapshot is None:
+        return None, []
+    return snapshot, (await db.execute(standings._rows_stmt(snapshot, temporada))).all()
+
+async def archive_path(db: AsyncSession, temporada: int) -> str | None:
+    return await db.scalar(
+        select(models.Season.archivo).where(models.Season.id == temporada, models.Season.estado == "archivada")
+    )
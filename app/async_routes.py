@@ -0,0 +1,169 @@
+# app/async_routes.py
+# Rutas de lectura con `async def` sobre AsyncSession (LIGA_ASYNC_DB=1).
+# main.py incluye este router antes de sus propias rutas, así que estas tienen prioridad
+# para los mismos paths; las escrituras siguen en main.py con sesión síncrona.
+import logging
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+
+from . import async_crud, cache, crud, responses, schemas, seasons, standings
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger("liga")
+
+router = APIRouter()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+#Teams
+@router.get("/teams", response_model=schemas.TeamPage)
+async def list_teams(
+    request: Request,
+    limit: int = Query(default=crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(default=None),
+    db=Depends(get_async_db),
+):
+    logger.debug("GET /teams called limit=%s cursor=%s", limit, cursor)
+
+    async def build():
+        teams, next_cursor = await async_crud.list_teams(db, limit=limit, cursor=cursor)
+        logger.info("Returned %s teams", len(teams))
+        return {"items": teams, "next_cursor": next_cursor}
+
+    return await responses.cached_async(request, ["teams"], build, schemas.TeamPage)
+
+@router.get("/teams/{team_id}", response_model=schemas.TeamOut)
+async def get_team(team_id: int, request: Request, db=Depends(get_async_db)):
+    logger.debug("GET /teams/%s called", team_id)
+
+    async def build():
+        team = await async_crud.get_team(db, team_id)
+        if not team:
+            logger.warning("Team not found: %s", team_id)
+            raise HTTPException(status_code=404, detail="Team not found")
+        logger.info("Team returned: %s - %s", team.id, team.nombre)
+        return team
+
+    return await responses.cached_async(request, [f"team:{team_id}", cache.ALL_TEAMS], build, schemas.TeamOut)
+
+@router.get("/teams/{team_id}/players", response_model=list[schemas.PlayerOut])
+async def list_team_players(team_id: int, db=Depends(get_async_db)):
+    logger.debug("GET /teams/%s/players called", team_id)
+    players = await async_crud.get_team_players(db, team_id)
+    if players is None:
+        logger.warning("Team not found: %s", team_id)
+        raise HTTPException(status_code=404, detail="Team not found")
+    logger.info("Returned %s players from team %s", len(players), team_id)
+    return players
+
+
+#Players
+@router.get("/players", response_model=schemas.PlayerPage, response_model_exclude_unset=True)
+async def list_players(
+    limit: int = Query(default=crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(default=None),
+    posicion: str | None = Query(default=None, pattern="^(portero|defensa|mediocampo|delantero)$"),
+    equipo_id: int | None = Query(default=None),
+    include: str | None = Query(default=None, pattern=responses.INCLUDE_PATTERN),
+    db=Depends(get_async_db),
+):
+    logger.debug("GET /players called limit=%s cursor=%s posicion=%s equipo_id=%s include=%s", limit, cursor, posicion, equipo_id, include)
+    expand = responses.parse_include(include)
+    players, next_cursor = await async_crud.list_players(
+        db, limit=limit, cursor=cursor, posicion=posicion, equipo_id=equipo_id, include=expand
+    )
+    logger.info("Returned %s players", len(players))
+    return {"items": [responses.player_row(p, expand) for p in players], "next_cursor": next_cursor}
+
+@router.get("/players/{player_id}", response_model=schemas.PlayerExpandedOut, response_model_exclude_unset=True)
+async def get_player(player_id: int, include: str | None = Query(default=None, pattern=responses.INCLUDE_PATTERN), db=Depends(get_async_db)):
+    logger.debug("GET /players/%s called include=%s", player_id, include)
+    expand = responses.parse_include(include)
+    player = await async_crud.get_player_with(db, player_id, include=expand)
+    if not player:
+        logger.warning("Player not found: %s", player_id)
+        raise HTTPException(status_code=404, detail="Player not found")
+    logger.info("Player returned: %s - %s", player.id, player.nombre)
+    return responses.player_dict(player, expand)
+
+@router.get("/players/{player_id}/team", response_model=schemas.TeamOut)
+async def get_player_team(player_id: int, db=Depends(get_async_db)):
+    logger.debug("GET /players/%s/team called", player_id)
+    player = await async_crud.get_player_with(db, player_id, include={"team"})
+    if not player:
+        logger.warning("Player not found: %s", player_id)
+        raise HTTPException(status_code=404, detail="Player not found")
+    if not player.equipo:
+        logger.warning("Team not found for player %s", player_id)
+        raise HTTPException(status_code=404, detail="Team not found")
+    logger.info("Player %s belongs to team %s", player_id, player.equipo.id)
+    return player.equipo
+
+@router.get("/playersDetail/{player_id}", response_model=schemas.PlayerDetailOut)
+async def get_player_detail(player_id: int, request: Request, db=Depends(get_async_db)):
+    async def build():
+        player = await async_crud.get_player_with(db, player_id, include={"stats"})
+        if not player:
+            raise HTTPException(404, "Jugador no encontrado")
+        return responses.player_detail(player)
+
+    return await responses.cached_async(request, [f"player:{player_id}", cache.ALL_PLAYERS], build, schemas.PlayerDetailOut)
+
+
+#Partidos
+@router.get("/games", response_model=schemas.GamePage)
+async def list_games(
+    request: Request,
+    team_id: int | None = Query(default=None),
+    limit: int = Query(default=crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(default=None),
+    estado: str | None = Query(default=None, pattern="^(pendiente|jugado)$"),
+    jornada: int | None = Query(default=None),
+    fecha_desde: datetime | None = Query(default=None),
+    fecha_hasta: datetime | None = Query(default=None),
+    temporada: str | None = Query(default=None, pattern=responses.SEASON_PATTERN),
+    db=Depends(get_async_db),
+):
+    season = responses.parse_season(temporada)
+
+    async def build():
+        filters = dict(team_id=team_id, limit=limit, cursor=cursor, estado=estado, jornada=jornada,
+                       fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, temporada=season)
+        # Temporada archivada: se lee de su fichero (síncrono, en el threadpool)
+        path = await async_crud.archive_path(db, season) if season not in (None, seasons.current()) else None
+        if path:
+            games, next_cursor = await run_in_threadpool(seasons.read_archive, path, crud.list_games, **filters)
+        else:
+            games, next_cursor = await async_crud.list_games(db, **filters)
+        return {"items": games, "next_cursor": next_cursor}
+
+    return await responses.cached_async(request, ["games"], build, schemas.GamePage)
+
+@router.get("/games/{game_id}", response_model=schemas.GameOut)
+async def get_game(game_id: int, db=Depends(get_async_db)):
+    g = await async_crud.get_game(db, game_id)
+    if not g:
+        raise HTTPException(404, "Game not found")
+    return g
+
+
+#Clasificacion
+@router.get("/standings", response_model=schemas.StandingsOut)
+async def get_standings(
+    jornada: int | None = Query(default=None, ge=0),
+    temporada: int | None = Query(default=None, ge=1900, le=2999),
+    db=Depends(get_async_db),
+):
+    season = seasons.current() if temporada is None else temporada
+    path = await async_crud.archive_path(db, season) if season != seasons.current() else None
+    if path:
+        snapshot, rows = await run_in_threadpool(seasons.read_archive, path, standings.get_standings, jornada, season)
+    else:
+        snapshot, rows = await async_crud.get_standings(db, jornada=jornada, temporada=season)
+    return responses.standings_dict(snapshot, rows, season)
@@ -0,0 +1,202 @@
+# app/cache.py
+# Caché en memoria de respuestas de lectura (LRU + TTL) con invalidación por etiquetas.
+# Cada entrada guarda el cuerpo JSON ya serializado y su ETag; las funciones de escritura
+# de crud/task marcan en la sesión las etiquetas afectadas (p.ej. "team:3" o "games") y se
+# invalidan al hacer commit, nunca antes: así no se puede volver a cachear el estado anterior.
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import config
+
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str
+    tags: frozenset
+    expires: float
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._by_tag: dict[str, set[tuple]] = {}
+        self._tag_versions: dict[str, int] = {}
+        self._version = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(path: str, params) -> tuple:
+        return (path, tuple(sorted(params)))
+
+    def token(self) -> int:
+        # Se toma antes de construir la respuesta; set() la descarta si hubo invalidaciones entretanto
+        with self._lock:
+            return self._version
+
+    def get(self, key: tuple) -> CacheEntry | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: tuple, body: bytes, tags, token: int) -> CacheEntry:
+        entry = CacheEntry(
+            body=body,
+            etag='"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"',
+            tags=frozenset(tags),
+            expires=time.monotonic() + self.ttl,
+        )
+        if not self.enabled or len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            if any(self._tag_versions.get(tag, -1) > token for tag in entry.tags):
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, *tags: str) -> int:
+        removed = 0
+        with self._lock:
+            self._version += 1
+            for tag in tags:
+                self._tag_versions[tag] = self._version
+                for key in list(self._by_tag.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            for tag in self._by_tag:
+                self._tag_versions[tag] = self._version
+            self._entries.clear()
+            self._by_tag.clear()
+            self._bytes = 0
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def team_tags(*team_ids) -> list[str]:
+    return ["teams", *(f"team:{tid}" for tid in team_ids if tid)]
+
+
+def player_tags(*player_ids) -> list[str]:
+    return [f"player:{pid}" for pid in player_ids if pid]
+
+
+# Etiquetas comodín: invalidan todas las fichas de equipo/jugador a la vez
+ALL_TEAMS = "team:*"
+ALL_PLAYERS = "player:*"
+
+# Por encima de este número de ids se invalida con la etiqueta comodín
+MAX_TAGS_PER_COMMIT = 1000
+
+
+cache = ResponseCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    max_bytes=config.CACHE_MAX_BYTES,
+    ttl=config.CACHE_TTL,
+    enabled=config.CACHE_ENABLED,
+)
+
+
+def mark(db: Session, *tags: str) -> None:
+    # Registra etiquetas a invalidar cuando la transacción de db haga commit
+    db.info.setdefault("cache_tags", set()).update(tags)
+
+
+def mark_teams(db: Session, team_ids) -> None:
+    team_ids = {tid for tid in team_ids if tid}
+    if len(team_ids) > MAX_TAGS_PER_COMMIT:
+        mark(db, "teams", ALL_TEAMS)
+    else:
+        mark(db, *team_tags(*team_ids))
+
+
+def mark_players(db: Session, player_ids) -> None:
+    player_ids = {pid for pid in player_ids if pid}
+    if len(player_ids) > MAX_TAGS_PER_COMMIT:
+        mark(db, ALL_PLAYERS)
+    else:
+        mark(db, *player_tags(*player_ids))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        cache.invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session) -> None:
+    session.info.pop("cache_tags", None)
@@ -0,0 +1,93 @@
+# app/cli.py
+"""liga-admin: tareas de administración de la liga.
+
+Uso: python -m app.cli <comando> [opciones]
+"""
+import argparse
+import json
+import sys
+
+from .database import SessionLocal, engine, upgrade_indexes, upgrade_schema
+from .models import DecBase
+from . import valuation
+
+
+def cmd_revalue(args) -> int:
+    db = SessionLocal()
+    try:
+        if args.check_parity:
+            mismatches = valuation.check_parity(db, limit=args.limit)
+            print(json.dumps({"mismatches": mismatches[:20], "total": len(mismatches)}, ensure_ascii=False, indent=2))
+            return 1 if mismatches else 0
+        result = valuation.revalue(db)
+        rate = result["players"] / result["seconds"] if result["seconds"] else 0.0
+        print(f"{result['players']} jugadores revalorados, {result['changed']} cambios, "
+              f"{result['seconds']:.2f}s ({rate:,.0f} jugadores/s)")
+        return 0
+    finally:
+        db.close()
+
+
+def cmd_check_queries(args) -> int:
+    # Necesita la app completa y el cliente de pruebas de FastAPI (httpx)
+    from fastapi.testclient import TestClient
+    from .main import app
+    from . import jobs, querycount
+
+    db = SessionLocal()
+    try:
+        with TestClient(app) as client:
+            jobs.queue.drain()
+            failures = querycount.check_query_budgets(client, db)
+    finally:
+        db.close()
+    for failure in failures:
+        print(failure)
+    print(f"{len(querycount.QUERY_BUDGETS) - len(failures)}/{len(querycount.QUERY_BUDGETS)} endpoints dentro de presupuesto")
+    return 1 if failures else 0
+
+
+def cmd_explain(args) -> int:
+    from . import advisor
+
+    try:
+        report = advisor.explain(engine, advisor.capture_statements())
+    except ValueError as e:
+        print(e)
+        return 2
+    flagged = [r for r in report if r["flagged"]]
+    for r in report if args.all else flagged:
+        mark = "SCAN" if r["flagged"] else "ok"
+        print(f"[{mark}] {', '.join(r['labels'])}: {' '.join(r['statement'].split())}")
+        for line in r["plan"]:
+            print(f"    {line}")
+    print(f"{len(report)} consultas, {len(flagged)} con recorrido completo de tabla no previsto")
+    return 1 if flagged else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="liga-admin", description="Tareas de administración de la liga")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("revalue", help="Recalcula valor y valor de mercado de todos los jugadores en bloque")
+    p.add_argument("--check-parity", action="store_true",
+                   help="No escribe nada: compara el cálculo en bloque con task.compute_player_value")
+    p.add_argument("--limit", type=int, default=None, help="Jugadores a comprobar con --check-parity")
+    p.set_defaults(func=cmd_revalue)
+
+    p = sub.add_parser("check-queries", help="Falla si algún endpoint de lectura supera su presupuesto de consultas SQL")
+    p.set_defaults(func=cmd_check_queries)
+
+    p = sub.add_parser("explain", help="EXPLAIN QUERY PLAN de las consultas de crud; falla si alguna recorre una tabla entera")
+    p.add_argument("--all", action="store_true", help="Muestra el plan de todas las consultas, no solo las marcadas")
+    p.set_defaults(func=cmd_explain)
+
+    args = parser.parse_args(argv)
+    DecBase.metadata.create_all(bind=engine)
+    upgrade_schema(DecBase.metadata)
+    upgrade_indexes(DecBase.metadata)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
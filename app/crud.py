@@ -1,77 +1,291 @@
 from typing import Optional, Union
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from datetime import datetime
+from sqlalchemy.orm import Session, joinedload, raiseload
+from sqlalchemy import inspect, select, func, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
 import logging
 
-from . import models, schemas
+from . import cache, config, live, models, schemas, seasons, standings
 
 logger = logging.getLogger("liga")
 
+# Tamaño maximo de las peticiones batch
+MAX_BATCH_SIZE = 5000
+
+# Paginacion por cursor (keyset) sobre el id: el cursor es el ultimo id devuelto
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _keyset(stmt, id_column, limit: int, cursor: int | None):
+    if cursor is not None:
+        stmt = stmt.where(id_column < cursor)
+    # Pedimos una fila de mas para saber si hay pagina siguiente sin hacer un COUNT
+    return stmt.order_by(id_column.desc()).limit(limit + 1)
+
+
+def _page(rows: list, limit: int) -> tuple[list, int | None]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
+
+
+def _paginate(db: Session, stmt, id_column, limit: int, cursor: int | None) -> tuple[list, int | None]:
+    rows = db.execute(_keyset(stmt, id_column, limit, cursor)).all()
+    return _page(rows, limit)
+
+
+def _columns(model, prefix: str = "") -> list:
+    # Columnas (incluidas las column_property) para listados que devuelven filas (Row) y no
+    # instancias del ORM: sin identity map ni estado por objeto. Con prefix se etiquetan
+    # "prefijo__columna" para anidarlas después (responses.player_row)
+    attrs = [getattr(model, a.key) for a in inspect(model).column_attrs]
+    return [a.label(f"{prefix}__{a.key}") for a in attrs] if prefix else attrs
+
+
+# Relaciones que se pueden expandir con ?include= en los endpoints de jugadores
+PLAYER_INCLUDES = {"stats": "estadisticas", "team": "equipo"}
+
+
+def _player_load_options(include) -> list:
+    # Carga explicita de las relaciones pedidas y raiseload para el resto:
+    # un acceso perezoso no previsto falla en lugar de lanzar una consulta
+    options = [joinedload(getattr(models.Player, PLAYER_INCLUDES[name])) for name in sorted(include)]
+    options.append(raiseload("*"))
+    return options
+
+
+# Sentencias de lectura compartidas con async_crud
+def _players_stmt(posicion: str | None, equipo_id: int | None, include):
+    # Filas de jugador; las relaciones pedidas van en la misma consulta con LEFT JOIN
+    stmt = select(*_columns(models.Player))
+    if "stats" in include:
+        stmt = stmt.add_columns(*_columns(models.Stats, "estadisticas")).outerjoin(
+            models.Stats, models.Stats.player_id == models.Player.id
+        )
+    if "team" in include:
+        stmt = stmt.add_columns(*_columns(models.Team, "equipo")).outerjoin(
+            models.Team, models.Team.id == models.Player.equipo_id
+        )
+    if posicion:
+        stmt = stmt.where(models.Player.posicion == posicion)
+    if equipo_id is not None:
+        stmt = stmt.where(models.Player.equipo_id == equipo_id)
+    return stmt
+
+
+def _player_with_stmt(player_id: int, include):
+    return (
+        select(models.Player)
+        .where(models.Player.id == player_id)
+        .options(*_player_load_options(include))
+    )
+
+
+def _team_players_stmt(team_id: int):
+    return (
+        select(*_columns(models.Player))
+        .where(models.Player.equipo_id == team_id)
+        .order_by(models.Player.id)
+    )
+
+
+def _games_stmt(team_id, estado, jornada, fecha_desde, fecha_hasta, temporada=None):
+    stmt = select(*_columns(models.Game))
+    if temporada is not None:
+        stmt = stmt.where(models.Game.temporada_id == temporada)
+    if team_id:
+        stmt = stmt.where((models.Game.local_id == team_id) | (models.Game.visitante_id == team_id))
+    if estado:
+        stmt = stmt.where(models.Game.estado == estado)
+    if jornada is not None:
+        stmt = stmt.where(models.Game.jornada == jornada)
+    if fecha_desde is not None:
+        stmt = stmt.where(models.Game.fecha >= fecha_desde)
+    if fecha_hasta is not None:
+        stmt = stmt.where(models.Game.fecha <= fecha_hasta)
+    return stmt
+
+
+def _validate_batch(model, items: list[dict]) -> tuple[list[tuple[int, object]], list[dict]]:
+    valid, errors = [], []
+    for index, raw in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"index": index, "detail": e.errors(include_url=False, include_context=False)})
+    return valid, errors
+
+
+# INSERT del dialecto en uso: SQLite y PostgreSQL admiten ON CONFLICT ... DO UPDATE
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _dialect_insert(db: Session, model):
+    dialect = db.get_bind().dialect.name
+    if dialect not in _DIALECT_INSERTS:
+        raise RuntimeError(f"ON CONFLICT no soportado en el dialecto {dialect}")
+    return _DIALECT_INSERTS[dialect](model)
+
+
+def _upsert_stmt(db: Session, model, key: str | tuple, columns):
+    # INSERT ... ON CONFLICT (key) DO UPDATE SET col = excluded.col para las columnas dadas
+    stmt = _dialect_insert(db, model)
+    return stmt.on_conflict_do_update(
+        index_elements=[key] if isinstance(key, str) else list(key),
+        set_={col: getattr(stmt.excluded, col) for col in columns},
+    )
+
+
+def _increment_stmt(db: Session, model, key: str | tuple, columns):
+    # INSERT ... ON CONFLICT (key) DO UPDATE SET col = coalesce(col, 0) + excluded.col
+    stmt = _dialect_insert(db, model)
+    return stmt.on_conflict_do_update(
+        index_elements=[key] if isinstance(key, str) else list(key),
+        set_={col: func.coalesce(getattr(model, col), 0) + getattr(stmt.excluded, col) for col in columns},
+    )
+
+
+def _recount_team_players(db: Session, team_ids) -> None:
+    # Un unico COUNT agrupado para todos los equipos afectados
+    team_ids = {tid for tid in team_ids if tid}
+    if not team_ids:
+        return
+    counts = dict(db.execute(
+        select(models.Player.equipo_id, func.count())
+        .where(models.Player.equipo_id.in_(team_ids))
+        .group_by(models.Player.equipo_id)
+    ).all())
+    db.execute(update(models.Team), [{"id": tid, "jugadores": int(counts.get(tid, 0))} for tid in team_ids])
+
+
+def _bump_team_goals(db: Session, team_id: int | None, delta: int) -> None:
+    # Solo en modo "stored": aplica el incremento en la misma transaccion que el cambio del jugador
+    if not config.TEAM_GOALS_STORED or not team_id or not delta:
+        return
+    db.execute(
+        update(models.Team)
+        .where(models.Team.id == team_id)
+        .values(goles=models.Team.goles + delta)
+    )
+
+_RECORD_FIELDS = ("partidos", "victorias", "empates", "goles_favor", "goles_contra")
+
+
+def _add_result_delta(deltas: dict[int, dict], local_id: int, visitante_id: int, goles_local: int, goles_visitante: int, sign: int) -> None:
+    # Acumula el efecto de un resultado (sign=+1) o su retirada (sign=-1) sobre el registro de ambos equipos
+    for team_id, gf, gc in ((local_id, goles_local, goles_visitante), (visitante_id, goles_visitante, goles_local)):
+        d = deltas.setdefault(team_id, {"partidos": 0, "victorias": 0, "empates": 0, "goles_favor": 0, "goles_contra": 0})
+        d["partidos"] += sign
+        d["victorias"] += sign * int(gf > gc)
+        d["empates"] += sign * int(gf == gc)
+        d["goles_favor"] += sign * gf
+        d["goles_contra"] += sign * gc
+
+
+def _apply_team_deltas(db: Session, deltas: dict[int, dict]) -> None:
+    Team = models.Team
+    for team_id, d in deltas.items():
+        if not any(d.values()):
+            continue
+        db.execute(
+            update(Team)
+            .where(Team.id == team_id)
+            .values(
+                partidos=func.coalesce(Team.partidos, 0) + d["partidos"],
+                victorias=func.coalesce(Team.victorias, 0) + d["victorias"],
+                empates=func.coalesce(Team.empates, 0) + d["empates"],
+                goles_favor=func.coalesce(Team.goles_favor, 0) + d["goles_favor"],
+                goles_contra=func.coalesce(Team.goles_contra, 0) + d["goles_contra"],
+            ),
+            execution_options={"synchronize_session": "fetch"},
+        )
+
+
+def _apply_team_season_deltas(db: Session, deltas_by_season: dict[int, dict[int, dict]]) -> None:
+    # Mismos deltas sobre el registro por temporada (equipos_temporada), creando la fila si no existe
+    rows = [
+        {"temporada_id": season, "team_id": team_id, **d}
+        for season, deltas in deltas_by_season.items() if season is not None
+        for team_id, d in deltas.items() if any(d.values())
+    ]
+    if rows:
+        db.execute(_increment_stmt(db, models.TeamSeason, ("temporada_id", "team_id"), _RECORD_FIELDS), rows)
+
+
 #Teams
 def create_team(db: Session, data: schemas.TeamCreate) -> models.Team:
-    logger.debug(f"[crud] Creando equipo: {data}")
+    logger.debug("[crud] Creando equipo: %s", data)
     team = models.Team(**data.model_dump())
     db.add(team)
+    cache.mark(db, "teams")
     try:
         db.commit()
     except IntegrityError as e:
         db.rollback()
-        logger.warning(f"[crud] Nombre de equipo duplicado: {team.nombre} -> {e}")
+        logger.warning("[crud] Nombre de equipo duplicado: %s -> %s", team.nombre, e)
         raise ValueError("El nombre del equipo ya existe")
     db.refresh(team)
-    logger.info(f"[crud] Equipo creado: {team.id} - {team.nombre}")
+    logger.info("[crud] Equipo creado: %s - %s", team.id, team.nombre)
     return team
 
-def list_teams(db: Session) -> list[models.Team]:
-    logger.debug("[crud] Listando equipos")
-    teams = db.execute(
-        select(models.Team).order_by(models.Team.id.desc())
-    ).scalars().all()
-    logger.info(f"[crud] Se encontraron {len(teams)} equipos")
-    return teams
+def list_teams(db: Session, limit: int = DEFAULT_PAGE_SIZE, cursor: int | None = None) -> tuple[list, int | None]:
+    logger.debug("[crud] Listando equipos limit=%s cursor=%s", limit, cursor)
+    teams, next_cursor = _paginate(db, select(*_columns(models.Team)), models.Team.id, limit, cursor)
+    logger.info("[crud] Se encontraron %s equipos", len(teams))
+    return teams, next_cursor
 
 def get_team(db: Session, team_id: int) -> models.Team | None:
-    logger.debug(f"[crud] Buscando equipo id={team_id}")
+    logger.debug("[crud] Buscando equipo id=%s", team_id)
     team = db.get(models.Team, team_id)
     if team:
-        logger.info(f"[crud] Equipo encontrado: {team.id} - {team.nombre}")
+        logger.info("[crud] Equipo encontrado: %s - %s", team.id, team.nombre)
     else:
-        logger.warning(f"[crud] Equipo no encontrado: {team_id}")
+        logger.warning("[crud] Equipo no encontrado: %s", team_id)
     return team
 
 def update_team(db: Session, team_id: int, patch: schemas.TeamUpdate) -> models.Team | None:
-    logger.debug(f"[crud] Actualizando equipo id={team_id} con {patch}")
+    logger.debug("[crud] Actualizando equipo id=%s con %s", team_id, patch)
     team = db.get(models.Team, team_id)
     if not team:
-        logger.warning(f"[crud] Equipo a actualizar no encontrado: {team_id}")
+        logger.warning("[crud] Equipo a actualizar no encontrado: %s", team_id)
         return None
     for field, value in patch.model_dump(exclude_unset=True).items():
         setattr(team, field, value)
+    cache.mark_teams(db, [team_id])
     db.commit()
     db.refresh(team)
-    logger.info(f"[crud] Equipo actualizado: {team.id} - {team.nombre}")
+    logger.info("[crud] Equipo actualizado: %s - %s", team.id, team.nombre)
     return team
 
 def delete_team(db: Session, team_id: int) -> bool:
-    logger.debug(f"[crud] Eliminando equipo id={team_id}")
+    logger.debug("[crud] Eliminando equipo id=%s", team_id)
     team = db.get(models.Team, team_id)
     if not team:
-        logger.warning(f"[crud] Equipo a eliminar no encontrado: {team_id}")
+        logger.warning("[crud] Equipo a eliminar no encontrado: %s", team_id)
         return False
     db.delete(team)
+    # El borrado arrastra a sus jugadores y partidos
+    cache.mark_teams(db, [team_id])
+    cache.mark(db, "games", cache.ALL_PLAYERS)
     db.commit()
-    logger.info(f"[crud] Equipo eliminado: {team_id}")
+    logger.info("[crud] Equipo eliminado: %s", team_id)
     return True
 
 #Players
 def create_player(db: Session, data: schemas.PlayerCreate, equipo_id: Optional[int] = None) -> models.Player:
-    logger.debug(f"[crud] Creando jugador: {data} (equipo_id={equipo_id})")
+    logger.debug("[crud] Creando jugador: %s (equipo_id=%s)", data, equipo_id)
     payload = data.model_dump()
     if equipo_id is not None:
         payload["equipo_id"] = equipo_id
     player = models.Player(**payload)
     db.add(player)
+    _bump_team_goals(db, player.equipo_id, player.goles or 0)
+    cache.mark_teams(db, [player.equipo_id])
     db.commit()
     db.refresh(player)
 
@@ -84,33 +298,92 @@ def create_player(db: Session, data: schemas.PlayerCreate, equipo_id: Optional[i
             team.jugadores = int(total or 0)
             db.commit()
 
-    logger.info(f"[crud] Jugador creado: {player.id} - {player.nombre}")
+    logger.info("[crud] Jugador creado: %s - %s", player.id, player.nombre)
     return player
 
-def list_players(db: Session) -> list[models.Player]:
-    logger.debug("[crud] Listando jugadores")
-    players = db.execute(
-        select(models.Player).order_by(models.Player.id.desc())
-    ).scalars().all()
-    logger.info(f"[crud] Se encontraron {len(players)} jugadores")
-    return players
+def create_players_bulk(db: Session, items: list[dict]) -> tuple[list[int], list[dict]]:
+    logger.debug("[crud] Creando %s jugadores en bloque", len(items))
+    valid, errors = _validate_batch(schemas.PlayerCreate, items)
+
+    team_ids = {data.equipo_id for _, data in valid if data.equipo_id is not None}
+    existing = set(db.scalars(select(models.Team.id).where(models.Team.id.in_(team_ids)))) if team_ids else set()
+
+    rows = []
+    for index, data in valid:
+        if data.equipo_id is not None and data.equipo_id not in existing:
+            errors.append({"index": index, "detail": f"Equipo no existe: {data.equipo_id}"})
+            continue
+        rows.append(data.model_dump())
+
+    created: list[int] = []
+    if rows:
+        created = list(db.scalars(
+            insert(models.Player).returning(models.Player.id, sort_by_parameter_order=True), rows
+        ))
+        _recount_team_players(db, {row["equipo_id"] for row in rows})
+        goals_by_team: dict[int, int] = {}
+        for row in rows:
+            if row["equipo_id"] is not None:
+                goals_by_team[row["equipo_id"]] = goals_by_team.get(row["equipo_id"], 0) + (row["goles"] or 0)
+        for team_id, goals in goals_by_team.items():
+            _bump_team_goals(db, team_id, goals)
+        cache.mark_teams(db, {row["equipo_id"] for row in rows})
+        db.commit()
+
+    errors.sort(key=lambda e: e["index"])
+    logger.info("[crud] Jugadores creados en bloque: %s (errores: %s)", len(created), len(errors))
+    return created, errors
+
+def list_players(
+    db: Session,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: int | None = None,
+    posicion: str | None = None,
+    equipo_id: int | None = None,
+    include=(),
+) -> tuple[list, int | None]:
+    logger.debug("[crud] Listando jugadores limit=%s cursor=%s posicion=%s equipo_id=%s include=%s", limit, cursor, posicion, equipo_id, include)
+    stmt = _players_stmt(posicion, equipo_id, include)
+    players, next_cursor = _paginate(db, stmt, models.Player.id, limit, cursor)
+    logger.info("[crud] Se encontraron %s jugadores", len(players))
+    return players, next_cursor
 
 def get_player(db: Session, player_id: int) -> models.Player | None:
-    logger.debug(f"[crud] Buscando jugador id={player_id}")
+    logger.debug("[crud] Buscando jugador id=%s", player_id)
     player = db.get(models.Player, player_id)
     if player:
-        logger.info(f"[crud] Jugador encontrado: {player.id} - {player.nombre}")
+        logger.info("[crud] Jugador encontrado: %s - %s", player.id, player.nombre)
     else:
-        logger.warning(f"[crud] Jugador no encontrado: {player_id}")
+        logger.warning("[crud] Jugador no encontrado: %s", player_id)
     return player
 
 
+def get_player_with(db: Session, player_id: int, include=()) -> models.Player | None:
+    logger.debug("[crud] Buscando jugador id=%s include=%s", player_id, include)
+    player = db.execute(_player_with_stmt(player_id, include)).unique().scalar_one_or_none()
+    if player:
+        logger.info("[crud] Jugador encontrado: %s - %s", player.id, player.nombre)
+    else:
+        logger.warning("[crud] Jugador no encontrado: %s", player_id)
+    return player
+
+def get_team_players(db: Session, team_id: int) -> list | None:
+    logger.debug("[crud] Listando jugadores del equipo id=%s", team_id)
+    # Solo el id: cargar el equipo completo calcularia Team.goles sin necesidad
+    if db.scalar(select(models.Team.id).where(models.Team.id == team_id)) is None:
+        logger.warning("[crud] Equipo no encontrado: %s", team_id)
+        return None
+    players = db.execute(_team_players_stmt(team_id)).all()
+    logger.info("[crud] Se encontraron %s jugadores en el equipo %s", len(players), team_id)
+    return players
+
+
 def update_player(db: Session, player_id: int, patch: Optional[Union[dict, "schemas.PlayerUpdate"]] = None) -> Optional["models.Player"]:
-    logger.debug(f"[crud] Actualizando jugador id={player_id} con {patch}")
+    logger.debug("[crud] Actualizando jugador id=%s con %s", player_id, patch)
 
     player = db.get(models.Player, player_id)
     if not player:
-        logger.warning(f"[crud] Jugador a actualizar no encontrado: {player_id}")
+        logger.warning("[crud] Jugador a actualizar no encontrado: %s", player_id)
         return None
 
     if patch is None:
@@ -120,24 +393,34 @@ def update_player(db: Session, player_id: int, patch: Optional[Union[dict, "sche
     elif isinstance(patch, dict):
         payload = dict(patch)
     else:
-        logger.warning(f"[crud] Tipo de patch no soportado: {type(patch)}")
+        logger.warning("[crud] Tipo de patch no soportado: %s", type(patch))
         return None
 
     if not payload:
-        logger.info(f"[crud] Sin cambios para jugador id={player_id}")
+        logger.info("[crud] Sin cambios para jugador id=%s", player_id)
         return player 
     if "equipo_id" in payload and payload["equipo_id"] is not None:
         team = db.get(models.Team, payload["equipo_id"])
         if team is None:
-            logger.warning(f"[crud] Equipo no existe: {payload['equipo_id']}")
+            logger.warning("[crud] Equipo no existe: %s", payload['equipo_id'])
             return None
 
     equipo_antes = player.equipo_id
+    goles_antes = player.goles or 0
 
     # Aplica cambios
     for field, value in payload.items():
         setattr(player, field, value)
 
+    if equipo_antes == player.equipo_id:
+        _bump_team_goals(db, player.equipo_id, (player.goles or 0) - goles_antes)
+    else:
+        _bump_team_goals(db, equipo_antes, -goles_antes)
+        _bump_team_goals(db, player.equipo_id, player.goles or 0)
+
+    cache.mark_players(db, [player_id])
+    if "equipo_id" in payload or "goles" in payload:
+        cache.mark_teams(db, {equipo_antes, player.equipo_id})
     try:
         db.commit()
     except IntegrityError:
@@ -146,7 +429,7 @@ def update_player(db: Session, player_id: int, patch: Optional[Union[dict, "sche
         return None
 
     db.refresh(player)
-    logger.info(f"[crud] Jugador actualizado: {player.id} - {player.nombre}")
+    logger.info("[crud] Jugador actualizado: %s - %s", player.id, player.nombre)
 
     # (Opcional) si quieres mantener contadores por equipo cuando cambie equipo_id:
     if equipo_antes != player.equipo_id:
@@ -180,14 +463,17 @@ def update_player(db: Session, player_id: int, patch: Optional[Union[dict, "sche
 
 
 def delete_player(db: Session, player_id: int) -> bool:
-    logger.debug(f"[crud] Eliminando jugador id={player_id}")
+    logger.debug("[crud] Eliminando jugador id=%s", player_id)
     player = db.get(models.Player, player_id)
     if not player:
-        logger.warning(f"[crud] Jugador a eliminar no encontrado: {player_id}")
+        logger.warning("[crud] Jugador a eliminar no encontrado: %s", player_id)
         return False
 
     equipo_id = player.equipo_id
+    _bump_team_goals(db, equipo_id, -(player.goles or 0))
     db.delete(player)
+    cache.mark_players(db, [player_id])
+    cache.mark_teams(db, [equipo_id])
     db.commit()
 
     if equipo_id:
@@ -199,91 +485,228 @@ def delete_player(db: Session, player_id: int) -> bool:
             team.jugadores = int(total or 0)
             db.commit()
 
-    logger.info(f"[crud] Jugador eliminado: {player_id}")
+    logger.info("[crud] Jugador eliminado: %s", player_id)
     return True
 
-def get_players_without_team(db: Session) -> list[models.Player]:
+def get_players_without_team(db: Session) -> list:
     logger.debug("[crud] Devolviendo jugadores que no tienen equipo")
     players = db.execute(
-        select(models.Player).order_by(models.Player.id.desc()).where(models.Player.equipo_id == None)).scalars().all()
-    logger.info(f"[crud] Se encontraron {len(players)} jugadores")
+        select(*_columns(models.Player)).order_by(models.Player.id.desc()).where(models.Player.equipo_id == None)).all()
+    logger.info("[crud] Se encontraron %s jugadores", len(players))
     return players
 
 #Estadisticas
-def upsert_stats_for_player(db: Session, player_id: int, data: dict) -> models.Stats:
-    logger.debug(f"[crud] Upsert estadisticas player_id={player_id}: {data}")
-    st = db.query(models.Stats).filter(models.Stats.player_id == player_id).one_or_none()
-    if st is None:
-        st = models.Stats(player_id=player_id, **data)
-        db.add(st)
-    else:
-        for k, v in data.items():
-            setattr(st, k, v)
+def _stats_returning(db: Session, stmt) -> dict:
+    # Fila resultante del upsert (RETURNING) sin una lectura posterior
+    return dict(db.execute(stmt.returning(*models.Stats.__table__.columns)).mappings().one())
+
+def upsert_stats_for_player(db: Session, player_id: int, data: dict) -> dict:
+    logger.debug("[crud] Upsert estadisticas player_id=%s: %s", player_id, data)
+    # Una sola sentencia: sin SELECT previo ni carrera entre dos altas concurrentes del mismo jugador
+    stmt = _upsert_stmt(db, models.Stats, "player_id", data).values(player_id=player_id, **data)
+    st = _stats_returning(db, stmt)
+    cache.mark_players(db, [player_id])
+    db.commit()
+    logger.info("[crud] Estadisticas actualizadas player_id=%s", player_id)
+    return st
+
+def increment_stats_for_player(db: Session, player_id: int, deltas: dict) -> dict | None:
+    # Suma los incrementos sobre los valores guardados (stats.col += delta) en la base de datos
+    deltas = {k: v for k, v in deltas.items() if v}
+    logger.debug("[crud] Incremento de estadisticas player_id=%s: %s", player_id, deltas)
+    if not deltas:
+        st = get_stats(db, player_id)
+        return {c: getattr(st, c) for c in models.Stats.__table__.columns.keys()} if st else None
+    stmt = _increment_stmt(db, models.Stats, "player_id", deltas).values(player_id=player_id, **deltas)
+    st = _stats_returning(db, stmt)
+    cache.mark_players(db, [player_id])
     db.commit()
-    db.refresh(st)
-    logger.info(f"[crud] Estadisticas actualizadas player_id={player_id}")
+    logger.info("[crud] Estadisticas incrementadas player_id=%s", player_id)
     return st
 
+def upsert_stats_bulk(db: Session, items: list[dict]) -> tuple[list[int], list[dict]]:
+    logger.debug("[crud] Upsert estadisticas en bloque: %s elementos", len(items))
+    valid, errors = _validate_batch(schemas.StatsBatchItem, items)
+
+    player_ids = {data.player_id for _, data in valid}
+    known = set(db.scalars(select(models.Player.id).where(models.Player.id.in_(player_ids)))) if player_ids else set()
+
+    # Si un jugador aparece varias veces gana la ultima aparicion
+    rows: dict[int, dict] = {}
+    for index, data in valid:
+        if data.player_id not in known:
+            errors.append({"index": index, "detail": f"Jugador no encontrado: {data.player_id}"})
+            continue
+        rows[data.player_id] = data.model_dump()
+
+    if rows:
+        # Un solo INSERT ... ON CONFLICT para altas y modificaciones
+        db.execute(_upsert_stmt(db, models.Stats, "player_id", schemas.StatsIn.model_fields), list(rows.values()))
+        cache.mark_players(db, rows)
+        db.commit()
+
+    errors.sort(key=lambda e: e["index"])
+    logger.info("[crud] Estadisticas actualizadas en bloque: %s (errores: %s)", len(rows), len(errors))
+    return list(rows), errors
+
 def get_stats(db: Session, player_id: int) -> models.Stats | None:
-    logger.debug(f"[crud] Obteniendo estadisticas player_id={player_id}")
+    logger.debug("[crud] Obteniendo estadisticas player_id=%s", player_id)
     st = db.query(models.Stats).filter(models.Stats.player_id == player_id).one_or_none()
     if st:
-        logger.info(f"[crud] Estadisticas encontradas player_id={player_id}")
+        logger.info("[crud] Estadisticas encontradas player_id=%s", player_id)
     else:
-        logger.warning(f"[crud] Estadisticas no encontradas player_id={player_id}")
+        logger.warning("[crud] Estadisticas no encontradas player_id=%s", player_id)
     return st
 
-def get_player_and_stats(db: Session, player_id: int) -> models.Player | None:
-    logger.debug(f"[crud] Buscando jugador id={player_id}")
-    player = db.execute(select(models.Player, models.Stats)
-        .join(models.Stats, models.Player.id == models.Stats.player_id) 
-        .where(models.Player.id == player_id)).scalars().first()
-    if player:
-        logger.info(f"[crud] Jugador encontrado: {player.id} - {player.nombre}")
-    else:
-        logger.warning(f"[crud] Jugador no encontrado: {player_id}")
-    return player
-
 #Partidos
 def create_game(db: Session, local_id: int, visitante_id: int, fecha=None, jornada: int | None = None) -> models.Game:
-    logger.debug(f"[crud] Creando partido L:{local_id} vs V:{visitante_id} fecha={fecha} jornada={jornada}")
+    logger.debug("[crud] Creando partido L:%s vs V:%s fecha=%s jornada=%s", local_id, visitante_id, fecha, jornada)
     if local_id == visitante_id:
         raise ValueError("Un equipo no puede jugar contra sí mismo")
 
-    game = models.Game(local_id=local_id, visitante_id=visitante_id, fecha=fecha, jornada=jornada)
+    # Temporada por la fecha del partido (sin fecha, la temporada en curso)
+    temporada = seasons.season_of(fecha)
+    seasons.require_open(db, [temporada])
+    game = models.Game(local_id=local_id, visitante_id=visitante_id, fecha=fecha, jornada=jornada, temporada_id=temporada)
     db.add(game)
+    cache.mark(db, "games")
     try:
         db.commit()
     except IntegrityError as e:
         db.rollback()
-        logger.warning(f"[crud] Duplicado de partido o restricción violada: {e}")
+        logger.warning("[crud] Duplicado de partido o restricción violada: %s", e)
         raise ValueError("Partido duplicado para esa fecha/jornada")
     db.refresh(game)
-    logger.info(f"[crud] Partido creado id={game.id} L:{local_id} vs V:{visitante_id}")
+    logger.info("[crud] Partido creado id=%s L:%s vs V:%s", game.id, local_id, visitante_id)
     return game
 
 
+def _live_result(game_id, local_id, visitante_id, jornada, goles_local, goles_visitante) -> dict:
+    return {
+        "id": game_id, "local_id": local_id, "visitante_id": visitante_id, "jornada": jornada,
+        "goles_local": goles_local, "goles_visitante": goles_visitante, "estado": "jugado",
+    }
+
+
 def set_game_result(db: Session, game_id: int, goles_local: int, goles_visitante: int) -> models.Game | None:
-    logger.debug(f"[crud] Asignando resultado partido id={game_id}: {goles_local}-{goles_visitante}")
+    logger.debug("[crud] Asignando resultado partido id=%s: %s-%s", game_id, goles_local, goles_visitante)
     game = db.get(models.Game, game_id)
     if not game:
-        logger.warning(f"[crud] Partido no encontrado: {game_id}")
+        logger.warning("[crud] Partido no encontrado: %s", game_id)
         return None
+    seasons.require_open(db, [game.temporada_id])
+
+    # Se aplica solo la diferencia sobre el registro de ambos equipos (corrige resultados ya jugados)
+    deltas: dict[int, dict] = {}
+    if game.estado == "jugado":
+        _add_result_delta(deltas, game.local_id, game.visitante_id, game.goles_local or 0, game.goles_visitante or 0, -1)
+    _add_result_delta(deltas, game.local_id, game.visitante_id, int(goles_local), int(goles_visitante), +1)
 
     game.goles_local = int(goles_local)
     game.goles_visitante = int(goles_visitante)
     game.estado = "jugado"
+    _apply_team_deltas(db, deltas)
+    _apply_team_season_deltas(db, {game.temporada_id: deltas})
+    live.publish(db, "game_result", _live_result(game.id, game.local_id, game.visitante_id, game.jornada,
+                                                 game.goles_local, game.goles_visitante),
+                 teams=(game.local_id, game.visitante_id))
+    jornada = game.jornada if game.jornada is not None else standings.NO_JORNADA
+    standings.apply_result_deltas(db, {(game.temporada_id, jornada): deltas})
+    cache.mark(db, "games")
+    cache.mark_teams(db, deltas)
     db.commit()
     db.refresh(game)
-    logger.info(f"[crud] Partido actualizado id={game.id} -> {goles_local}-{goles_visitante}")
+    logger.info("[crud] Partido actualizado id=%s -> %s-%s", game.id, goles_local, goles_visitante)
     return game
 
 
-def list_games(db: Session, team_id: int | None = None) -> list[models.Game]:
-    logger.debug(f"[crud] Listando partidos team_id={team_id}")
-    stmt = select(models.Game).order_by(models.Game.fecha.desc(), models.Game.id.desc())
-    if team_id:
-        stmt = stmt.where((models.Game.local_id == team_id) | (models.Game.visitante_id == team_id))
-    games = db.execute(stmt).scalars().all()
-    logger.info(f"[crud] Se encontraron {len(games)} partidos")
-    return games
\ No newline at end of file
+def set_game_results_bulk(db: Session, items: list[dict]) -> tuple[list[int], set[int], list[dict]]:
+    logger.debug("[crud] Asignando resultados en bloque: %s elementos", len(items))
+    valid, errors = _validate_batch(schemas.GameResultBatchItem, items)
+
+    game_ids = {data.game_id for _, data in valid}
+    previous = {
+        row.id: row
+        for row in db.execute(
+            select(
+                models.Game.id, models.Game.local_id, models.Game.visitante_id, models.Game.jornada,
+                models.Game.temporada_id, models.Game.estado, models.Game.goles_local, models.Game.goles_visitante,
+            ).where(models.Game.id.in_(game_ids))
+        )
+    } if game_ids else {}
+    # Los partidos de temporadas cerradas no cambian (su registro está congelado)
+    closed = dict(db.execute(
+        select(models.Season.id, models.Season.estado).where(
+            models.Season.id.in_({g.temporada_id for g in previous.values()}), models.Season.estado != "abierta"
+        )
+    ).all()) if previous else {}
+
+    rows: dict[int, dict] = {}
+    for index, data in valid:
+        if data.game_id not in previous:
+            errors.append({"index": index, "detail": f"Partido no encontrado: {data.game_id}"})
+            continue
+        temporada = previous[data.game_id].temporada_id
+        if temporada in closed:
+            errors.append({"index": index, "detail": f"La temporada {temporada} está {closed[temporada]}"})
+            continue
+        rows[data.game_id] = {
+            "id": data.game_id,
+            "goles_local": data.goles_local,
+            "goles_visitante": data.goles_visitante,
+            "estado": "jugado",
+        }
+
+    affected_teams: set[int] = set()
+    if rows:
+        deltas: dict[int, dict] = {}
+        deltas_by_season: dict[int, dict[int, dict]] = {}
+        deltas_by_jornada: dict[tuple[int, int], dict[int, dict]] = {}
+        for gid, row in rows.items():
+            old = previous[gid]
+            jornada_deltas = deltas_by_jornada.setdefault(
+                (old.temporada_id, old.jornada if old.jornada is not None else standings.NO_JORNADA), {}
+            )
+            for target in (deltas, deltas_by_season.setdefault(old.temporada_id, {}), jornada_deltas):
+                if old.estado == "jugado":
+                    _add_result_delta(target, old.local_id, old.visitante_id, old.goles_local or 0, old.goles_visitante or 0, -1)
+                _add_result_delta(target, old.local_id, old.visitante_id, row["goles_local"], row["goles_visitante"], +1)
+            affected_teams.update((old.local_id, old.visitante_id))
+        db.execute(update(models.Game), list(rows.values()))
+        _apply_team_deltas(db, deltas)
+        _apply_team_season_deltas(db, deltas_by_season)
+        if live.active():
+            for gid, row in rows.items():
+                old = previous[gid]
+                live.publish(db, "game_result", _live_result(gid, old.local_id, old.visitante_id, old.jornada,
+                                                             row["goles_local"], row["goles_visitante"]),
+                             teams=(old.local_id, old.visitante_id))
+        standings.apply_result_deltas(db, deltas_by_jornada)
+        cache.mark(db, "games")
+        cache.mark_teams(db, affected_teams)
+        db.commit()
+
+    errors.sort(key=lambda e: e["index"])
+    logger.info("[crud] Resultados asignados en bloque: %s (errores: %s)", len(rows), len(errors))
+    return list(rows), affected_teams, errors
+
+
+def list_games(
+    db: Session,
+    team_id: int | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: int | None = None,
+    estado: str | None = None,
+    jornada: int | None = None,
+    fecha_desde: datetime | None = None,
+    fecha_hasta: datetime | None = None,
+    temporada: int | None = None,
+) -> tuple[list, int | None]:
+    logger.debug(
+        "[crud] Listando partidos team_id=%s limit=%s cursor=%s estado=%s jornada=%s fecha_desde=%s fecha_hasta=%s temporada=%s",
+        team_id, limit, cursor, estado, jornada, fecha_desde, fecha_hasta, temporada,
+    )
+    stmt = _games_stmt(team_id, estado, jornada, fecha_desde, fecha_hasta, temporada)
+    games, next_cursor = _paginate(db, stmt, models.Game.id, limit, cursor)
+    logger.info("[crud] Se encontraron %s partidos", len(games))
+    return games, next_cursor
\ No newline at end of file
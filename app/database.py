@@ -1,15 +1,226 @@
 # database.py
-from sqlalchemy import create_engine
+import logging
+import re
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from . import config
+
+logger = logging.getLogger("liga")
+
+# Base de datos (SQLite local por defecto, ver config.DATABASE_URL)
+DATABASE_URL = config.DATABASE_URL
+
+# PRAGMAs por perfil (config.SQLITE_PROFILE)
+SQLITE_PROFILES = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",       # los lectores no bloquean al escritor ni al revés
+        "synchronous": "NORMAL",     # en WAL es seguro ante caídas del proceso y evita un fsync por commit
+        "busy_timeout": 5000,        # espera (ms) al lock de escritura en lugar de "database is locked"
+        "mmap_size": 268435456,      # 256 MB de lectura por mmap
+        "cache_size": -65536,        # 64 MB de caché de páginas por conexión
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    },
+}
+
+# journal_mode es persistente en el fichero: lo fija el engine de escritura
+_WRITE_ONLY_PRAGMAS = {"journal_mode"}
+
+
+def _parse_pragmas(spec: str) -> dict:
+    pragmas = {}
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        name, _, value = item.partition("=")
+        name, value = name.strip(), value.strip()
+        if not re.fullmatch(r"[a-z_]+", name) or not re.fullmatch(r"-?\w+", value):
+            raise ValueError(f"PRAGMA no válido en LIGA_SQLITE_PRAGMAS: {item!r}")
+        pragmas[name] = value
+    return pragmas
+
+
+def _sqlite_pragmas(read_only: bool = False) -> dict:
+    if config.SQLITE_PROFILE not in SQLITE_PROFILES:
+        raise ValueError(f"Perfil SQLite desconocido: {config.SQLITE_PROFILE}")
+    pragmas = {**SQLITE_PROFILES[config.SQLITE_PROFILE], **_parse_pragmas(config.SQLITE_PRAGMAS)}
+    if read_only:
+        pragmas = {k: v for k, v in pragmas.items() if k not in _WRITE_ONLY_PRAGMAS}
+        pragmas["query_only"] = "ON"
+    return pragmas
+
+
+def _on_connect(pragmas: dict):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_pragmas
+
+
+def _is_file_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
 
-# Base de datos local SQLite
-DATABASE_URL = "sqlite:///./liga.db"
+def _pool_args(url, size: int, overflow: int) -> dict:
+    # Las bases en memoria usan un pool de una sola conexión: no admiten estos parámetros
+    if url.get_backend_name() == "sqlite" and not _is_file_sqlite(url):
+        return {}
+    args = {"pool_size": size, "max_overflow": overflow, "pool_timeout": config.DB_POOL_TIMEOUT}
+    if url.get_backend_name() != "sqlite":
+        # Un servidor puede cerrar conexiones inactivas: se comprueban antes de reutilizarlas
+        args["pool_pre_ping"] = True
+    return args
 
-# Crear el engine de SQLAlchemy
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Necesario para SQLite en entorno multihilo (FastAPI)
-)
+
+def _make_engine(url: str, read_only: bool = False, size: int = 5, overflow: int = 10):
+    parsed = make_url(url)
+    connect_args = {}
+    if parsed.get_backend_name() == "sqlite":
+        connect_args["check_same_thread"] = False  # Necesario para SQLite en entorno multihilo (FastAPI)
+        if read_only and _is_file_sqlite(parsed):
+            # Conexión de solo lectura a nivel de SQLite (URI con mode=ro)
+            parsed = parsed.set(database=f"file:{parsed.database}?mode=ro").update_query_dict({"uri": "true"})
+    new_engine = create_engine(parsed, connect_args=connect_args, **_pool_args(parsed, size, overflow))
+    if parsed.get_backend_name() == "sqlite":
+        pragmas = _sqlite_pragmas(read_only)
+        if pragmas:
+            event.listen(new_engine, "connect", _on_connect(pragmas))
+    return new_engine
+
+
+# Engine de escritura: create_all/upgrade_schema, crud y tareas en segundo plano
+engine = _make_engine(DATABASE_URL, size=config.DB_POOL_SIZE, overflow=config.DB_MAX_OVERFLOW)
+
+# Engine de solo lectura para los GET (en WAL leen sin esperar al escritor)
+if config.DB_READ_ENGINE and _is_file_sqlite(make_url(DATABASE_URL)):
+    read_engine = _make_engine(
+        DATABASE_URL, read_only=True, size=config.DB_READ_POOL_SIZE, overflow=config.DB_READ_MAX_OVERFLOW
+    )
+else:
+    read_engine = engine
 
 # Sesión de conexión a la base de datos
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
+# Engine asíncrono para las rutas de lectura (solo si LIGA_ASYNC_DB=1: requiere aiosqlite)
+async_engine = None
+AsyncSessionLocal = None
+if config.ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_url = make_url(config.ASYNC_DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_url, **_pool_args(_async_url, config.DB_READ_POOL_SIZE, config.DB_READ_MAX_OVERFLOW)
+    )
+    if _async_url.get_backend_name() == "sqlite":
+        event.listen(async_engine.sync_engine, "connect", _on_connect(_sqlite_pragmas(read_only=True)))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def upgrade_schema(metadata) -> list[str]:
+    # create_all no modifica tablas existentes: añadimos las columnas nuevas que falten
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def upgrade_autoincrement(metadata) -> list[str]:
+    # SQLite reutiliza los id más altos que se borran salvo en tablas con AUTOINCREMENT (sqlite_autoincrement
+    # en el modelo). ALTER TABLE no puede añadirlo: se crea la tabla de nuevo, se copian las filas y se
+    # renombra, todo en una transacción. Los índices los vuelve a crear upgrade_indexes
+    if engine.dialect.name != "sqlite":
+        return []
+    rebuilt = []
+    raw = engine.raw_connection()
+    conn = raw.driver_connection
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # BEGIN/COMMIT explícitos: el DDL de sqlite3 no abre transacción
+    cursor = conn.cursor()
+    foreign_keys = cursor.execute("PRAGMA foreign_keys").fetchone()[0]
+    try:
+        # Fuera de la transacción: al borrar la tabla original no se comprueban ni se propagan sus claves foráneas
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        for table in metadata.sorted_tables:
+            if not table.dialect_options["sqlite"]["autoincrement"]:
+                continue
+            row = cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)).fetchone()
+            if row is None or "AUTOINCREMENT" in row[0].upper():
+                continue
+            new = f"{table.name}_nueva"
+            ddl = str(CreateTable(table).compile(dialect=engine.dialect)).strip()
+            ddl = ddl.replace(f"CREATE TABLE {table.name} ", f"CREATE TABLE {new} ", 1)
+            columns = ", ".join(column.name for column in table.columns)
+            cursor.execute("BEGIN")
+            try:
+                cursor.execute(f"DROP TABLE IF EXISTS {new}")
+                cursor.execute(ddl)
+                cursor.execute(f"INSERT INTO {new} ({columns}) SELECT {columns} FROM {table.name}")
+                cursor.execute(f"DROP TABLE {table.name}")
+                cursor.execute(f"ALTER TABLE {new} RENAME TO {table.name}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            rebuilt.append(table.name)
+    finally:
+        cursor.execute(f"PRAGMA foreign_keys={foreign_keys}")
+        cursor.close()
+        conn.isolation_level = isolation_level
+        raw.close()
+    return rebuilt
+
+
+def retire_indexes(retired: dict[str, tuple[str, ...]]) -> list[str]:
+    # Borra los índices que el modelo ya no declara (sustituidos por otros que crea upgrade_indexes)
+    inspector = inspect(engine)
+    dropped = []
+    with engine.begin() as conn:
+        for table, names in retired.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table)}
+            for name in names:
+                if name in existing:
+                    conn.execute(text(f"DROP INDEX {name}"))
+                    dropped.append(name)
+    return dropped
+
+
+def upgrade_indexes(metadata) -> list[str]:
+    # create_all tampoco crea los índices nuevos de tablas que ya existían
+    inspector = inspect(engine)
+    created = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name in existing:
+                continue
+            try:
+                with engine.begin() as conn:
+                    index.create(conn)
+            except (IntegrityError, OperationalError) as e:
+                # Un índice único sobre datos que ya tienen duplicados: se deja sin crear
+                logger.warning("No se pudo crear el índice %s: %s", index.name, e.orig)
+                continue
+            created.append(index.name)
+    return created
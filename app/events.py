@@ -0,0 +1,205 @@
+# app/events.py
+# Eventos de partido: ingesta en bloque (NDJSON) y agregación por micro-lotes.
+# Los eventos solo se insertan; el agregador (trabajo "match_events" de jobs.py) suma los
+# eventos nuevos desde la marca de agua en los contadores de Player, Stats y Team con
+# una sentencia por tabla, en lugar de reescribir filas evento a evento.
+import json
+import logging
+import threading
+from collections import Counter, defaultdict
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import cache, config, crud, models, schemas
+
+logger = logging.getLogger("liga")
+
+# Líneas NDJSON validadas e insertadas juntas
+INGEST_CHUNK = 1000
+
+WATERMARK = "match_events"
+
+# Efecto de cada tipo de evento: (contadores de Player, contadores de Stats)
+EVENT_EFFECTS = {
+    "gol": ({"goles": 1}, {}),
+    "asistencia": ({}, {"asistencias": 1}),
+    "tiro": ({}, {"tiros": 1}),
+    "tiro_a_puerta": ({}, {"tiros": 1, "tiros_a_puerta": 1}),
+    "regate": ({}, {"regates_intentados": 1}),
+    "regate_exitoso": ({}, {"regates_intentados": 1, "regates_exitosos": 1}),
+    "pase": ({}, {"pases_intentados": 1}),
+    "pase_completado": ({}, {"pases_intentados": 1, "pases_completados": 1}),
+    "entrada": ({}, {"entradas_intentadas": 1}),
+    "entrada_exitosa": ({}, {"entradas_intentadas": 1, "entradas_exitosas": 1}),
+    "parada": ({}, {"paradas": 1}),
+    "tarjeta_amarilla": ({"tarjetas_a": 1}, {}),
+    "tarjeta_roja": ({"tarjetas_r": 1}, {}),
+}
+
+PLAYER_COUNTERS = ("goles", "tarjetas_a", "tarjetas_r")
+STATS_COUNTERS = tuple(schemas.StatsIn.model_fields)
+
+_players = models.Player.__table__
+_PLAYER_INCREMENT = (
+    update(_players)
+    .where(_players.c.id == bindparam("b_id"))
+    .values({f: func.coalesce(_players.c[f], 0) + bindparam(f"d_{f}") for f in PLAYER_COUNTERS})
+)
+
+# Un solo agregador a la vez en el proceso; entre procesos protege la marca de agua condicional
+_aggregate_lock = threading.Lock()
+
+
+async def read_ndjson(stream, chunk_size: int = INGEST_CHUNK):
+    # Agrupa las líneas del cuerpo en trozos de (número de línea, objeto o None si no es JSON válido)
+    buffer, chunk, index = b"", [], 0
+
+    def parse(line: bytes):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    async for part in stream:
+        buffer += part
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                chunk.append((index, parse(line)))
+            index += 1
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if buffer.strip():
+        chunk.append((index, parse(buffer)))
+    if chunk:
+        yield chunk
+
+
+def ingest(db: Session, lines: list[tuple[int, object]]) -> tuple[int, list[dict]]:
+    # Valida un trozo de eventos e inserta los correctos con un único INSERT; errores por línea
+    errors, valid = [], []
+    for index, raw in lines:
+        if not isinstance(raw, dict):
+            errors.append({"index": index, "detail": "La línea no es un objeto JSON"})
+            continue
+        try:
+            valid.append((index, schemas.MatchEventIn.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"index": index, "detail": e.errors(include_url=False, include_context=False)})
+
+    game_ids = {ev.game_id for _, ev in valid}
+    player_ids = {ev.player_id for _, ev in valid}
+    games = {
+        row.id: (row.local_id, row.visitante_id)
+        for row in db.execute(
+            select(models.Game.id, models.Game.local_id, models.Game.visitante_id).where(models.Game.id.in_(game_ids))
+        )
+    } if game_ids else {}
+    teams = dict(db.execute(
+        select(models.Player.id, models.Player.equipo_id).where(models.Player.id.in_(player_ids))
+    ).all()) if player_ids else {}
+
+    rows = []
+    for index, ev in valid:
+        if ev.game_id not in games:
+            errors.append({"index": index, "detail": f"Partido no encontrado: {ev.game_id}"})
+        elif ev.player_id not in teams:
+            errors.append({"index": index, "detail": f"Jugador no encontrado: {ev.player_id}"})
+        elif teams[ev.player_id] not in games[ev.game_id]:
+            errors.append({"index": index, "detail": f"El jugador {ev.player_id} no juega el partido {ev.game_id}"})
+        else:
+            rows.append(ev.model_dump())
+    if rows:
+        db.execute(insert(models.MatchEvent), rows)
+        db.commit()
+    errors.sort(key=lambda e: e["index"])
+    logger.debug("[events] Insertados %s eventos (errores: %s)", len(rows), len(errors))
+    return len(rows), errors
+
+
+def _watermark(db: Session) -> int:
+    last = db.scalar(select(models.EventWatermark.ultimo_id).where(models.EventWatermark.nombre == WATERMARK))
+    if last is None:
+        db.execute(crud._dialect_insert(db, models.EventWatermark).values(nombre=WATERMARK, ultimo_id=0).on_conflict_do_nothing())
+        return 0
+    return last
+
+
+def aggregate(db: Session, limit: int | None = None, commit: bool = True) -> dict:
+    # Suma en los contadores los eventos posteriores a la marca de agua (como mucho `limit`).
+    # La marca de agua y los contadores se confirman en la misma transacción (exactamente una vez)
+    limit = limit or config.EVENTS_AGGREGATE_BATCH
+    E, W = models.MatchEvent, models.EventWatermark
+    with _aggregate_lock:
+        last = _watermark(db)
+        window = select(E.id).where(E.id > last).order_by(E.id).limit(limit).subquery()
+        upto = db.scalar(select(func.max(window.c.id)))
+        if upto is None:
+            return {"events": 0, "players": [], "pending": False}
+
+        # Se mueve la marca primero: si otro agregador ya la movió no se aplica nada dos veces
+        moved = db.execute(
+            update(W).where(W.nombre == WATERMARK, W.ultimo_id == last).values(ultimo_id=upto),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if moved != 1:
+            raise RuntimeError(f"La marca de agua de eventos cambió durante la agregación ({last})")
+
+        counts = db.execute(
+            select(E.player_id, E.tipo, func.count())
+            .where(E.id > last, E.id <= upto)
+            .group_by(E.player_id, E.tipo)
+        ).all()
+        player_deltas: dict[int, Counter] = defaultdict(Counter)
+        stats_deltas: dict[int, Counter] = defaultdict(Counter)
+        total = 0
+        for player_id, tipo, n in counts:
+            total += n
+            player_effect, stats_effect = EVENT_EFFECTS[tipo]
+            for field, k in player_effect.items():
+                player_deltas[player_id][field] += k * n
+            for field, k in stats_effect.items():
+                stats_deltas[player_id][field] += k * n
+
+        if player_deltas:
+            db.execute(_PLAYER_INCREMENT, [
+                {"b_id": pid, **{f"d_{f}": d[f] for f in PLAYER_COUNTERS}} for pid, d in player_deltas.items()
+            ])
+        if stats_deltas:
+            db.execute(
+                crud._increment_stmt(db, models.Stats, "player_id", STATS_COUNTERS),
+                [{"player_id": pid, **{f: d[f] for f in STATS_COUNTERS}} for pid, d in stats_deltas.items()],
+            )
+
+        # Goles por equipo: columna Team.goles en modo "stored" y respuestas cacheadas de los equipos
+        scorers = {pid: d["goles"] for pid, d in player_deltas.items() if d["goles"]}
+        team_goals: Counter = Counter()
+        if scorers:
+            for pid, team_id in db.execute(
+                select(models.Player.id, models.Player.equipo_id).where(models.Player.id.in_(scorers))
+            ):
+                if team_id:
+                    team_goals[team_id] += scorers[pid]
+        for team_id, goals in team_goals.items():
+            crud._bump_team_goals(db, team_id, goals)
+
+        touched = sorted(set(player_deltas) | set(stats_deltas))
+        cache.mark_players(db, touched)
+        cache.mark_teams(db, team_goals)
+        if commit:
+            db.commit()
+    logger.info("[events] Acumulados %s eventos hasta id=%s en %s jugadores", total, upto, len(touched))
+    return {"events": total, "players": touched, "pending": total >= limit}
+
+
+def status(db: Session) -> dict:
+    E = models.MatchEvent
+    last = db.scalar(select(models.EventWatermark.ultimo_id).where(models.EventWatermark.nombre == WATERMARK)) or 0
+    return {
+        "total": db.scalar(select(func.count()).select_from(E)),
+        "aggregated_up_to": last,
+        "pending": db.scalar(select(func.count()).select_from(E).where(E.id > last)),
+    }
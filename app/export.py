@@ -0,0 +1,145 @@
+# app/export.py
+# Exportación en streaming (GET /export/{players|stats|games}) en NDJSON, CSV o Parquet.
+# Las filas salen de un cursor con yield_per (cursor del lado del servidor en PostgreSQL) en
+# bloques de EXPORT_BATCH; cada bloque se codifica y se envía antes de leer el siguiente, así
+# que la memoria no depende del tamaño de la tabla. Los filtros van en el WHERE de la consulta.
+import csv
+import io
+import logging
+import time
+from datetime import datetime
+
+from pydantic_core import to_json
+from sqlalchemy import select
+
+from . import config, crud, models
+from .database import ReadSessionLocal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # sin pyarrow no hay formato parquet
+    pa = pq = None
+
+logger = logging.getLogger("liga")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Filtros admitidos por cada recurso
+FILTERS = {
+    "players": {"posicion", "equipo_id"},
+    "stats": {"posicion", "equipo_id"},
+    "games": {"team_id", "estado", "jornada", "fecha_desde", "fecha_hasta", "temporada"},
+}
+
+
+def build_stmt(resource: str, filters: dict):
+    # filters: solo los que tienen valor. ValueError si alguno no se aplica al recurso
+    unknown = sorted(set(filters) - FILTERS[resource])
+    if unknown:
+        raise ValueError(f"Filtros no disponibles para {resource}: {', '.join(unknown)}")
+    if resource == "players":
+        return crud._players_stmt(filters.get("posicion"), filters.get("equipo_id"), ()).order_by(models.Player.id)
+    if resource == "games":
+        return crud._games_stmt(
+            filters.get("team_id"), filters.get("estado"), filters.get("jornada"),
+            filters.get("fecha_desde"), filters.get("fecha_hasta"), filters.get("temporada"),
+        ).order_by(models.Game.id)
+    S, P = models.Stats, models.Player
+    stmt = select(*crud._columns(S))
+    if filters:
+        stmt = stmt.join(P, P.id == S.player_id)
+        if "posicion" in filters:
+            stmt = stmt.where(P.posicion == filters["posicion"])
+        if "equipo_id" in filters:
+            stmt = stmt.where(P.equipo_id == filters["equipo_id"])
+    return stmt.order_by(S.player_id)
+
+
+def _ndjson(keys: list[str], partitions):
+    for rows in partitions:
+        yield b"".join(to_json(dict(zip(keys, row))) + b"\n" for row in rows)
+
+
+def _csv(keys: list[str], partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(keys)
+    yield buffer.getvalue().encode()
+    for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([v.isoformat() if isinstance(v, datetime) else v for v in row] for row in rows)
+        yield buffer.getvalue().encode()
+
+
+class _Sink(io.RawIOBase):
+    # Fichero de solo escritura para ParquetWriter: se vacía tras cada grupo de filas y
+    # tell() sigue contando todo lo escrito (los offsets del pie de Parquet dependen de ello)
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_schema(columns):
+    types = {int: pa.int64(), float: pa.float64(), str: pa.string(), datetime: pa.timestamp("us")}
+    return pa.schema([(c.name, types[c.type.python_type]) for c in columns])
+
+
+def _parquet(schema, partitions):
+    # Un grupo de filas de Parquet por bloque del cursor
+    sink = _Sink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in partitions:
+            columns = list(zip(*rows))
+            writer.write_table(pa.table(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream(resource: str, stmt, fmt: str):
+    # Generador del cuerpo: abre su propia sesión (la de la petición ya se cerró al empezar a
+    # enviar la respuesta) y la cierra al terminar o si el cliente se desconecta
+    start = time.perf_counter()
+    rows = 0
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=config.EXPORT_BATCH))
+
+        def partitions():
+            nonlocal rows
+            for part in result.partitions():
+                rows += len(part)
+                yield part
+
+        if fmt == "ndjson":
+            yield from _ndjson(list(result.keys()), partitions())
+        elif fmt == "csv":
+            yield from _csv(list(result.keys()), partitions())
+        else:
+            yield from _parquet(_arrow_schema(stmt.selected_columns), partitions())
+    finally:
+        db.close()
+        logger.info("[export] %s.%s: %s filas en %.2fs", resource, fmt, rows, time.perf_counter() - start)
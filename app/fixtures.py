@@ -0,0 +1,123 @@
+# app/fixtures.py
+# Calendario de una temporada a doble vuelta generado en el servidor. round_robin usa el método del
+# círculo con los campos orientados como en el calendario canónico de de Werra: cada equipo alterna
+# casa y fuera salvo en un único doble partido por vuelta (n-2 dobles por vuelta, el mínimo), y la
+# segunda vuelta repite la primera con los campos invertidos. Todos los partidos se insertan en una
+# sola sentencia INSERT ... RETURNING; con dry_run se devuelve el calendario sin escribir nada.
+# La temporada es el año en que empieza (app/seasons.py) y se crea si no existe; sus jornadas se
+# numeran desde 1 (el índice único de partidos es por temporada).
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import cache, models, seasons
+
+logger = logging.getLogger("liga")
+
+# Primera jornada por defecto: primer sábado desde el 15 de agosto, a las 18:00
+DEFAULT_KICKOFF = (8, 15, 18)
+SATURDAY = 5
+
+
+def round_robin(team_ids: list[int]) -> list[list[tuple[int, int]]]:
+    # Lista de jornadas de pares (local, visitante). Con un número impar de equipos, el que se
+    # empareja con el hueco (None) descansa esa jornada
+    teams = list(team_ids) + ([None] if len(team_ids) % 2 else [])
+    n = len(teams)
+    if n < 2:
+        return []
+    rounds = n - 1
+    fixed = teams[-1]
+    first = []
+    for r in range(rounds):
+        # El equipo fijo juega con el r-ésimo, alternando campo; el resto, por parejas simétricas a r
+        pairs = [(fixed, teams[r]) if r % 2 else (teams[r], fixed)]
+        for k in range(1, n // 2):
+            a, b = teams[(r + k) % rounds], teams[(r - k) % rounds]
+            pairs.append((a, b) if k % 2 else (b, a))
+        first.append([(local, visitante) for local, visitante in pairs if local is not None and visitante is not None])
+    return first + [[(visitante, local) for local, visitante in jornada] for jornada in first]
+
+
+def default_kickoff(season: int) -> datetime:
+    month, day, hour = DEFAULT_KICKOFF
+    start = datetime(season, month, day, hour)
+    return start + timedelta(days=(SATURDAY - start.weekday()) % 7)
+
+
+def build_schedule(team_ids: list[int], primera_jornada: int, fecha_inicio: datetime, dias_entre_jornadas: int,
+                   season: int | None = None) -> list[dict]:
+    return [
+        {"local_id": local, "visitante_id": visitante, "jornada": primera_jornada + j,
+         "fecha": fecha_inicio + timedelta(days=dias_entre_jornadas * j), "temporada_id": season}
+        for j, jornada in enumerate(round_robin(team_ids))
+        for local, visitante in jornada
+    ]
+
+
+def generate(
+    db: Session,
+    season: int,
+    team_ids: list[int] | None = None,
+    fecha_inicio: datetime | None = None,
+    dias_entre_jornadas: int = 7,
+    primera_jornada: int | None = None,
+    dry_run: bool = False,
+) -> dict:
+    logger.debug(
+        "[fixtures] Generando calendario temporada=%s equipos=%s fecha_inicio=%s dias=%s primera_jornada=%s dry_run=%s",
+        season, team_ids, fecha_inicio, dias_entre_jornadas, primera_jornada, dry_run,
+    )
+    Game = models.Game
+    if team_ids is None:
+        team_ids = list(db.scalars(select(models.Team.id).order_by(models.Team.id)))
+    else:
+        if len(set(team_ids)) != len(team_ids):
+            raise ValueError("Equipos repetidos en team_ids")
+        missing = set(team_ids) - set(db.scalars(select(models.Team.id).where(models.Team.id.in_(team_ids))))
+        if missing:
+            raise ValueError(f"Equipos no encontrados: {sorted(missing)}")
+    if len(team_ids) < 2:
+        raise ValueError("Hacen falta al menos 2 equipos para generar el calendario")
+
+    start, end = seasons.window(season)
+    if fecha_inicio is None:
+        fecha_inicio = default_kickoff(season)
+    elif not start <= fecha_inicio < end:
+        raise ValueError(f"fecha_inicio fuera de la temporada {season} ({start.date()} a {(end - timedelta(days=1)).date()})")
+    estado = db.scalar(select(models.Season.estado).where(models.Season.id == season))
+    if estado not in (None, "abierta"):
+        raise ValueError(f"La temporada {season} está {estado}")
+    if primera_jornada is None:
+        primera_jornada = 1
+    rows = build_schedule(team_ids, primera_jornada, fecha_inicio, dias_entre_jornadas, season)
+    ultima_jornada = rows[-1]["jornada"]
+    # Solo cuentan las jornadas de esta temporada: las demás tienen su propia numeración
+    if db.scalar(select(Game.id).where(Game.temporada_id == season).limit(1)) is not None:
+        raise ValueError(f"La temporada {season} ya tiene partidos")
+
+    result = {
+        "temporada": season, "dry_run": dry_run, "equipos": len(team_ids),
+        "jornadas": ultima_jornada - primera_jornada + 1, "partidos": len(rows), "items": rows,
+    }
+    if dry_run:
+        logger.info("[fixtures] Calendario temporada %s (dry run): %s partidos en %s jornadas", season, len(rows), result["jornadas"])
+        return result
+
+    # Una sola sentencia: insertmanyvalues agrupa las filas en un INSERT ... VALUES (...), (...) RETURNING id
+    try:
+        seasons.ensure(db, [season])
+        ids = db.scalars(insert(Game).returning(Game.id, sort_by_parameter_order=True), rows).all()
+        cache.mark(db, "games")
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        logger.warning("[fixtures] Partido duplicado al insertar el calendario: %s", e)
+        raise ValueError("Partido duplicado para esa jornada")
+    for row, game_id in zip(rows, ids):
+        row["id"] = game_id
+    logger.info("[fixtures] Calendario temporada %s creado: %s partidos en %s jornadas", season, len(rows), result["jornadas"])
+    return result
@@ -0,0 +1,334 @@
+# app/importer.py
+"""Importación en bloque de equipos, jugadores, estadísticas y partidos desde CSV o NDJSON.
+
+Uso: python -m app.importer [--teams F] [--players F] [--stats F] [--games F] [--chunk 5000] [--skip-recompute]
+
+Cada fichero se lee en streaming (.csv con cabecera; .ndjson/.jsonl con un objeto por línea)
+y se inserta por trozos de --chunk filas con un executemany y un commit por trozo, directamente
+en la base configurada (LIGA_DATABASE_URL), sin pasar por la API. Se importan en orden
+equipos -> jugadores -> estadísticas -> partidos, así que los jugadores y los partidos pueden
+referirse a los equipos por nombre ("equipo", "local", "visitante") en lugar de por id.
+Los ficheros de /export se pueden volver a importar tal cual (conservan los id). Los partidos
+sin temporada_id van a la temporada de su fecha, y las temporadas que falten se crean abiertas; los
+de temporadas cerradas o archivadas se descartan como filas erróneas.
+
+Al terminar se recalculan una sola vez los derivados: número de jugadores y registro de cada
+equipo, goles de equipo (modo stored), clasificación y valor de todos los jugadores en bloque.
+Sale con código 1 si alguna fila se descartó (las demás quedan importadas).
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import select, text
+
+from . import config, crud, models, schemas, seasons, standings, task, valuation
+from .database import SessionLocal, engine, upgrade_indexes, upgrade_schema
+
+logger = logging.getLogger("liga")
+
+# Errores mostrados por fichero (el resto solo se cuentan)
+MAX_ERRORS_SHOWN = 10
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_rows(path: str):
+    # (número de línea, dict o None si la línea no es un objeto JSON); los valores vacíos se omiten
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, {k: v for k, v in row.items() if v not in ("", None)}
+        return
+    with open(path, encoding="utf-8") as f:
+        for line, raw in enumerate(f, start=1):
+            if not raw.strip():
+                continue
+            try:
+                obj = json.loads(raw)
+            except ValueError:
+                obj = None
+            yield line, {k: v for k, v in obj.items() if v is not None} if isinstance(obj, dict) else None
+
+
+def _validation_detail(e: ValidationError) -> list:
+    return e.errors(include_url=False, include_context=False, include_input=False)
+
+
+class Importer:
+    def __init__(self, db, chunk: int):
+        self.db = db
+        self.chunk = chunk
+        self.report: dict[str, dict] = {}
+        self._teams_by_name: dict[str, int] = {}
+        self._team_ids: set[int] = set()
+        self._explicit_ids: set[str] = set()
+
+    def _load_teams_index(self) -> None:
+        rows = self.db.execute(select(models.Team.nombre, models.Team.id)).all()
+        self._teams_by_name = {nombre: tid for nombre, tid in rows}
+        self._team_ids = set(self._teams_by_name.values())
+
+    def _team(self, raw: dict, name_key: str, id_key: str) -> int | None:
+        # Equipo por id ("equipo_id") o por nombre ("equipo"); RowError si no existe
+        if id_key in raw:
+            try:
+                team_id = int(raw.pop(id_key))
+            except ValueError:
+                raise RowError(f"{id_key} no es un número")
+            if team_id not in self._team_ids:
+                raise RowError(f"Equipo no existe: {team_id}")
+            raw.pop(name_key, None)
+            return team_id
+        if name_key in raw:
+            name = raw.pop(name_key)
+            if name not in self._teams_by_name:
+                raise RowError(f"Equipo no existe: {name}")
+            return self._teams_by_name[name]
+        return None
+
+    def _explicit_id(self, table: str, raw: dict, row: dict) -> None:
+        # Se conserva el id del fichero (p.ej. una exportación) para que las referencias sigan valiendo
+        if "id" in raw:
+            row["id"] = int(raw["id"])
+            self._explicit_ids.add(table)
+
+    def _run(self, name: str, path: str, prepare, execute) -> None:
+        # prepare(raw) -> fila lista para insertar (o RowError / ValidationError); execute(filas) -> filas escritas
+        start = time.perf_counter()
+        read = written = 0
+        errors: list[dict] = []
+        rows_iter = read_rows(path)
+        while True:
+            block = list(itertools.islice(rows_iter, self.chunk))
+            if not block:
+                break
+            rows, lines = [], []
+            for line, raw in block:
+                read += 1
+                if raw is None:
+                    errors.append({"line": line, "detail": "La línea no es un objeto JSON"})
+                    continue
+                try:
+                    rows.append(prepare(raw))
+                    lines.append(line)
+                except ValidationError as e:
+                    errors.append({"line": line, "detail": _validation_detail(e)})
+                except (RowError, ValueError, TypeError) as e:
+                    errors.append({"line": line, "detail": str(e)})
+            if rows:
+                written += execute(rows, lines, errors)
+                self.db.commit()
+        seconds = time.perf_counter() - start
+        self.report[name] = {"file": path, "read": read, "written": written, "errors": errors, "seconds": seconds}
+        logger.info("[importer] %s: %s/%s filas en %.2fs (%s errores)", name, written, read, seconds, len(errors))
+
+    def _executemany(self, stmt, rows: list[dict]) -> int:
+        # Un executemany por conjunto de columnas (las filas con id explícito van aparte). Se ejecuta en
+        # la conexión, sin el INSERT masivo del ORM; las filas escritas se cuentan con RETURNING porque
+        # psycopg no da rowcount en executemany y ON CONFLICT DO NOTHING puede descartar filas
+        by_keys: dict[tuple, list[dict]] = defaultdict(list)
+        for row in rows:
+            by_keys[tuple(sorted(row))].append(row)
+        stmt = stmt.returning(stmt.table.c.id)
+        return sum(len(self.db.connection().execute(stmt, group).all()) for group in by_keys.values())
+
+    #Equipos
+    def teams(self, path: str) -> None:
+        def prepare(raw: dict) -> dict:
+            row = {"nombre": schemas.TeamCreate.model_validate(raw).nombre}
+            self._explicit_id("equipos", raw, row)
+            return row
+
+        # Un nombre ya existente no es un error: se conserva el equipo (reimportaciones)
+        stmt = crud._dialect_insert(self.db, models.Team).on_conflict_do_nothing(index_elements=["nombre"])
+        self._run("equipos", path, prepare, lambda rows, lines, errors: self._executemany(stmt, rows))
+        self._load_teams_index()
+
+    #Jugadores
+    def players(self, path: str) -> None:
+        def prepare(raw: dict) -> dict:
+            equipo_id = self._team(raw, "equipo", "equipo_id")
+            # valor y valor_mercado se recalculan al final (revalue)
+            raw.pop("valor", None)
+            raw.pop("valor_mercado", None)
+            row = schemas.PlayerCreate.model_validate(raw).model_dump(exclude={"valor", "equipo_id"})
+            row["equipo_id"] = equipo_id
+            self._explicit_id("jugadores", raw, row)
+            return row
+
+        # Solo puede chocar un id explícito ya existente (reimportar una exportación): se conserva el jugador
+        stmt = crud._dialect_insert(self.db, models.Player).on_conflict_do_nothing()
+        self._run("jugadores", path, prepare, lambda rows, lines, errors: self._executemany(stmt, rows))
+
+    #Estadisticas
+    def stats(self, path: str) -> None:
+        def prepare(raw: dict) -> dict:
+            return schemas.StatsBatchItem.model_validate(raw).model_dump()
+
+        def execute(rows: list[dict], lines: list[int], errors: list[dict]) -> int:
+            # Jugadores inexistentes: se descartan antes del upsert (una consulta por trozo)
+            wanted = {row["player_id"] for row in rows}
+            existing = set(self.db.scalars(select(models.Player.id).where(models.Player.id.in_(wanted))))
+            keep = []
+            for row, line in zip(rows, lines):
+                if row["player_id"] in existing:
+                    keep.append(row)
+                else:
+                    errors.append({"line": line, "detail": f"Jugador no encontrado: {row['player_id']}"})
+            if keep:
+                self.db.connection().execute(crud._upsert_stmt(self.db, models.Stats, "player_id", schemas.StatsIn.model_fields), keep)
+            return len(keep)
+
+        self._run("estadisticas", path, prepare, execute)
+
+    #Partidos
+    def games(self, path: str) -> None:
+        def prepare(raw: dict) -> dict:
+            local_id = self._team(raw, "local", "local_id")
+            visitante_id = self._team(raw, "visitante", "visitante_id")
+            if local_id is None or visitante_id is None:
+                raise RowError("Faltan local/visitante (id o nombre)")
+            if local_id == visitante_id:
+                raise RowError("Un equipo no puede jugar contra sí mismo")
+            game = schemas.GameCreate.model_validate({"local_id": local_id, "visitante_id": visitante_id, **raw})
+            fecha = game.fecha
+            if isinstance(fecha, str):
+                fecha = datetime.fromisoformat(fecha)
+            row = {
+                "local_id": local_id,
+                "visitante_id": visitante_id,
+                "fecha": fecha,
+                "jornada": game.jornada,
+                # La del fichero (exportaciones) o la de la fecha del partido
+                "temporada_id": int(raw["temporada_id"]) if raw.get("temporada_id") not in (None, "") else seasons.season_of(fecha),
+                "estado": "pendiente",
+                "goles_local": 0,
+                "goles_visitante": 0,
+            }
+            # Con goles es un partido jugado (salvo estado explícito "pendiente")
+            if "goles_local" in raw or "goles_visitante" in raw:
+                result = schemas.GameResultUpdate.model_validate(raw)
+                row.update(goles_local=result.goles_local, goles_visitante=result.goles_visitante, estado="jugado")
+            if raw.get("estado") == "pendiente":
+                row["estado"] = "pendiente"
+            self._explicit_id("partidos", raw, row)
+            return row
+
+        def execute(rows: list[dict], lines: list[int], errors: list[dict]) -> int:
+            # Como crud.create_game: las temporadas nuevas se crean y las cerradas o archivadas no admiten
+            # partidos (volver a importar una exportación archivada los duplicaría en la base)
+            closed = {}
+            for season in sorted({row["temporada_id"] for row in rows}):
+                try:
+                    seasons.require_open(self.db, [season])
+                except ValueError as e:
+                    closed[season] = str(e)
+            keep = []
+            for row, line in zip(rows, lines):
+                if row["temporada_id"] in closed:
+                    errors.append({"line": line, "detail": closed[row["temporada_id"]]})
+                else:
+                    keep.append(row)
+            return self._executemany(stmt, keep) if keep else 0
+
+        # Un partido ya existente (mismo local, visitante y jornada) se ignora
+        stmt = crud._dialect_insert(self.db, models.Game).on_conflict_do_nothing()
+        self._run("partidos", path, prepare, execute)
+
+    def sync_sequences(self) -> None:
+        # PostgreSQL: tras insertar ids explícitos la secuencia debe continuar desde el máximo
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        for table in sorted(self._explicit_ids):
+            self.db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+            ))
+        self.db.commit()
+
+    def recompute(self) -> dict[str, float]:
+        # Derivados recalculados una sola vez para todo lo importado
+        timings = {}
+
+        def step(name: str, fn) -> None:
+            start = time.perf_counter()
+            fn()
+            timings[name] = time.perf_counter() - start
+
+        def recount() -> None:
+            crud._recount_team_players(self.db, self.db.scalars(select(models.Team.id)).all())
+            self.db.commit()
+
+        def records() -> None:
+            task._check_team_records(self.db, fix=True)
+            self.db.commit()
+
+        step("jugadores por equipo", recount)
+        step("registros de equipos", records)
+        if config.TEAM_GOALS_STORED:
+            step("goles de equipos", task.reconcile_team_goals)
+        step("clasificación", lambda: standings.rebuild(self.db))
+        step("valoración", lambda: valuation.revalue(self.db))
+        return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.importer", description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", help="equipos: nombre [, id]")
+    parser.add_argument("--players", help="jugadores: nombre, dorsal, posicion, equipo o equipo_id [, goles, tarjetas_a, tarjetas_r, id]")
+    parser.add_argument("--stats", help="estadísticas: player_id y contadores")
+    parser.add_argument("--games", help="partidos: local/visitante (nombre) o local_id/visitante_id, jornada, fecha [, goles_local, goles_visitante, temporada_id]")
+    parser.add_argument("--chunk", type=int, default=5000, help="filas por executemany y commit")
+    parser.add_argument("--skip-recompute", action="store_true", help="no recalcula registros, clasificación ni valores")
+    args = parser.parse_args(argv)
+    if not any((args.teams, args.players, args.stats, args.games)):
+        parser.error("indica al menos un fichero (--teams, --players, --stats o --games)")
+
+    models.DecBase.metadata.create_all(bind=engine)
+    upgrade_schema(models.DecBase.metadata)
+    upgrade_indexes(models.DecBase.metadata)
+
+    db = SessionLocal()
+    try:
+        importer = Importer(db, args.chunk)
+        importer._load_teams_index()
+        for kind in ("teams", "players", "stats", "games"):
+            path = getattr(args, kind)
+            if path:
+                getattr(importer, kind)(path)
+        importer.sync_sequences()
+        timings = {} if args.skip_recompute else importer.recompute()
+    finally:
+        db.close()
+
+    # filas/s sobre las filas leídas (escritas + descartadas por error o por existir ya)
+    total_read = total_written = total_seconds = 0
+    failed = False
+    for name, r in importer.report.items():
+        rate = r["read"] / r["seconds"] if r["seconds"] else 0.0
+        total_read += r["read"]
+        total_written += r["written"]
+        total_seconds += r["seconds"]
+        print(f"{name:<13} {r['written']:>9} escritas de {r['read']:<9} {r['seconds']:>7.2f}s ({rate:,.0f} filas/s)"
+              + (f"  {len(r['errors'])} errores" if r["errors"] else ""))
+        for error in sorted(r["errors"], key=lambda e: e["line"])[:MAX_ERRORS_SHOWN]:
+            print(f"    línea {error['line']}: {error['detail']}")
+        failed |= bool(r["errors"])
+    if total_seconds:
+        print(f"{'total':<13} {total_written:>9} escritas de {total_read:<9} {total_seconds:>7.2f}s ({total_read / total_seconds:,.0f} filas/s)")
+    for name, seconds in timings.items():
+        print(f"  {name}: {seconds:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
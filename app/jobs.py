@@ -0,0 +1,235 @@
+# app/jobs.py
+# Cola de trabajos en proceso para los recálculos en segundo plano.
+# Los trabajos pendientes se agrupan por (tipo, id): encolar varias veces el mismo
+# jugador antes de que se ejecute produce un único recálculo. Cada lote de trabajos
+# del mismo tipo se procesa con una sola sesión y un solo commit.
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from . import config, events, metrics, task, valuation
+from .database import SessionLocal
+
+logger = logging.getLogger("liga")
+
+
+@dataclass
+class _Pending:
+    first_enqueued: float
+    due: float
+
+
+# Cada handler devuelve el número de filas que ha modificado realmente
+
+def _player_values(db, player_ids: list[int]) -> int:
+    return valuation.revalue(db, player_ids=player_ids, commit=False)["changed"]
+
+
+def _team_values(db, team_ids: list[int]) -> int:
+    # Toda la plantilla de los equipos: el bonus del valor depende de los partidos del equipo
+    result = valuation.revalue(db, team_ids=team_ids, commit=False)
+    logger.info(
+        "[jobs] Revalorados equipos %s: %s jugadores, %s cambios",
+        team_ids, result['players'], result['changed'],
+    )
+    return result["changed"]
+
+
+def _team_records(db, team_ids: list[int]) -> int:
+    return len(task._check_team_records(db, team_ids, fix=True))
+
+
+def _match_events(db, keys: list[int]) -> int:
+    # Un único trabajo (clave 0): cada ráfaga de ingestas produce un micro-lote de agregación
+    result = events.aggregate(db)
+    if result["players"]:
+        valuation.revalue(db, player_ids=result["players"], commit=False)
+    if result["pending"]:
+        queue.enqueue("match_events", 0)
+    return result["events"]
+
+
+HANDLERS = {
+    "player_value": _player_values,
+    "team_value": _team_values,
+    "team_record": _team_records,
+    "match_events": _match_events,
+}
+
+
+class JobQueue:
+    def __init__(self, handlers: dict, workers: int, debounce: float, max_delay: float, batch_size: int):
+        self.handlers = handlers
+        self.n_workers = max(workers, 1)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.batch_size = batch_size
+
+        self._pending: dict[tuple[str, int], _Pending] = {}
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._running = False
+        self._busy = 0
+
+        self.enqueued = 0
+        self.coalesced = 0
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_batch_seconds = 0.0
+        self.rows_changed: dict[str, int] = {}
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._threads = [
+                threading.Thread(target=self._worker, name=f"liga-jobs-{i}", daemon=True)
+                for i in range(self.n_workers)
+            ]
+        for t in self._threads:
+            t.start()
+        logger.info("[jobs] Cola iniciada con %s workers", self.n_workers)
+
+    def stop(self, drain: bool = True, timeout: float = 10.0) -> None:
+        if drain:
+            self.drain(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        logger.info("[jobs] Cola detenida")
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        # Adelanta todos los pendientes y espera a que se procesen
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            for job in self._pending.values():
+                job.due = 0.0
+            self._cond.notify_all()
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def enqueue(self, kind: str, key: int) -> None:
+        if kind not in self.handlers:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+        if not self._running:
+            self.start()
+        now = time.monotonic()
+        with self._cond:
+            self.enqueued += 1
+            job = self._pending.get((kind, key))
+            if job is None:
+                self._pending[(kind, key)] = _Pending(first_enqueued=now, due=now + self.debounce)
+            else:
+                self.coalesced += 1
+                job.due = min(now + self.debounce, job.first_enqueued + self.max_delay)
+            self._cond.notify()
+
+    def _take_batch(self) -> tuple[str, list[tuple[int, _Pending]]] | None:
+        # Llamar con el lock: devuelve el lote de trabajos vencidos del tipo más antiguo
+        now = time.monotonic()
+        due = [(k, job) for k, job in self._pending.items() if job.due <= now]
+        if not due:
+            return None
+        due.sort(key=lambda item: item[1].first_enqueued)
+        kind = due[0][0][0]
+        batch = [(key, job) for (k, key), job in due if k == kind][: self.batch_size]
+        for key, _ in batch:
+            del self._pending[(kind, key)]
+        return kind, batch
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                taken = None
+                while self._running:
+                    taken = self._take_batch()
+                    if taken:
+                        break
+                    next_due = min((job.due for job in self._pending.values()), default=None)
+                    wait = None if next_due is None else max(next_due - time.monotonic(), 0.0)
+                    self._cond.wait(wait)
+                if not taken:
+                    return
+                self._busy += 1
+            try:
+                self._run(*taken)
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._cond.notify_all()
+
+    def _run(self, kind: str, batch: list[tuple[int, _Pending]]) -> None:
+        start = time.monotonic()
+        lag = max(start - job.first_enqueued for _, job in batch)
+        keys = [key for key, _ in batch]
+        db = SessionLocal()
+        changed = 0
+        try:
+            changed = self.handlers[kind](db, keys) or 0
+            db.commit()
+            ok = True
+        except Exception as e:
+            db.rollback()
+            ok = False
+            logger.exception("[jobs] Error procesando %s (%s trabajos): %s", kind, len(keys), e)
+        finally:
+            db.close()
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self.batches += 1
+            if ok:
+                self.processed += len(keys)
+                self.rows_changed[kind] = self.rows_changed.get(kind, 0) + changed
+            else:
+                self.failed += len(keys)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.last_batch_seconds = elapsed
+        metrics.observe_task(kind, elapsed, jobs=len(keys), ok=ok)
+        logger.debug("[jobs] Lote %s: %s trabajos en %.3fs (lag %.3fs)", kind, len(keys), elapsed, lag)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._cond:
+            by_kind: dict[str, int] = {}
+            for kind, _ in self._pending:
+                by_kind[kind] = by_kind.get(kind, 0) + 1
+            oldest = min((job.first_enqueued for job in self._pending.values()), default=None)
+            return {
+                "running": self._running,
+                "workers": self.n_workers,
+                "depth": len(self._pending),
+                "depth_by_kind": by_kind,
+                "in_progress": self._busy,
+                "oldest_pending_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "processed": self.processed,
+                "failed": self.failed,
+                "batches": self.batches,
+                "last_lag_seconds": round(self.last_lag, 3),
+                "max_lag_seconds": round(self.max_lag, 3),
+                "last_batch_seconds": round(self.last_batch_seconds, 3),
+                "rows_changed": dict(self.rows_changed),
+            }
+
+
+queue = JobQueue(
+    HANDLERS,
+    workers=config.JOBS_WORKERS,
+    debounce=config.JOBS_DEBOUNCE,
+    max_delay=config.JOBS_MAX_DELAY,
+    batch_size=config.JOBS_BATCH_SIZE,
+)
@@ -0,0 +1,191 @@
+# app/live.py
+# Cambios en directo (GET /live por SSE y /live/ws por WebSocket) en lugar de sondear GET /games y GET /teams.
+# Las funciones de escritura de crud/task/standings/valuation dejan los mensajes en la sesión y se
+# publican al hacer commit, nunca antes (igual que las etiquetas de cache.py). El broker reparte
+# cada mensaje, serializado una sola vez, a la cola asyncio de cada suscriptor cuyo filtro de
+# equipos coincide; un suscriptor lento no frena a nadie: si su cola se llena se vacía y recibe
+# un mensaje "resync" para que vuelva a leer el estado completo con GET.
+import asyncio
+import json
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import config
+
+logger = logging.getLogger("liga")
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+def _encode(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def parse_teams(value) -> set[int] | None:
+    # "1,2" o [1, 2] -> {1, 2}; vacío o None -> sin filtro (todos los equipos)
+    if value is None or value == "":
+        return None
+    items = value.split(",") if isinstance(value, str) else value
+    return {int(t) for t in items}
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, teams: set[int] | None, maxsize: int):
+        self.loop = loop
+        self.teams = teams
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.resyncs = 0
+
+    def wants(self, teams) -> bool:
+        # Mensajes sin equipos (p.ej. "standings") van a todos
+        return self.teams is None or teams is None or not self.teams.isdisjoint(teams)
+
+    def offer(self, message: tuple[str, str]) -> None:
+        # Se ejecuta en el bucle del suscriptor (call_soon_threadsafe)
+        if self.queue.full():
+            dropped = self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.dropped += dropped
+            self.resyncs += 1
+            self.queue.put_nowait(("resync", _encode({"dropped": dropped})))
+        self.queue.put_nowait(message)
+        self.delivered += 1
+
+
+class Broker:
+    def __init__(self, queue_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        # Contadores de los suscriptores ya desconectados
+        self._closed = {"delivered": 0, "dropped": 0, "resyncs": 0}
+
+    @property
+    def active(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, teams: set[int] | None = None) -> Subscriber:
+        # Debe llamarse desde el bucle asyncio que consumirá la cola
+        sub = Subscriber(asyncio.get_running_loop(), teams, self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers(f"Máximo de suscriptores alcanzado ({self.max_subscribers})")
+            self._subscribers.add(sub)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[live] Nuevo suscriptor (equipos: %s)", sorted(teams) if teams else "todos")
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+                for name in self._closed:
+                    self._closed[name] += getattr(sub, name)
+
+    def publish(self, kind: str, data, teams=None) -> int:
+        # Seguro desde cualquier hilo: la entrega a cada cola se hace en el bucle de su suscriptor
+        if not self._subscribers:
+            return 0
+        message = (kind, _encode(data))
+        with self._lock:
+            targets = [s for s in self._subscribers if s.wants(teams)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, message)
+            except RuntimeError:
+                # Bucle cerrado: el suscriptor ya no existe
+                self.unsubscribe(sub)
+        self.published += 1
+        return len(targets)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._subscribers)
+        return {
+            "subscribers": len(subs),
+            "published": self.published,
+            **{name: total + sum(getattr(s, name) for s in subs) for name, total in self._closed.items()},
+            "queued": sum(s.queue.qsize() for s in subs),
+        }
+
+
+broker = Broker(config.LIVE_QUEUE_SIZE, config.LIVE_MAX_SUBSCRIBERS)
+
+
+def active() -> bool:
+    # Permite a quien publica ahorrarse el trabajo extra si nadie escucha
+    return broker.active
+
+
+def publish(db: Session, kind: str, data, teams=None) -> None:
+    # Registra un mensaje que se publicará cuando la transacción de db haga commit
+    if broker.active:
+        db.info.setdefault("live_messages", []).append((kind, data, teams))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_on_commit(session) -> None:
+    for kind, data, teams in session.info.pop("live_messages", ()):
+        broker.publish(kind, data, teams)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session) -> None:
+    session.info.pop("live_messages", None)
+
+
+async def sse_stream(sub: Subscriber, heartbeat: float | None = None):
+    # Marcos text/event-stream; comentario ": ping" periódico para que proxies y clientes no corten
+    heartbeat = heartbeat or config.LIVE_HEARTBEAT
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                kind, data = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"event: {kind}\ndata: {data}\n\n"
+    finally:
+        broker.unsubscribe(sub)
+
+
+async def websocket_stream(websocket, sub: Subscriber, heartbeat: float | None = None) -> None:
+    # Envía {"type": ..., "data": ...}; el cliente puede cambiar su filtro con {"teams": [1, 2]}
+    heartbeat = heartbeat or config.LIVE_HEARTBEAT
+
+    async def receive():
+        while True:
+            msg = await websocket.receive_json()
+            if isinstance(msg, dict) and "teams" in msg:
+                sub.teams = parse_teams(msg["teams"])
+
+    reader = asyncio.create_task(receive())
+    getter = asyncio.create_task(sub.queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({reader, getter}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if reader in done:
+                break  # desconexión (o mensaje no JSON)
+            if getter in done:
+                kind, data = getter.result()
+                getter = asyncio.create_task(sub.queue.get())
+                await websocket.send_text(f'{{"type":"{kind}","data":{data}}}')
+            else:
+                await websocket.send_text('{"type":"ping"}')
+    except Exception as e:
+        logger.debug("[live] WebSocket cerrado: %r", e)
+    finally:
+        reader.cancel()
+        getter.cancel()
+        broker.unsubscribe(sub)
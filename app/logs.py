@@ -0,0 +1,66 @@
+# app/logs.py
+# Logging del logger "liga" sin escrituras a disco en el hilo de la petición: el logger solo tiene
+# un QueueHandler, que formatea el mensaje y lo encola, y un QueueListener en su propio hilo lo
+# escribe en consola, debug.log y warning.log (rotados por tamaño). El nivel sale de LIGA_LOG_LEVEL;
+# los mensajes por debajo de él se descartan en logger.debug(...) antes de formatear nada, por eso
+# todas las llamadas usan argumentos %-style en lugar de f-strings.
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+
+from . import config
+
+FORMAT = "[%(asctime)s] %(levelname)s - %(message)s"
+
+logger = logging.getLogger("liga")
+
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: logging.handlers.QueueHandler | None = None
+
+
+def _file_handler(path: str, level: int, formatter: logging.Formatter) -> logging.Handler:
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+    )
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup(level: str | None = None, directory: str | None = None) -> None:
+    # Una segunda llamada sustituye a la anterior (tras vaciar lo que quedara en la cola)
+    global _listener, _queue_handler
+    stop()
+    formatter = logging.Formatter(FORMAT)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+    directory = directory or config.LOG_DIR
+    handlers = [
+        console,
+        _file_handler(os.path.join(directory, "debug.log"), logging.DEBUG, formatter),
+        _file_handler(os.path.join(directory, "warning.log"), logging.WARNING, formatter),
+    ]
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    logger.setLevel((level or config.LOG_LEVEL).upper())
+    logger.addHandler(_queue_handler)
+    _listener.start()
+
+
+def stop() -> None:
+    # Escribe los mensajes pendientes y cierra los ficheros
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop)
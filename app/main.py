@@ -1,40 +1,78 @@
 # app/main.py
 import logging
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query
-from .database import SessionLocal, engine
-from .models import DecBase
-from . import schemas, crud, task
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Depends, Query, Body, Path, Request, WebSocket
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from .database import SessionLocal, ReadSessionLocal, engine, async_engine, upgrade_schema, upgrade_autoincrement, upgrade_indexes, retire_indexes
+from .models import DecBase, Game, Player, Team, Stats, Standing, RETIRED_INDEXES
+from . import cache, config, schemas, crud, task, standings, valuation, jobs, responses, events, live, export, logs, metrics, fixtures, seasons
 
-# Configuración de logging
+# Configuración de logging: cola + hilo escritor, nivel LIGA_LOG_LEVEL (ver logs.py)
 
 logger = logging.getLogger("liga")
-logger.setLevel(logging.DEBUG)
+logs.setup()
 
-# Handler para consola (DEBUG+)
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-console_format = logging.Formatter('[%(asctime)s] %(levelname)s - %(message)s')
-console_handler.setFormatter(console_format)
-logger.addHandler(console_handler)
 
-# Handler para archivo debug.log (DEBUG+)
-debug_file_handler = logging.FileHandler("debug.log", encoding="utf-8")
-debug_file_handler.setLevel(logging.DEBUG)
-debug_file_handler.setFormatter(console_format)
-logger.addHandler(debug_file_handler)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Los workers de la cola arrancan con el primer trabajo; al parar se vacía lo pendiente
+    jobs.queue.stop(drain=True)
+    if async_engine is not None:
+        await async_engine.dispose()
 
-# Handler para archivo warning.log (WARNING+)
-warning_file_handler = logging.FileHandler("warning.log", encoding="utf-8")
-warning_file_handler.setLevel(logging.WARNING)
-warning_file_handler.setFormatter(console_format)
-logger.addHandler(warning_file_handler)
 
-
-app = FastAPI(title="Liga API")
+app = FastAPI(title="Liga API", lifespan=lifespan)
 logger.info("FastAPI app initialized")
 
+def _metrics_gauges() -> list:
+    # Estado de la cola de trabajos, la caché y /live en el momento de servir /metrics
+    queue_stats, cache_stats = jobs.queue.stats(), cache.cache.stats()
+    return [
+        ("liga_jobs_pending", "gauge", "Trabajos pendientes en la cola", queue_stats["depth"]),
+        ("liga_jobs_in_progress", "gauge", "Lotes de trabajos ejecutándose", queue_stats["in_progress"]),
+        ("liga_cache_entries", "gauge", "Respuestas en la caché", cache_stats["entries"]),
+        ("liga_cache_hits_total", "counter", "Aciertos de la caché", cache_stats["hits"]),
+        ("liga_cache_misses_total", "counter", "Fallos de la caché", cache_stats["misses"]),
+        ("liga_live_subscribers", "gauge", "Clientes conectados a /live", live.broker.stats()["subscribers"]),
+    ]
+
+if config.METRICS_ENABLED:
+    metrics.instrument_engines()
+    app.add_middleware(metrics.MetricsMiddleware, headers=config.METRICS_HEADERS)
+    metrics.register_collector(_metrics_gauges)
+
+if config.ASYNC_DB:
+    # Registradas antes que las rutas síncronas de este módulo: tienen prioridad en los GET
+    from .async_routes import router as async_router
+    app.include_router(async_router)
+    logger.info("Async read routes enabled")
+
 DecBase.metadata.create_all(bind=engine)
 logger.debug("Database tables created (if not exist)")
+added_columns = upgrade_schema(DecBase.metadata)
+if added_columns:
+    logger.info("Columns added to existing tables: %s", added_columns)
+    if "clasificacion.temporada_id" in added_columns:
+        # La clasificación es derivada: se recrea con la restricción única por temporada y init_standings la reconstruye
+        Standing.__table__.drop(bind=engine)
+        Standing.__table__.create(bind=engine)
+rebuilt_tables = upgrade_autoincrement(DecBase.metadata)
+if rebuilt_tables:
+    logger.info("Tables rebuilt with AUTOINCREMENT: %s", rebuilt_tables)
+created_indexes = upgrade_indexes(DecBase.metadata)
+if created_indexes:
+    logger.info("Indexes created on existing tables: %s", created_indexes)
+dropped_indexes = retire_indexes(RETIRED_INDEXES)
+if dropped_indexes:
+    logger.info("Retired indexes dropped: %s", dropped_indexes)
+# Temporada de los partidos anteriores a las temporadas y registros por temporada vacíos
+task.init_seasons(recount=any(col.startswith("equipos.") for col in added_columns))
+if config.TEAM_GOALS_STORED:
+    task.reconcile_team_goals()
+task.init_standings()
 
 def get_db():
     db = SessionLocal()
@@ -43,197 +81,298 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    # Rutas GET: engine de solo lectura (database.read_engine)
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _check_batch_size(items: list) -> None:
+    if len(items) > crud.MAX_BATCH_SIZE:
+        raise HTTPException(413, f"Máximo {crud.MAX_BATCH_SIZE} elementos por petición")
+
+
+#Admin
+@app.post("/admin/team-goals/reconcile")
+def reconcile_team_goals():
+    if not config.TEAM_GOALS_STORED:
+        raise HTTPException(409, "Team.goles no está en modo stored (LIGA_TEAM_GOALS_MODE=stored)")
+    fixed = task.reconcile_team_goals()
+    return {"fixed": fixed}
+
+@app.post("/admin/revalue")
+def revalue_players(db=Depends(get_db)):
+    logger.debug("POST /admin/revalue called")
+    result = valuation.revalue(db)
+    logger.info("Players revalued: %s", result)
+    return result
+
+@app.get("/admin/jobs")
+def jobs_stats():
+    return jobs.queue.stats()
+
+@app.get("/admin/events")
+def events_status(db=Depends(get_db)):
+    return events.status(db)
+
+@app.get("/admin/live")
+def live_stats():
+    return live.broker.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    if not config.METRICS_ENABLED:
+        raise HTTPException(404, "Métricas desactivadas (LIGA_METRICS=0)")
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/admin/cache")
+def cache_stats():
+    return cache.cache.stats()
+
+@app.delete("/admin/cache", status_code=204)
+def clear_cache():
+    cache.cache.clear()
+    return None
+
+@app.post("/admin/standings/rebuild")
+def rebuild_standings(db=Depends(get_db)):
+    jornadas = standings.rebuild(db)
+    return {"jornadas": jornadas}
+
+@app.post("/admin/team-records/check")
+def check_team_records(fix: bool = Query(default=True)):
+    mismatches = task.check_team_records(fix=fix)
+    return {"mismatches": mismatches, "fixed": fix}
+
 
 #Teams
-@app.post("/teams")
+@app.post("/teams", response_model=schemas.TeamOut)
 def create_team(payload: schemas.TeamCreate, db=Depends(get_db)):
-    logger.debug(f"POST /teams payload: {payload}")
+    logger.debug("POST /teams payload: %s", payload)
     team = crud.create_team(db, payload)
-    logger.info(f"Team created: {team.id} - {team.nombre}")
-    return team
-
-@app.get("/teams")
-def list_teams(db=Depends(get_db)):
-    logger.debug("GET /teams called")
-    teams = crud.list_teams(db)
-    logger.info(f"Returned {len(teams)} teams")
-    return teams
-
-@app.get("/teams/{team_id}")
-def get_team(team_id: int, db=Depends(get_db)):
-    logger.debug(f"GET /teams/{team_id} called")
-    team = crud.get_team(db, team_id)
-    if not team:
-        logger.warning(f"Team not found: {team_id}")
-        raise HTTPException(status_code=404, detail="Team not found")
-    logger.info(f"Team returned: {team.id} - {team.nombre}")
+    logger.info("Team created: %s - %s", team.id, team.nombre)
     return team
 
-@app.patch("/teams/{team_id}")
+@app.get("/teams", response_model=schemas.TeamPage)
+def list_teams(
+    request: Request,
+    limit: int = Query(default=crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(default=None),
+    db=Depends(get_read_db),
+):
+    logger.debug("GET /teams called limit=%s cursor=%s", limit, cursor)
+
+    def build():
+        teams, next_cursor = crud.list_teams(db, limit=limit, cursor=cursor)
+        logger.info("Returned %s teams", len(teams))
+        return {"items": teams, "next_cursor": next_cursor}
+
+    return responses.cached(request, ["teams"], build, schemas.TeamPage)
+
+@app.get("/teams/{team_id}", response_model=schemas.TeamOut)
+def get_team(team_id: int, request: Request, db=Depends(get_read_db)):
+    logger.debug("GET /teams/%s called", team_id)
+
+    def build():
+        team = crud.get_team(db, team_id)
+        if not team:
+            logger.warning("Team not found: %s", team_id)
+            raise HTTPException(status_code=404, detail="Team not found")
+        logger.info("Team returned: %s - %s", team.id, team.nombre)
+        return team
+
+    return responses.cached(request, [f"team:{team_id}", cache.ALL_TEAMS], build, schemas.TeamOut)
+
+@app.patch("/teams/{team_id}", response_model=schemas.TeamOut)
 def patch_team(team_id: int, patch: schemas.TeamUpdate, db=Depends(get_db)):
-    logger.debug(f"PATCH /teams/{team_id} payload: {patch}")
+    logger.debug("PATCH /teams/%s payload: %s", team_id, patch)
     team = crud.update_team(db, team_id, patch)
     if not team:
-        logger.warning(f"Team to patch not found: {team_id}")
+        logger.warning("Team to patch not found: %s", team_id)
         raise HTTPException(status_code=404, detail="Team not found")
-    logger.info(f"Team updated: {team.id} - {team.nombre}")
+    logger.info("Team updated: %s - %s", team.id, team.nombre)
     return team
 
 @app.delete("/teams/{team_id}")
 def remove_team(team_id: int, db=Depends(get_db)):
-    logger.debug(f"DELETE /teams/{team_id} called")
+    logger.debug("DELETE /teams/%s called", team_id)
     ok = crud.delete_team(db, team_id)
     if not ok:
-        logger.warning(f"Team to delete not found: {team_id}")
+        logger.warning("Team to delete not found: %s", team_id)
         raise HTTPException(status_code=404, detail="Team not found")
-    logger.info(f"Team deleted: {team_id}")
+    logger.info("Team deleted: %s", team_id)
     return None
 
-@app.get("/teams/{team_id}/players")
-def list_team_players(team_id: int, db=Depends(get_db)):
-    logger.debug(f"GET /teams/{team_id}/players called")
-    team = crud.get_team(db, team_id)
-    if not team:
-        logger.warning(f"Team not found: {team_id}")
+@app.get("/teams/{team_id}/players", response_model=list[schemas.PlayerOut])
+def list_team_players(team_id: int, db=Depends(get_read_db)):
+    logger.debug("GET /teams/%s/players called", team_id)
+    players = crud.get_team_players(db, team_id)
+    if players is None:
+        logger.warning("Team not found: %s", team_id)
         raise HTTPException(status_code=404, detail="Team not found")
-    players = team.players or []
-    logger.info(f"Returned {len(players)} players from team {team_id}")
+    logger.info("Returned %s players from team %s", len(players), team_id)
     return players
 
 
 #Players
-@app.post("/players")
-def create_player(payload: schemas.PlayerCreate,  background_tasks: BackgroundTasks, db=Depends(get_db)):
-    logger.debug(f"POST /players payload: {payload}")
+@app.post("/players", response_model=schemas.PlayerOut)
+def create_player(payload: schemas.PlayerCreate, db=Depends(get_db)):
+    logger.debug("POST /players payload: %s", payload)
     player = crud.create_player(db, payload)
-    logger.info(f"Player created: {player.id} - {player.nombre}")
+    logger.info("Player created: %s - %s", player.id, player.nombre)
     return player
 
-@app.get("/players")
-def list_players(db=Depends(get_db)):
-    logger.debug("GET /players called")
-    players = crud.list_players(db)
-    logger.info(f"Returned {len(players)} players")
-    return players
-
-@app.get("/players/{player_id}")
-def get_player(player_id: int, db=Depends(get_db)):
-    logger.debug(f"GET /players/{player_id} called")
-    player = crud.get_player_and_stats(db, player_id)
+@app.post("/players:batch", response_model=schemas.BatchCreated)
+def create_players_batch(items: list[dict] = Body(...), db=Depends(get_db)):
+    logger.debug("POST /players:batch con %s elementos", len(items))
+    _check_batch_size(items)
+    created, errors = crud.create_players_bulk(db, items)
+    logger.info("Players created in batch: %s (%s errors)", len(created), len(errors))
+    return {"created": created, "errors": errors}
+
+@app.get("/players", response_model=schemas.PlayerPage, response_model_exclude_unset=True)
+def list_players(
+    limit: int = Query(default=crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(default=None),
+    posicion: str | None = Query(default=None, pattern="^(portero|defensa|mediocampo|delantero)$"),
+    equipo_id: int | None = Query(default=None),
+    include: str | None = Query(default=None, pattern=responses.INCLUDE_PATTERN),
+    db=Depends(get_read_db),
+):
+    logger.debug("GET /players called limit=%s cursor=%s posicion=%s equipo_id=%s include=%s", limit, cursor, posicion, equipo_id, include)
+    expand = responses.parse_include(include)
+    players, next_cursor = crud.list_players(
+        db, limit=limit, cursor=cursor, posicion=posicion, equipo_id=equipo_id, include=expand
+    )
+    logger.info("Returned %s players", len(players))
+    return {"items": [responses.player_row(p, expand) for p in players], "next_cursor": next_cursor}
+
+@app.get("/players/{player_id}", response_model=schemas.PlayerExpandedOut, response_model_exclude_unset=True)
+def get_player(player_id: int, include: str | None = Query(default=None, pattern=responses.INCLUDE_PATTERN), db=Depends(get_read_db)):
+    logger.debug("GET /players/%s called include=%s", player_id, include)
+    expand = responses.parse_include(include)
+    player = crud.get_player_with(db, player_id, include=expand)
     if not player:
-        logger.warning(f"Player not found: {player_id}")
+        logger.warning("Player not found: %s", player_id)
         raise HTTPException(status_code=404, detail="Player not found")
-    logger.info(f"Player returned: {player.id} - {player.nombre}")
-    return player
+    logger.info("Player returned: %s - %s", player.id, player.nombre)
+    return responses.player_dict(player, expand)
 
-@app.patch("/players/{player_id}")
-def patch_player(player_id: int, patch: schemas.PlayerUpdate, background_tasks: BackgroundTasks, db=Depends(get_db)):
-    logger.debug(f"PATCH /players/{player_id} payload: {patch}")
+@app.patch("/players/{player_id}", response_model=schemas.PlayerOut)
+def patch_player(player_id: int, patch: schemas.PlayerUpdate, db=Depends(get_db)):
+    logger.debug("PATCH /players/%s payload: %s", player_id, patch)
     player = crud.update_player(db, player_id, patch)
     if not player:
-        logger.warning(f"Player to patch not found: {player_id}")
+        logger.warning("Player to patch not found: %s", player_id)
         raise HTTPException(status_code=404, detail="Player not found")
-    background_tasks.add_task(task.recompute_player_value, player_id=player_id)
-    logger.info(f"Player updated: {player.id} - {player.nombre}")
+    jobs.queue.enqueue("player_value", player_id)
+    logger.info("Player updated: %s - %s", player.id, player.nombre)
     return player
 
 @app.delete("/players/{player_id}")
 def remove_player(player_id: int, db=Depends(get_db)):
-    logger.debug(f"DELETE /players/{player_id} called")
+    logger.debug("DELETE /players/%s called", player_id)
     ok = crud.delete_player(db, player_id)
     if not ok:
-        logger.warning(f"Player to delete not found: {player_id}")
+        logger.warning("Player to delete not found: %s", player_id)
         raise HTTPException(status_code=404, detail="Player not found")
-    logger.info(f"Player deleted: {player_id}")
+    logger.info("Player deleted: %s", player_id)
     return None
 
 
 #Extras
-@app.patch("/players/{player_id}/team/{team_id}")
+@app.patch("/players/{player_id}/team/{team_id}", response_model=schemas.PlayerOut)
 def assign_player_to_team(player_id: int, team_id: int, db=Depends(get_db)):
-    logger.debug(f"PATCH /players/{player_id}/team/{team_id} called")
+    logger.debug("PATCH /players/%s/team/%s called", player_id, team_id)
     player = crud.get_player(db, player_id)
     team = crud.get_team(db, team_id)
     if not player:
-        logger.warning(f"Player not found: {player_id}")
+        logger.warning("Player not found: %s", player_id)
         raise HTTPException(status_code=404, detail="Player not found")
     if not team:
-        logger.warning(f"Team not found: {team_id}")
+        logger.warning("Team not found: %s", team_id)
         raise HTTPException(status_code=404, detail="Team not found")
     
     patched = crud.update_player(db, player_id, {"equipo_id": team_id})
-    logger.info(f"Player {player_id} assigned to team {team_id}")
+    logger.info("Player %s assigned to team %s", player_id, team_id)
     return patched
 
-@app.get("/players/{player_id}/team")
-def get_player_team(player_id: int, db=Depends(get_db)):
-    logger.debug(f"GET /players/{player_id}/team called")
-    player = crud.get_player(db, player_id)
+@app.get("/players/{player_id}/team", response_model=schemas.TeamOut)
+def get_player_team(player_id: int, db=Depends(get_read_db)):
+    logger.debug("GET /players/%s/team called", player_id)
+    player = crud.get_player_with(db, player_id, include={"team"})
     if not player:
-        logger.warning(f"Player not found: {player_id}")
+        logger.warning("Player not found: %s", player_id)
         raise HTTPException(status_code=404, detail="Player not found")
     if not player.equipo:
-        logger.warning(f"Team not found for player {player_id}")
+        logger.warning("Team not found for player %s", player_id)
         raise HTTPException(status_code=404, detail="Team not found")
-    logger.info(f"Player {player_id} belongs to team {player.equipo.id}")
+    logger.info("Player %s belongs to team %s", player_id, player.equipo.id)
     return player.equipo
 
-@app.get("/playersNoTeam")
-def list_players_without_teams(db=Depends(get_db)):
+@app.get("/playersNoTeam", response_model=list[schemas.PlayerOut] | str)
+def list_players_without_teams(db=Depends(get_read_db)):
     logger.debug("GET /players called")
     players = crud.get_players_without_team(db)
     if len(players) == 0:
         return 'No hay jugadores sin equipo'
-    logger.info(f"Returned {len(players)} players")
+    logger.info("Returned %s players", len(players))
     return players
 
 #Estadisticas
-@app.put("/players/{player_id}/stats")
-def upsert_player_stats(player_id: int, payload: schemas.StatsIn, background_tasks: BackgroundTasks, db=Depends(get_db)):
+@app.put("/players/{player_id}/stats", response_model=schemas.Message)
+def upsert_player_stats(player_id: int, payload: schemas.StatsIn, db=Depends(get_db)):
     player = crud.get_player(db, player_id)
     if not player:
         raise HTTPException(404, "Player not found")
     crud.upsert_stats_for_player(db, player_id, payload.model_dump())
-    background_tasks.add_task(task.recompute_player_value, player_id=player_id)
+    jobs.queue.enqueue("player_value", player_id)
     return {"detail": "Estadísticas actualizadas. Recomputando valor en background."}
 
-@app.get("/playersDetail/{player_id}")
-def get_player_detail(player_id: int, db=Depends(get_db)):
-    player = crud.get_player(db, player_id)
-    if not player:
+@app.patch("/players/{player_id}/stats", response_model=schemas.StatsOut)
+def increment_player_stats(player_id: int, payload: schemas.StatsDelta, db=Depends(get_db)):
+    if not crud.get_player(db, player_id):
+        raise HTTPException(404, "Player not found")
+    st = crud.increment_stats_for_player(db, player_id, payload.model_dump())
+    if st is None:
+        # Sin incrementos y sin estadísticas previas: nada que guardar
+        return {"player_id": player_id, **schemas.StatsIn().model_dump()}
+    jobs.queue.enqueue("player_value", player_id)
+    return st
+
+@app.put("/stats:batch", response_model=schemas.BatchUpdated)
+def upsert_stats_batch(items: list[dict] = Body(...), db=Depends(get_db)):
+    logger.debug("PUT /stats:batch con %s elementos", len(items))
+    _check_batch_size(items)
+    updated, errors = crud.upsert_stats_bulk(db, items)
+    for player_id in updated:
+        jobs.queue.enqueue("player_value", player_id)
+    logger.info("Stats upserted in batch: %s (%s errors)", len(updated), len(errors))
+    return {"updated": updated, "errors": errors}
+
+@app.get("/players/{player_id}/seasons", response_model=list[schemas.PlayerSeasonStatsOut])
+def get_player_seasons(player_id: int, db=Depends(get_read_db)):
+    history = seasons.player_seasons(db, player_id)
+    if history is None:
         raise HTTPException(404, "Jugador no encontrado")
+    return history
 
-    stats = crud.get_stats(db, player_id)
-
-    return {
-        "jugador": {
-            "id": player.id,
-            "nombre": player.nombre,
-            "dorsal": player.dorsal,
-            "posicion": player.posicion,
-            "goles": player.goles,
-            "tarjetas_a": player.tarjetas_a,
-            "tarjetas_r": player.tarjetas_r,
-            "equipo_id": player.equipo_id,
-            'valor': player.valor
-        },
-        "estadisticas": {
-            "tiros": stats.tiros if stats else 0,
-            "tiros_a_puerta": stats.tiros_a_puerta if stats else 0,
-            "asistencias": stats.asistencias if stats else 0,
-            "regates_intentados": stats.regates_intentados if stats else 0,
-            "regates_exitosos": stats.regates_exitosos if stats else 0,
-            "pases_intentados": stats.pases_intentados if stats else 0,
-            "pases_completados": stats.pases_completados if stats else 0,
-            "entradas_intentadas": stats.entradas_intentadas if stats else 0,
-            "entradas_exitosas": stats.entradas_exitosas if stats else 0,
-            "paradas": stats.paradas if stats else 0
-        }
-    }
+@app.get("/playersDetail/{player_id}", response_model=schemas.PlayerDetailOut)
+def get_player_detail(player_id: int, request: Request, db=Depends(get_read_db)):
+    return responses.cached(request, [f"player:{player_id}", cache.ALL_PLAYERS], lambda: _player_detail(db, player_id),
+                            schemas.PlayerDetailOut)
+
+def _player_detail(db, player_id: int) -> dict:
+    player = crud.get_player_with(db, player_id, include={"stats"})
+    if not player:
+        raise HTTPException(404, "Jugador no encontrado")
+    return responses.player_detail(player)
 
 #Partidos
-@app.post("/games")
-def create_game(payload: schemas.GameCreate, db = Depends(get_db), background_tasks: BackgroundTasks = None):
+@app.post("/games", response_model=schemas.GameOut)
+def create_game(payload: schemas.GameCreate, db = Depends(get_db)):
     fecha = payload.fecha
     if isinstance(fecha, str):
         try:
@@ -246,69 +385,228 @@ def create_game(payload: schemas.GameCreate, db = Depends(get_db), background_ta
     except ValueError as e:
         raise HTTPException(400, str(e))
 
-    return {
-        "id": game.id,
-        "local_id": game.local_id,
-        "visitante_id": game.visitante_id,
-        "fecha": game.fecha.isoformat() if game.fecha else None,
-        "jornada": game.jornada,
-        "estado": game.estado,
-        "goles_local": game.goles_local,
-        "goles_visitante": game.goles_visitante,
-    }
+    return game
 
 
-@app.patch("/games/{game_id}/result")
-def set_game_result(game_id: int, payload: schemas.GameResultUpdate, db = Depends(get_db), background_tasks: BackgroundTasks = None):
-    game = crud.set_game_result(db, game_id=game_id, goles_local=payload.goles_local, goles_visitante=payload.goles_visitante)
+@app.patch("/games/{game_id}/result", response_model=schemas.GameOut)
+def set_game_result(game_id: int, payload: schemas.GameResultUpdate, db = Depends(get_db)):
+    try:
+        game = crud.set_game_result(db, game_id=game_id, goles_local=payload.goles_local, goles_visitante=payload.goles_visitante)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
     if not game:
         raise HTTPException(404, "Game not found")
 
-    background_tasks.add_task(task.recompute_team_record, team_id=game.local_id)
-    background_tasks.add_task(task.recompute_team_record, team_id=game.visitante_id)
-
-    return {
-        "id": game.id,
-        "local_id": game.local_id,
-        "visitante_id": game.visitante_id,
-        "fecha": game.fecha.isoformat() if game.fecha else None,
-        "jornada": game.jornada,
-        "estado": game.estado,
-        "goles_local": game.goles_local,
-        "goles_visitante": game.goles_visitante,
-    }
+    jobs.queue.enqueue("team_value", game.local_id)
+    jobs.queue.enqueue("team_value", game.visitante_id)
+
+    return game
+
+
+@app.patch("/games/results:batch", response_model=schemas.BatchUpdated)
+def set_game_results_batch(items: list[dict] = Body(...), db=Depends(get_db)):
+    logger.debug("PATCH /games/results:batch con %s elementos", len(items))
+    _check_batch_size(items)
+    updated, affected_teams, errors = crud.set_game_results_bulk(db, items)
+    # Cambian los partidos de los equipos: revalorar sus plantillas (una vez por equipo)
+    for team_id in affected_teams:
+        jobs.queue.enqueue("team_value", team_id)
+    logger.info("Game results set in batch: %s (%s errors)", len(updated), len(errors))
+    return {"updated": updated, "errors": errors}
+
+
+@app.get("/games", response_model=schemas.GamePage)
+def list_games(
+    request: Request,
+    team_id: int | None = Query(default=None),
+    limit: int = Query(default=crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE),
+    cursor: int | None = Query(default=None),
+    estado: str | None = Query(default=None, pattern="^(pendiente|jugado)$"),
+    jornada: int | None = Query(default=None),
+    fecha_desde: datetime | None = Query(default=None),
+    fecha_hasta: datetime | None = Query(default=None),
+    temporada: str | None = Query(default=None, pattern=responses.SEASON_PATTERN),
+    db = Depends(get_read_db),
+):
+    season = responses.parse_season(temporada)
+
+    def build():
+        args = (team_id, limit, cursor, estado, jornada, fecha_desde, fecha_hasta, season)
+        # Temporada archivada: se lee de su fichero
+        path = seasons.archive_path(db, season) if season not in (None, seasons.current()) else None
+        if path:
+            return seasons.read_archive(path, _games_page, *args)
+        return _games_page(db, *args)
+
+    return responses.cached(request, ["games"], build, schemas.GamePage)
+
+def _games_page(db, team_id, limit, cursor, estado, jornada, fecha_desde, fecha_hasta, temporada) -> dict:
+    games, next_cursor = crud.list_games(
+        db,
+        team_id=team_id,
+        limit=limit,
+        cursor=cursor,
+        estado=estado,
+        jornada=jornada,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        temporada=temporada,
+    )
+    return {"items": games, "next_cursor": next_cursor}
+
+
+@app.get("/games/{game_id}", response_model=schemas.GameOut)
+def get_game(game_id: int, db = Depends(get_read_db)):
+    g = db.get(Game, game_id)
+    if not g:
+        raise HTTPException(404, "Game not found")
+    return g
+
+
+#Temporadas
+@app.get("/seasons", response_model=schemas.SeasonsOut)
+def list_seasons(db=Depends(get_read_db)):
+    return {"actual": seasons.current(), "items": seasons.list_seasons(db)}
+
+
+@app.post("/seasons/{season}/fixtures", response_model=schemas.FixturesOut)
+def create_fixtures(
+    season: int = Path(..., ge=1900, le=2999),
+    payload: schemas.FixturesCreate | None = None,
+    dry_run: bool | None = Query(default=None),
+    db=Depends(get_db),
+):
+    logger.debug("POST /seasons/%s/fixtures payload: %s dry_run=%s", season, payload, dry_run)
+    payload = payload or schemas.FixturesCreate()
+    # ?dry_run= manda sobre el del cuerpo
+    if dry_run is not None:
+        payload.dry_run = dry_run
+    try:
+        return fixtures.generate(db, season, **payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 
-@app.get("/games")
-def list_games(team_id: int | None = Query(default=None), db = Depends(get_db)):
-    games = crud.list_games(db, team_id=team_id)
-    return [
-        {
-            "id": g.id,
-            "local_id": g.local_id,
-            "visitante_id": g.visitante_id,
-            "fecha": g.fecha.isoformat() if g.fecha else None,
-            "jornada": g.jornada,
-            "estado": g.estado,
-            "goles_local": g.goles_local,
-            "goles_visitante": g.goles_visitante,
-        }
-        for g in games
-    ]
+@app.get("/seasons/{season}/teams", response_model=list[schemas.TeamSeasonOut])
+def get_season_teams(season: int, db=Depends(get_read_db)):
+    records = seasons.team_records(db, season)
+    if records is None:
+        raise HTTPException(404, "Temporada no encontrada")
+    return records
 
 
-@app.get("/games/{game_id}")
-def get_game(game_id: int, db = Depends(get_db)):
-    g = db.get(Game, game_id)
-    if not g:
-        raise HTTPException(404, "Game not found")
-    return {
-        "id": g.id,
-        "local_id": g.local_id,
-        "visitante_id": g.visitante_id,
-        "fecha": g.fecha.isoformat() if g.fecha else None,
-        "jornada": g.jornada,
-        "estado": g.estado,
-        "goles_local": g.goles_local,
-        "goles_visitante": g.goles_visitante,
-    }
\ No newline at end of file
+@app.post("/seasons/{season}/close", response_model=schemas.SeasonClosed)
+def close_season(season: int, db=Depends(get_db)):
+    logger.debug("POST /seasons/%s/close", season)
+    try:
+        result = seasons.close(db, season)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if result is None:
+        raise HTTPException(404, "Temporada no encontrada")
+    return result
+
+
+@app.post("/seasons/{season}/archive", response_model=schemas.SeasonArchived)
+def archive_season(season: int, db=Depends(get_db)):
+    logger.debug("POST /seasons/%s/archive", season)
+    try:
+        result = seasons.archive(db, season)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if result is None:
+        raise HTTPException(404, "Temporada no encontrada")
+    return result
+
+
+#Eventos de partido
+@app.post("/events", status_code=202, response_model=schemas.EventsAccepted)
+async def ingest_events(request: Request, db=Depends(get_db)):
+    # Cuerpo NDJSON (un evento por línea): se valida e inserta por trozos mientras llega
+    accepted, errors = 0, []
+    async for chunk in events.read_ndjson(request.stream()):
+        n, chunk_errors = await run_in_threadpool(events.ingest, db, chunk)
+        accepted += n
+        errors.extend(chunk_errors)
+    if accepted:
+        jobs.queue.enqueue("match_events", 0)
+    logger.info("Match events ingested: %s (%s errors)", accepted, len(errors))
+    return {"accepted": accepted, "errors": errors}
+
+
+#Exportacion
+@app.get("/export/{resource}")
+def export_rows(
+    resource: str = Path(pattern="^(players|stats|games)$"),
+    format: str = Query(default="ndjson", pattern="^(ndjson|csv|parquet)$"),
+    posicion: str | None = Query(default=None, pattern="^(portero|defensa|mediocampo|delantero)$"),
+    equipo_id: int | None = Query(default=None),
+    team_id: int | None = Query(default=None),
+    estado: str | None = Query(default=None, pattern="^(pendiente|jugado)$"),
+    jornada: int | None = Query(default=None),
+    fecha_desde: datetime | None = Query(default=None),
+    fecha_hasta: datetime | None = Query(default=None),
+    temporada: int | None = Query(default=None, ge=1900, le=2999),
+):
+    # Sin temporada se exporta todo el histórico que queda en la base (no el de las archivadas)
+    filters = {
+        name: value for name, value in (
+            ("posicion", posicion), ("equipo_id", equipo_id), ("team_id", team_id), ("estado", estado),
+            ("jornada", jornada), ("fecha_desde", fecha_desde), ("fecha_hasta", fecha_hasta), ("temporada", temporada),
+        ) if value is not None
+    }
+    if format == "parquet" and export.pq is None:
+        raise HTTPException(501, "El formato parquet requiere pyarrow")
+    try:
+        stmt = export.build_stmt(resource, filters)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    logger.info("Export requested: %s.%s filters=%s", resource, format, filters)
+    return StreamingResponse(
+        export.stream(resource, stmt, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{resource}.{format}"'},
+    )
+
+
+#En directo
+_TEAMS_FILTER = r"^\d+(,\d+)*$"
+
+@app.get("/live")
+async def live_events(teams: str | None = Query(default=None, pattern=_TEAMS_FILTER)):
+    # Server-Sent Events: game_result, team_record, player_value(s), standings y resync
+    try:
+        sub = live.broker.subscribe(live.parse_teams(teams))
+    except live.TooManySubscribers as e:
+        raise HTTPException(503, str(e))
+    return StreamingResponse(
+        live.sse_stream(sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.websocket("/live/ws")
+async def live_websocket(websocket: WebSocket, teams: str | None = Query(default=None, pattern=_TEAMS_FILTER)):
+    await websocket.accept()
+    try:
+        sub = live.broker.subscribe(live.parse_teams(teams))
+    except live.TooManySubscribers:
+        await websocket.close(code=1013)
+        return
+    await live.websocket_stream(websocket, sub)
+
+
+#Clasificacion
+@app.get("/standings", response_model=schemas.StandingsOut)
+def get_standings(
+    jornada: int | None = Query(default=None, ge=0),
+    temporada: int | None = Query(default=None, ge=1900, le=2999),
+    db = Depends(get_read_db),
+):
+    season = seasons.current() if temporada is None else temporada
+    path = seasons.archive_path(db, season) if season != seasons.current() else None
+    if path:
+        snapshot, rows = seasons.read_archive(path, standings.get_standings, jornada, season)
+    else:
+        snapshot, rows = standings.get_standings(db, jornada=jornada, temporada=season)
+    return responses.standings_dict(snapshot, rows, season)
@@ -0,0 +1,266 @@
+# app/metrics.py
+# Métricas de la API en formato de texto de Prometheus (GET /metrics), sin dependencias externas.
+# MetricsMiddleware mide cada petición HTTP por ruta (la plantilla, p.ej. /players/{player_id}, no
+# la URL): latencia, código de estado y peticiones en curso. Los eventos before/after_cursor_execute
+# de los engines suman sentencias y tiempo de base de datos en el RequestStats de la petición en
+# curso (contextvar: llega también a los hilos del threadpool). Los recálculos de la cola de
+# trabajos (por tipo de trabajo) y los recálculos completos de task (check_team_records,
+# reconcile_team_goals) se registran en liga_task_duration_seconds.
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+from .database import async_engine, engine, read_engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Segundos (latencias) y número de sentencias por petición
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+REGISTRY: list["_Metric"] = []
+_collectors: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda kv: tuple(map(str, kv[0])))
+            lines.extend(self._samples(items))
+        return lines
+
+    def _samples(self, items) -> list[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount=1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=TIME_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [cuenta por cubo (no acumulada)..., cubo +Inf], suma, total
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            else:
+                state[0][-1] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, items) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REQUESTS = Counter("liga_http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("liga_http_request_duration_seconds", "Duración de las peticiones HTTP", ("method", "route"))
+IN_PROGRESS = Gauge("liga_http_requests_in_progress", "Peticiones HTTP en curso")
+DB_QUERIES = Histogram("liga_db_queries_per_request", "Sentencias SQL por petición", ("method", "route"), QUERY_BUCKETS)
+DB_SECONDS = Histogram("liga_db_duration_seconds_per_request", "Tiempo en la base de datos por petición", ("method", "route"))
+DB_STATEMENTS = Counter("liga_db_statements_total", "Sentencias SQL ejecutadas (con o sin petición en curso)")
+TASK_SECONDS = Histogram("liga_task_duration_seconds", "Duración de los recálculos en segundo plano", ("task",))
+TASKS = Counter("liga_tasks_total", "Trabajos de recálculo procesados", ("task", "result"))
+
+
+def register_collector(fn) -> None:
+    # fn() -> [(nombre, tipo, ayuda, valor)]: valores leídos en el momento de servir /metrics
+    _collectors.append(fn)
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, type, help, value in collect():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {type}", f"{name} {_number(value)}"]
+    return "\n".join(lines) + "\n"
+
+
+#Sentencias SQL por petición
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("liga_request_stats", default=None)
+
+
+def current() -> RequestStats | None:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._liga_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    DB_STATEMENTS.inc()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - context._liga_query_start
+
+
+_instrumented = False
+
+
+def instrument_engines() -> None:
+    # Escritura, solo lectura y, si está activo, el asíncrono (sus eventos van por el engine síncrono)
+    global _instrumented
+    if _instrumented:
+        return
+    binds = {engine, read_engine}
+    if async_engine is not None:
+        binds.add(async_engine.sync_engine)
+    for bind in binds:
+        event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+        event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    _instrumented = True
+
+
+#Middleware
+
+class MetricsMiddleware:
+    # ASGI puro (sin BaseHTTPMiddleware): no añade una tarea por petición ni interfiere con el streaming.
+    # headers=True añade X-DB-Queries y Server-Timing a cada respuesta (contados hasta que empieza)
+    def __init__(self, app, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.headers:
+                    elapsed = time.perf_counter() - start
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Queries", str(stats.queries))
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries", app;dur={elapsed * 1000:.1f}',
+                    )
+            await send(message)
+
+        IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            IN_PROGRESS.dec()
+            _current.reset(token)
+            elapsed = time.perf_counter() - start
+            # Plantilla de la ruta que atendió la petición; "unmatched" para los 404 sin ruta
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUESTS.inc(method=scope["method"], route=route, status=str(status))
+            REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route)
+            DB_QUERIES.observe(stats.queries, method=scope["method"], route=route)
+            DB_SECONDS.observe(stats.db_seconds, method=scope["method"], route=route)
+
+
+#Recálculos
+
+def observe_task(task: str, seconds: float, jobs: int = 1, ok: bool = True) -> None:
+    TASK_SECONDS.observe(seconds, task=task)
+    TASKS.inc(jobs, task=task, result="ok" if ok else "error")
+
+
+def timed_task(task: str):
+    # Decorador para los recálculos completos que se lanzan fuera de la cola (arranque y /admin)
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                observe_task(task, time.perf_counter() - start, ok=ok)
+        return wrapper
+    return decorator
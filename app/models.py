@@ -1,12 +1,18 @@
 from sqlalchemy.orm import DeclarativeBase, relationship, column_property
-from sqlalchemy import Integer, String, Column, ForeignKey, Enum, select, func, Float, DateTime, CheckConstraint, UniqueConstraint
+from sqlalchemy import Integer, String, Column, ForeignKey, Enum, select, func, Float, DateTime, CheckConstraint, UniqueConstraint, Index, PrimaryKeyConstraint
 from datetime import datetime
 
+from . import config
+
 class DecBase(DeclarativeBase):
     pass
 
 class Player(DecBase):
     __tablename__ = "jugadores"
+    __table_args__ = (
+        # Plantillas, recuentos por equipo y la suma de Team.goles (cubierta por el índice)
+        Index("ix_jugadores_equipo_goles", "equipo_id", "goles"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(200), nullable=False)
@@ -16,10 +22,13 @@ class Player(DecBase):
     tarjetas_a = Column(Integer, default=0)
     tarjetas_r = Column(Integer, default=0)
     valor = Column(Float, default=0.0)
+    valor_mercado = Column(Float, default=0.0, server_default="0")
     equipo_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"))
     equipo = relationship("Team", back_populates="players")
 
     estadisticas = relationship("Stats", back_populates="player", uselist=False, cascade="all, delete-orphan")
+    estadisticas_temporadas = relationship("StatsSeason", back_populates="player", cascade="all, delete-orphan")
+    eventos = relationship("MatchEvent", back_populates="player", cascade="all, delete-orphan")
 
 class Team(DecBase):
     __tablename__ = "equipos"
@@ -29,13 +38,20 @@ class Team(DecBase):
     jugadores = Column(Integer, default=0)
     partidos = Column(Integer, default=0)
     victorias = Column(Integer, default=0)
+    empates = Column(Integer, default=0, server_default="0")
+    goles_favor = Column(Integer, default=0, server_default="0")
+    goles_contra = Column(Integer, default=0, server_default="0")
     players = relationship("Player", back_populates="equipo", cascade="all, delete-orphan")
-    goles = column_property(
-        select(func.coalesce(func.sum(Player.goles), 0))
-        .where(Player.equipo_id == id)
-        .correlate_except(Player)
-        .scalar_subquery()
-    )
+    if config.TEAM_GOALS_STORED:
+        # Total mantenido de forma incremental (LIGA_TEAM_GOALS_MODE=stored)
+        goles = Column(Integer, nullable=False, default=0, server_default="0")
+    else:
+        goles = column_property(
+            select(func.coalesce(func.sum(Player.goles), 0))
+            .where(Player.equipo_id == id)
+            .correlate_except(Player)
+            .scalar_subquery()
+        )
     home_games = relationship(
         "Game",
         foreign_keys="[Game.local_id]",
@@ -48,6 +64,25 @@ class Team(DecBase):
         back_populates="visitante",
         cascade="all, delete-orphan",
     )
+    standings = relationship("Standing", back_populates="team", cascade="all, delete-orphan")
+    temporadas = relationship("TeamSeason", back_populates="team", cascade="all, delete-orphan")
+
+class Season(DecBase):
+    # Temporada del 1 de julio al 30 de junio; el id es el año en que empieza (2025 = 2025/26)
+    __tablename__ = "temporadas"
+    __table_args__ = (
+        # Temporadas abiertas (recuentos de registros, temporada de Stats)
+        Index("ix_temporadas_estado_id", "estado", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    nombre = Column(String(20), nullable=False)
+    inicio = Column(DateTime, nullable=False)
+    fin = Column(DateTime, nullable=False)
+    # abierta -> cerrada (registros y estadísticas congelados) -> archivada (partidos en archivo)
+    estado = Column(Enum("abierta", "cerrada", "archivada", name="estado_temporada"), nullable=False, default="abierta")
+    archivo = Column(String(500), nullable=True)
+
 class Stats(DecBase):
     __tablename__ = "estadisticas"
 
@@ -70,8 +105,65 @@ class Stats(DecBase):
 
     player = relationship("Player", back_populates="estadisticas")
 
+class TeamSeason(DecBase):
+    # Registro de cada equipo por temporada: mantenido con los mismos deltas que Team y congelado al cerrarla
+    __tablename__ = "equipos_temporada"
+    __table_args__ = (
+        PrimaryKeyConstraint("temporada_id", "team_id"),
+        Index("ix_equipos_temporada_equipo", "team_id"),
+    )
+
+    temporada_id = Column(Integer, ForeignKey("temporadas.id"), nullable=False)
+    team_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"), nullable=False)
+    partidos = Column(Integer, nullable=False, default=0)
+    victorias = Column(Integer, nullable=False, default=0)
+    empates = Column(Integer, nullable=False, default=0)
+    goles_favor = Column(Integer, nullable=False, default=0)
+    goles_contra = Column(Integer, nullable=False, default=0)
+
+    team = relationship("Team", back_populates="temporadas")
+
+class StatsSeason(DecBase):
+    # Estadísticas de cada jugador en una temporada cerrada (Stats guarda las de la temporada en juego)
+    __tablename__ = "estadisticas_temporada"
+    __table_args__ = (
+        PrimaryKeyConstraint("temporada_id", "player_id"),
+        Index("ix_estadisticas_temporada_jugador", "player_id"),
+    )
+
+    temporada_id = Column(Integer, ForeignKey("temporadas.id"), nullable=False)
+    player_id = Column(Integer, ForeignKey("jugadores.id", ondelete="CASCADE"), nullable=False)
+
+    tiros = Column(Integer, default=0)
+    tiros_a_puerta = Column(Integer, default=0)
+    asistencias = Column(Integer, default=0)
+    regates_intentados = Column(Integer, default=0)
+    regates_exitosos = Column(Integer, default=0)
+    pases_intentados = Column(Integer, default=0)
+    pases_completados = Column(Integer, default=0)
+    entradas_intentadas = Column(Integer, default=0)
+    entradas_exitosas = Column(Integer, default=0)
+    paradas = Column(Integer, default=0)
+
+    player = relationship("Player", back_populates="estadisticas_temporadas")
+
 class Game(DecBase):
     __tablename__ = "partidos"
+    __table_args__ = (
+        # Un índice único (y no UniqueConstraint) para poder crearlo en bases existentes con upgrade_indexes.
+        # Por temporada: cada una numera sus jornadas desde 1
+        Index("uq_partidos_temporada_local_visitante_jornada", "temporada_id", "local_id", "visitante_id", "jornada", unique=True),
+        # Partidos de un equipo (recuentos de registros, listado con team_id y estado)
+        Index("ix_partidos_local_estado", "local_id", "estado"),
+        Index("ix_partidos_visitante_estado", "visitante_id", "estado"),
+        # Orden y filtros por fecha
+        Index("ix_partidos_fecha_id", "fecha", "id"),
+        Index("ix_partidos_jornada", "jornada"),
+        # Listados de la temporada en curso (orden por id) y recuentos de las temporadas abiertas
+        Index("ix_partidos_temporada_id", "temporada_id", "id"),
+        # Sin AUTOINCREMENT, SQLite reutilizaría los id de los partidos archivados (seasons.archive)
+        {"sqlite_autoincrement": True},
+    )
     id = Column(Integer, primary_key=True, index=True)
 
     local_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"), nullable=False)
@@ -79,9 +171,80 @@ class Game(DecBase):
 
     fecha = Column(DateTime, nullable=True)
     jornada = Column(Integer, nullable=True)
+    temporada_id = Column(Integer, ForeignKey("temporadas.id"), nullable=True)
     estado = Column(Enum("pendiente", "jugado", name="estado_partido"), nullable=False, default="pendiente")
     goles_local = Column(Integer, default=0)
     goles_visitante = Column(Integer, default=0)
 
     local = relationship("Team", foreign_keys=[local_id], back_populates="home_games")
-    visitante = relationship("Team", foreign_keys=[visitante_id], back_populates="away_games")
\ No newline at end of file
+    visitante = relationship("Team", foreign_keys=[visitante_id], back_populates="away_games")
+    eventos = relationship("MatchEvent", back_populates="game", cascade="all, delete-orphan")
+
+
+# Índices sustituidos por otros del modelo: retire_indexes los borra de las bases existentes
+RETIRED_INDEXES = {
+    # Sin la temporada: impedía repetir local, visitante y jornada en temporadas distintas
+    "partidos": ("uq_partidos_local_visitante_jornada",),
+}
+
+
+class MatchEvent(DecBase):
+    # Eventos de partido: solo se insertan. events.aggregate los acumula en Player, Stats y Team
+    __tablename__ = "eventos_partido"
+    __table_args__ = (
+        Index("ix_eventos_partido_partido", "game_id", "id"),
+        Index("ix_eventos_partido_jugador", "player_id"),
+        # Los id no se reutilizan tras archivar: la marca de agua de events.aggregate es un id
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(Integer, ForeignKey("partidos.id", ondelete="CASCADE"), nullable=False)
+    player_id = Column(Integer, ForeignKey("jugadores.id", ondelete="CASCADE"), nullable=False)
+    tipo = Column(Enum(
+        "gol", "asistencia", "tiro", "tiro_a_puerta", "regate", "regate_exitoso", "pase", "pase_completado",
+        "entrada", "entrada_exitosa", "parada", "tarjeta_amarilla", "tarjeta_roja",
+        name="tipo_evento",
+    ), nullable=False)
+    minuto = Column(Integer, nullable=True)
+    creado = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    game = relationship("Game", back_populates="eventos")
+    player = relationship("Player", back_populates="eventos")
+
+
+class EventWatermark(DecBase):
+    # Último id de eventos_partido ya acumulado (una fila por agregador)
+    __tablename__ = "eventos_acumulados"
+
+    nombre = Column(String(50), primary_key=True)
+    ultimo_id = Column(Integer, nullable=False, default=0)
+
+
+class Standing(DecBase):
+    # Clasificación acumulada de cada equipo al cierre de cada jornada (una foto por jornada), desde
+    # cero en cada temporada. Son datos derivados: main.py recrea la tabla si le falta temporada_id
+    __tablename__ = "clasificacion"
+    __table_args__ = (
+        UniqueConstraint("temporada_id", "jornada", "team_id", name="uq_clasificacion_temporada_jornada_equipo"),
+        Index("ix_clasificacion_temporada_jornada_posicion", "temporada_id", "jornada", "posicion"),
+        # Deltas de un equipo desde una jornada y borrado en cascada del equipo
+        Index("ix_clasificacion_equipo_temporada_jornada", "team_id", "temporada_id", "jornada"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    temporada_id = Column(Integer, ForeignKey("temporadas.id"), nullable=True)
+    jornada = Column(Integer, nullable=False)
+    team_id = Column(Integer, ForeignKey("equipos.id", ondelete="CASCADE"), nullable=False)
+
+    puntos = Column(Integer, nullable=False, default=0)
+    partidos = Column(Integer, nullable=False, default=0)
+    victorias = Column(Integer, nullable=False, default=0)
+    empates = Column(Integer, nullable=False, default=0)
+    derrotas = Column(Integer, nullable=False, default=0)
+    goles_favor = Column(Integer, nullable=False, default=0)
+    goles_contra = Column(Integer, nullable=False, default=0)
+    diferencia = Column(Integer, nullable=False, default=0)
+    posicion = Column(Integer, nullable=True)
+
+    team = relationship("Team", back_populates="standings")
@@ -0,0 +1,92 @@
+# app/querycount.py
+# Contador de sentencias SQL para detectar N+1: cada endpoint de lectura tiene un
+# presupuesto máximo de consultas y check_query_budgets falla si alguno lo supera.
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event, select
+
+from . import cache, models
+from .database import engine, read_engine, async_engine
+
+
+class QueryCounter:
+    def __init__(self, bind=None):
+        # Sin bind se cuentan todos los engines: escritura, solo lectura y, si está activo, el asíncrono
+        if bind is None:
+            binds = list({engine, read_engine})
+            if async_engine is not None:
+                binds.append(async_engine.sync_engine)
+        else:
+            binds = [getattr(bind, "sync_engine", bind)]
+        self.binds = binds
+        self.statements: list[str] = []
+        self._lock = threading.Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        for bind in self.binds:
+            event.listen(bind, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        for bind in self.binds:
+            event.remove(bind, "before_cursor_execute", self._on_execute)
+        return False
+
+
+@contextmanager
+def assert_max_queries(limit: int, bind=None, label: str = ""):
+    with QueryCounter(bind) as counter:
+        yield counter
+    if counter.count > limit:
+        detail = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(counter.statements))
+        raise AssertionError(f"{label or 'Bloque'}: {counter.count} consultas SQL (máximo {limit})\n{detail}")
+
+
+# Presupuesto de consultas por endpoint: {player_id}/{team_id} se sustituyen por ids existentes
+QUERY_BUDGETS = {
+    "/teams": 1,
+    "/teams/{team_id}": 1,
+    "/teams/{team_id}/players": 2,
+    "/players": 1,
+    "/players?include=stats,team": 1,
+    "/players/{player_id}": 1,
+    "/players/{player_id}?include=stats,team": 1,
+    "/players/{player_id}/team": 1,
+    "/playersDetail/{player_id}": 1,
+    "/games": 1,
+    "/standings": 2,
+}
+
+
+def check_query_budgets(client, db, budgets: dict[str, int] = QUERY_BUDGETS) -> list[str]:
+    # client: TestClient de la app. Devuelve la lista de endpoints que superan su presupuesto
+    ids = {
+        "player_id": db.scalar(select(models.Player.id).where(models.Player.equipo_id.is_not(None)).limit(1)),
+        "team_id": db.scalar(select(models.Team.id).limit(1)),
+    }
+    failures = []
+    for path, limit in budgets.items():
+        needed = [name for name in ids if "{" + name + "}" in path]
+        if any(ids[name] is None for name in needed):
+            continue
+        url = path.format(**{name: ids[name] for name in needed})
+        # Se mide la consulta real, no una respuesta servida desde la caché
+        cache.cache.clear()
+        try:
+            with assert_max_queries(limit, label=f"GET {url}"):
+                response = client.get(url)
+        except AssertionError as e:
+            failures.append(str(e))
+            continue
+        if response.status_code >= 400:
+            failures.append(f"GET {url}: status {response.status_code}")
+    return failures
@@ -0,0 +1,114 @@
+# app/responses.py
+# Construcción de las respuestas de lectura, compartida por las rutas síncronas (main.py)
+# y las asíncronas (async_routes.py) para que ambas devuelvan exactamente lo mismo.
+from fastapi import Request, Response
+from pydantic_core import to_json
+from sqlalchemy import inspect
+
+from . import cache, schemas, seasons
+from .models import Player
+
+INCLUDE_PATTERN = "^(stats|team)(,(stats|team))*$"
+
+
+def parse_include(include: str | None) -> set[str]:
+    return set(include.split(",")) if include else set()
+
+
+# ?temporada= de los listados de partidos: un año o "todas"; sin el parámetro, la temporada en curso
+SEASON_PATTERN = r"^(\d{4}|todas)$"
+
+
+def parse_season(temporada: str | None) -> int | None:
+    if temporada is None:
+        return seasons.current()
+    return None if temporada == "todas" else int(temporada)
+
+
+def columns(model) -> list[str]:
+    return [attr.key for attr in inspect(model).column_attrs]
+
+
+def player_dict(player, include: set[str]) -> dict:
+    # Jugador del ORM (get_player_with) con solo las relaciones pedidas en ?include=
+    data = {key: getattr(player, key) for key in columns(Player)}
+    if "stats" in include:
+        data["estadisticas"] = player.estadisticas
+    if "team" in include:
+        data["equipo"] = player.equipo
+    return data
+
+
+def _nest(data: dict, prefix: str, key: str) -> dict | None:
+    # Saca de la fila las columnas "prefijo__x"; None si el LEFT JOIN no encontró nada
+    nested = {name[len(prefix) + 2:]: data.pop(name) for name in [n for n in data if n.startswith(prefix + "__")]}
+    return nested if nested[key] is not None else None
+
+
+def player_row(row, include: set[str]) -> dict:
+    # Fila de crud._players_stmt como dict: validarla por atributos con PlayerExpandedOut
+    # pagaría un AttributeError por cada relación no pedida
+    data = row._asdict()
+    if "stats" in include:
+        data["estadisticas"] = _nest(data, "estadisticas", "player_id")
+    if "team" in include:
+        data["equipo"] = _nest(data, "equipo", "id")
+    return data
+
+
+def player_detail(player) -> dict:
+    # player con las estadisticas ya cargadas (include={"stats"}); sin estadisticas, todo a 0
+    stats = player.estadisticas
+    return {
+        "jugador": player,
+        "estadisticas": {key: (getattr(stats, key) or 0) if stats else 0 for key in schemas.StatsIn.model_fields},
+    }
+
+
+def standings_dict(snapshot: int | None, rows: list, temporada: int) -> dict:
+    return {"temporada": temporada, "jornada": snapshot, "items": rows}
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _encode(data, model) -> bytes:
+    # Misma validación y serialización que FastAPI aplica con response_model (núcleo de Pydantic)
+    return to_json(model.model_validate(data))
+
+
+def _respond(request: Request, entry: cache.CacheEntry) -> Response:
+    # Con If-None-Match igual al ETag actual se responde 304 sin cuerpo
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def _cache_key(request: Request) -> tuple:
+    return cache.cache.make_key(request.url.path, request.query_params.multi_items())
+
+
+def cached(request: Request, tags: list[str], build, model) -> Response:
+    # Respuesta JSON desde la caché (clave = ruta + query) o construida con build(), validada
+    # con el modelo de respuesta y guardada
+    key = _cache_key(request)
+    entry = cache.cache.get(key)
+    if entry is None:
+        token = cache.cache.token()
+        entry = cache.cache.set(key, _encode(build(), model), tags, token)
+    return _respond(request, entry)
+
+
+async def cached_async(request: Request, tags: list[str], build, model) -> Response:
+    # Igual que cached(), con build() como corrutina
+    key = _cache_key(request)
+    entry = cache.cache.get(key)
+    if entry is None:
+        token = cache.cache.token()
+        entry = cache.cache.set(key, _encode(await build(), model), tags, token)
+    return _respond(request, entry)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Optional
 from datetime import datetime
 
 class PlayerCreate(BaseModel):
@@ -46,12 +46,227 @@ class StatsIn(BaseModel):
     entradas_exitosas: int = 0
     paradas: int = 0   
 
+class StatsBatchItem(StatsIn):
+    player_id: int
+
+class StatsDelta(BaseModel):
+    # Incrementos sobre las estadísticas guardadas (eventos de un partido en directo)
+    tiros: int = Field(0, ge=0)
+    tiros_a_puerta: int = Field(0, ge=0)
+    asistencias: int = Field(0, ge=0)
+    regates_intentados: int = Field(0, ge=0)
+    regates_exitosos: int = Field(0, ge=0)
+    pases_intentados: int = Field(0, ge=0)
+    pases_completados: int = Field(0, ge=0)
+    entradas_intentadas: int = Field(0, ge=0)
+    entradas_exitosas: int = Field(0, ge=0)
+    paradas: int = Field(0, ge=0)
+
+class MatchEventIn(BaseModel):
+    game_id: int
+    player_id: int
+    tipo: str = Field(..., pattern=(
+        "^(gol|asistencia|tiro|tiro_a_puerta|regate|regate_exitoso|pase|pase_completado|"
+        "entrada|entrada_exitosa|parada|tarjeta_amarilla|tarjeta_roja)$"
+    ))
+    minuto: Optional[int] = Field(None, ge=0, le=150)
+
 class GameCreate(BaseModel):
     local_id: int
     visitante_id: int
     fecha: Optional[datetime | str] = None
     jornada: Optional[int] = None
 
+class FixturesCreate(BaseModel):
+    # Sin team_ids: todos los equipos. Sin fecha_inicio: primer sábado desde el 15 de agosto.
+    # Un campo desconocido es un 422 (un dry_run mal escrito no debe generar el calendario de verdad)
+    model_config = ConfigDict(extra="forbid")
+
+    team_ids: Optional[list[int]] = None
+    fecha_inicio: Optional[datetime] = None
+    dias_entre_jornadas: int = Field(7, ge=1, le=60)
+    primera_jornada: Optional[int] = Field(None, ge=1)
+    dry_run: bool = False
+
 class GameResultUpdate(BaseModel):
     goles_local: int = Field(..., ge=0)
-    goles_visitante: int = Field(..., ge=0)    
\ No newline at end of file
+    goles_visitante: int = Field(..., ge=0)    
+
+class GameResultBatchItem(GameResultUpdate):
+    game_id: int
+
+
+# Respuestas: FastAPI valida y serializa a JSON con el núcleo de Pydantic (sin jsonable_encoder).
+# from_attributes permite devolver instancias del ORM o filas (Row) de SQLAlchemy tal cual.
+class TeamOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    nombre: str
+    jugadores: int | None = None
+    partidos: int | None = None
+    victorias: int | None = None
+    empates: int | None = None
+    goles_favor: int | None = None
+    goles_contra: int | None = None
+    goles: int | None = None
+
+class StatsOut(StatsIn):
+    model_config = ConfigDict(from_attributes=True)
+
+    player_id: int
+
+class PlayerOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    nombre: str
+    dorsal: int
+    posicion: str
+    goles: int | None = None
+    tarjetas_a: int | None = None
+    tarjetas_r: int | None = None
+    valor: float | None = None
+    valor_mercado: float | None = None
+    equipo_id: int | None = None
+
+class PlayerExpandedOut(PlayerOut):
+    # ?include=stats,team: las claves solo aparecen si se pidieron (response_model_exclude_unset)
+    estadisticas: StatsOut | None = None
+    equipo: TeamOut | None = None
+
+class PlayerSummaryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    nombre: str
+    dorsal: int
+    posicion: str
+    goles: int | None = None
+    tarjetas_a: int | None = None
+    tarjetas_r: int | None = None
+    equipo_id: int | None = None
+    valor: float | None = None
+
+class PlayerDetailOut(BaseModel):
+    jugador: PlayerSummaryOut
+    estadisticas: StatsIn
+
+class GameOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    local_id: int
+    visitante_id: int
+    fecha: datetime | None = None
+    jornada: int | None = None
+    temporada_id: int | None = None
+    estado: str
+    goles_local: int | None = None
+    goles_visitante: int | None = None
+
+class StandingOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    posicion: int | None = None
+    team_id: int
+    nombre: str
+    puntos: int
+    partidos: int
+    victorias: int
+    empates: int
+    derrotas: int
+    goles_favor: int
+    goles_contra: int
+    diferencia: int
+
+class StandingsOut(BaseModel):
+    temporada: int
+    jornada: int | None = None
+    items: list[StandingOut]
+
+class FixtureOut(BaseModel):
+    id: int | None = None
+    jornada: int
+    fecha: datetime
+    local_id: int
+    visitante_id: int
+
+class FixturesOut(BaseModel):
+    temporada: int
+    dry_run: bool
+    equipos: int
+    jornadas: int
+    partidos: int
+    items: list[FixtureOut]
+
+class SeasonOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    nombre: str
+    inicio: datetime
+    fin: datetime
+    estado: str
+    archivo: str | None = None
+
+class SeasonsOut(BaseModel):
+    actual: int
+    items: list[SeasonOut]
+
+class TeamSeasonOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    team_id: int
+    nombre: str
+    partidos: int
+    victorias: int
+    empates: int
+    goles_favor: int
+    goles_contra: int
+
+class PlayerSeasonStatsOut(StatsIn):
+    temporada: int
+
+class SeasonClosed(BaseModel):
+    temporada: int
+    estado: str
+    jugadores: int
+    revalorados: int
+
+class SeasonArchived(BaseModel):
+    temporada: int
+    estado: str
+    archivo: str
+    filas: dict[str, int]
+
+class TeamPage(BaseModel):
+    items: list[TeamOut]
+    next_cursor: int | None = None
+
+class PlayerPage(BaseModel):
+    items: list[PlayerExpandedOut]
+    next_cursor: int | None = None
+
+class GamePage(BaseModel):
+    items: list[GameOut]
+    next_cursor: int | None = None
+
+class BatchError(BaseModel):
+    index: int
+    detail: Any
+
+class BatchCreated(BaseModel):
+    created: list[int]
+    errors: list[BatchError]
+
+class BatchUpdated(BaseModel):
+    updated: list[int]
+    errors: list[BatchError]
+
+class EventsAccepted(BaseModel):
+    accepted: int
+    errors: list[BatchError]
+
+class Message(BaseModel):
+    detail: str
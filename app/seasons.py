@@ -0,0 +1,295 @@
+# app/seasons.py
+# Temporadas: del 1 de julio al 30 de junio, identificadas por el año en que empiezan (2025 = 2025/26).
+# Cada partido guarda su temporada (por su fecha; sin fecha, la temporada en curso). La temporada en
+# curso sale de la fecha de hoy sin consultar la base (o de LIGA_SEASON), y los listados de partidos
+# y la clasificación se limitan a ella por defecto, así las consultas calientes no tocan el histórico.
+# Ciclo de vida: abierta -> cerrada -> archivada.
+#   close    congela el registro de cada equipo en la temporada (equipos_temporada), guarda la foto
+#            de Stats en estadisticas_temporada y deja Stats a cero para la temporada siguiente. Los
+#            recuentos de registros (task._check_team_records) solo recorren temporadas abiertas
+#   archive  mueve los partidos, sus eventos y la clasificación de una temporada cerrada a un fichero
+#            SQLite aparte (LIGA_ARCHIVE_DIR) que solo se abre cuando se consulta esa temporada
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from . import cache, config, models, schemas
+
+logger = logging.getLogger("liga")
+
+STATS_FIELDS = tuple(schemas.StatsIn.model_fields)
+RECORD_FIELDS = ("partidos", "victorias", "empates", "goles_favor", "goles_contra")
+
+
+def season_of(fecha: datetime | None) -> int:
+    if fecha is None:
+        return current()
+    return fecha.year if fecha.month >= 7 else fecha.year - 1
+
+
+def current() -> int:
+    return config.SEASON if config.SEASON is not None else season_of(datetime.now())
+
+
+def window(season: int) -> tuple[datetime, datetime]:
+    return datetime(season, 7, 1), datetime(season + 1, 7, 1)
+
+
+def name(season: int) -> str:
+    return f"{season}/{(season + 1) % 100:02d}"
+
+
+def _season_row(season: int) -> dict:
+    inicio, fin = window(season)
+    return {"id": season, "nombre": name(season), "inicio": inicio, "fin": fin, "estado": "abierta"}
+
+
+def ensure(db: Session, season_ids) -> None:
+    # Crea las temporadas que falten (abiertas)
+    from . import crud
+
+    season_ids = {s for s in season_ids if s is not None}
+    if not season_ids:
+        return
+    existing = set(db.scalars(select(models.Season.id).where(models.Season.id.in_(season_ids))))
+    missing = sorted(season_ids - existing)
+    if missing:
+        db.execute(crud._dialect_insert(db, models.Season).on_conflict_do_nothing(), [_season_row(s) for s in missing])
+
+
+def require_open(db: Session, season_ids) -> None:
+    # Antes de crear o modificar partidos: crea las temporadas nuevas y rechaza las cerradas
+    from . import crud
+
+    season_ids = {s for s in season_ids if s is not None}
+    if not season_ids:
+        return
+    estados = dict(db.execute(
+        select(models.Season.id, models.Season.estado).where(models.Season.id.in_(season_ids))
+    ).all())
+    closed = sorted(s for s, estado in estados.items() if estado != "abierta")
+    if closed:
+        raise ValueError(f"La temporada {closed[0]} está {estados[closed[0]]}: sus partidos no se pueden modificar")
+    missing = sorted(season_ids - set(estados))
+    if missing:
+        db.execute(crud._dialect_insert(db, models.Season).on_conflict_do_nothing(), [_season_row(s) for s in missing])
+
+
+def open_ids(db: Session) -> list[int]:
+    return list(db.scalars(select(models.Season.id).where(models.Season.estado == "abierta").order_by(models.Season.id)))
+
+
+def stats_season(db: Session) -> int:
+    # Temporada a la que pertenecen las estadísticas de Stats: la primera abierta
+    return db.scalar(select(func.min(models.Season.id)).where(models.Season.estado == "abierta")) or current()
+
+
+def backfill(db: Session, chunk: int = 5000) -> int:
+    # Bases anteriores a las temporadas: asigna la temporada a los partidos que no la tienen
+    Game = models.Game
+    total = 0
+    seen: set[int] = set()
+    while True:
+        rows = db.execute(select(Game.id, Game.fecha).where(Game.temporada_id.is_(None)).limit(chunk)).all()
+        if not rows:
+            break
+        updates = [{"id": row.id, "temporada_id": season_of(row.fecha)} for row in rows]
+        new = {u["temporada_id"] for u in updates} - seen
+        ensure(db, new)
+        seen |= new
+        db.execute(update(Game), updates)
+        total += len(updates)
+    if total:
+        cache.mark(db, "games")
+        logger.info("[seasons] Temporada asignada a %s partidos: %s", total, sorted(seen))
+    return total
+
+
+def list_seasons(db: Session) -> list:
+    return db.scalars(select(models.Season).order_by(models.Season.id.desc())).all()
+
+
+def team_records(db: Session, season: int) -> list | None:
+    if db.get(models.Season, season) is None:
+        return None
+    TS = models.TeamSeason
+    return db.execute(
+        select(TS.team_id, models.Team.nombre, *(getattr(TS, f) for f in RECORD_FIELDS))
+        .join(models.Team, models.Team.id == TS.team_id)
+        .where(TS.temporada_id == season)
+        .order_by(TS.team_id)
+    ).all()
+
+
+def player_seasons(db: Session, player_id: int) -> list[dict] | None:
+    # Temporadas cerradas (estadisticas_temporada) y la que está en juego (Stats)
+    if db.scalar(select(models.Player.id).where(models.Player.id == player_id)) is None:
+        return None
+    SS, S = models.StatsSeason, models.Stats
+    history = [
+        {"temporada": row.temporada_id, **{f: getattr(row, f) or 0 for f in STATS_FIELDS}}
+        for row in db.scalars(select(SS).where(SS.player_id == player_id).order_by(SS.temporada_id))
+    ]
+    stats = db.get(S, player_id)
+    history.append({"temporada": stats_season(db), **{f: (getattr(stats, f) or 0) if stats else 0 for f in STATS_FIELDS}})
+    return history
+
+
+def _aggregate_events(db: Session) -> None:
+    # Los eventos pendientes de acumular se suman antes de congelar Stats o de mover los eventos
+    from . import events
+
+    while events.aggregate(db)["pending"]:
+        pass
+
+
+#Cierre
+
+def close(db: Session, season: int) -> dict | None:
+    from . import task, valuation
+
+    Game, Stats, SS = models.Game, models.Stats, models.StatsSeason
+    row = db.get(models.Season, season)
+    if row is None:
+        return None
+    if row.estado != "abierta":
+        raise ValueError(f"La temporada {season} ya está {row.estado}")
+    first_open = db.scalar(select(func.min(models.Season.id)).where(models.Season.estado == "abierta"))
+    if first_open != season:
+        # Stats es de la primera temporada abierta: se cierran en orden
+        raise ValueError(f"Antes hay que cerrar la temporada {first_open}")
+    pending = db.scalar(
+        select(func.count()).select_from(Game).where(Game.temporada_id == season, Game.estado == "pendiente")
+    )
+    if pending:
+        raise ValueError(f"La temporada {season} tiene {pending} partidos pendientes")
+
+    _aggregate_events(db)
+    # Registros recontados desde los partidos justo antes de congelarlos
+    task._check_team_records(db, fix=True)
+    db.execute(delete(SS).where(SS.temporada_id == season))
+    db.execute(insert(SS).from_select(
+        ["temporada_id", "player_id", *STATS_FIELDS],
+        select(literal(season), Stats.player_id, *(getattr(Stats, f) for f in STATS_FIELDS)),
+    ))
+    players = db.execute(
+        update(Stats).values(dict.fromkeys(STATS_FIELDS, 0)), execution_options={"synchronize_session": False}
+    ).rowcount
+    row.estado = "cerrada"
+    cache.mark(db, cache.ALL_PLAYERS)
+    db.commit()
+    # Sin las estadísticas de la temporada anterior cambia el valor de los jugadores
+    revalued = valuation.revalue(db)
+    logger.info("[seasons] Temporada %s cerrada: foto de estadísticas de %s jugadores", season, players)
+    return {"temporada": season, "estado": "cerrada", "jugadores": players, "revalorados": revalued["changed"]}
+
+
+#Archivo
+
+_ARCHIVED = (models.Season, models.Team, models.Game, models.MatchEvent, models.Standing, models.TeamSeason, models.StatsSeason)
+
+_archive_engines: dict = {}
+_archive_lock = threading.Lock()
+
+
+def archive_file(season: int, directory: str | None = None) -> str:
+    return os.path.abspath(os.path.join(directory or config.ARCHIVE_DIR, f"temporada_{season}.db"))
+
+
+def archive(db: Session, season: int, directory: str | None = None) -> dict | None:
+    from .database import _make_engine
+
+    Game, E = models.Game, models.MatchEvent
+    row = db.get(models.Season, season)
+    if row is None:
+        return None
+    if row.estado != "cerrada":
+        raise ValueError(f"Solo se archivan temporadas cerradas (la {season} está {row.estado})")
+    if season == current():
+        raise ValueError("La temporada en curso no se puede archivar")
+
+    _aggregate_events(db)
+    path = archive_file(season, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        # Intento anterior a medias: la temporada sigue cerrada, así que los datos siguen en la base
+        os.remove(path)
+    game_ids = select(Game.id).where(Game.temporada_id == season)
+    copies = {
+        models.Season: models.Season.id == season,
+        models.Team: None,
+        Game: Game.temporada_id == season,
+        E: E.game_id.in_(game_ids),
+        models.Standing: models.Standing.temporada_id == season,
+        models.TeamSeason: models.TeamSeason.temporada_id == season,
+        models.StatsSeason: models.StatsSeason.temporada_id == season,
+    }
+    target = _make_engine(f"sqlite:///{path}")
+    copied = {}
+    try:
+        models.DecBase.metadata.create_all(target, tables=[model.__table__ for model in _ARCHIVED])
+        with target.begin() as conn:
+            for model, where in copies.items():
+                table = model.__table__
+                stmt = select(table) if where is None else select(table).where(where)
+                result = db.execute(stmt.execution_options(yield_per=config.EXPORT_BATCH))
+                copied[table.name] = 0
+                for part in result.mappings().partitions():
+                    conn.execute(insert(table), [dict(r) for r in part])
+                    copied[table.name] += len(part)
+            conn.execute(update(models.Season.__table__).where(models.Season.id == season).values(estado="archivada", archivo=path))
+    finally:
+        target.dispose()
+
+    # Fuera de la base caliente: eventos, clasificación y partidos (los registros y las fotos de
+    # estadísticas por temporada se quedan, son una fila por equipo/jugador)
+    db.execute(delete(E).where(E.game_id.in_(game_ids)), execution_options={"synchronize_session": False})
+    db.execute(delete(models.Standing).where(models.Standing.temporada_id == season), execution_options={"synchronize_session": False})
+    deleted = db.execute(delete(Game).where(Game.temporada_id == season), execution_options={"synchronize_session": False}).rowcount
+    if deleted != copied[Game.__tablename__]:
+        db.rollback()
+        raise RuntimeError(f"Temporada {season}: {copied[Game.__tablename__]} partidos archivados y {deleted} borrados")
+    row.estado = "archivada"
+    row.archivo = path
+    cache.mark(db, "games")
+    db.commit()
+    logger.info("[seasons] Temporada %s archivada en %s: %s", season, path, copied)
+    return {"temporada": season, "estado": "archivada", "archivo": path, "filas": copied}
+
+
+def archive_path(db: Session, season: int) -> str | None:
+    return db.scalar(
+        select(models.Season.archivo).where(models.Season.id == season, models.Season.estado == "archivada")
+    )
+
+
+def _archive_engine(path: str):
+    from .database import _make_engine
+
+    with _archive_lock:
+        engine = _archive_engines.get(path)
+        if engine is None:
+            engine = _archive_engines[path] = _make_engine(f"sqlite:///{path}", read_only=True, size=1, overflow=4)
+        return engine
+
+
+def read_archive(path: str, fn, *args, **kwargs):
+    # fn(db, ...) contra el archivo: las rutas asíncronas la lanzan en el threadpool
+    with archive_session(path) as db:
+        return fn(db, *args, **kwargs)
+
+
+@contextmanager
+def archive_session(path: str):
+    # Sesión de solo lectura sobre el fichero de una temporada archivada, con el mismo esquema:
+    # crud.list_games y standings.get_standings funcionan igual contra ella
+    db = Session(bind=_archive_engine(path))
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,171 @@
+# app/standings.py
+import logging
+from sqlalchemy import select, update, delete, insert, func
+from sqlalchemy.orm import Session
+
+from . import live, models, seasons
+
+logger = logging.getLogger("liga")
+
+STAT_FIELDS = ("puntos", "partidos", "victorias", "empates", "derrotas", "goles_favor", "goles_contra", "diferencia")
+
+# Los partidos sin jornada cuentan como jornada 0
+NO_JORNADA = 0
+
+
+def _standing_delta(record_delta: dict) -> dict:
+    # Convierte un delta del registro de equipo (crud._add_result_delta) en delta de clasificación
+    derrotas = record_delta["partidos"] - record_delta["victorias"] - record_delta["empates"]
+    return {
+        "puntos": 3 * record_delta["victorias"] + record_delta["empates"],
+        "partidos": record_delta["partidos"],
+        "victorias": record_delta["victorias"],
+        "empates": record_delta["empates"],
+        "derrotas": derrotas,
+        "goles_favor": record_delta["goles_favor"],
+        "goles_contra": record_delta["goles_contra"],
+        "diferencia": record_delta["goles_favor"] - record_delta["goles_contra"],
+    }
+
+
+def _ensure_rows(db: Session, temporada: int, jornada: int) -> list[int]:
+    # Garantiza que la foto de la jornada y todas las posteriores de la temporada tienen fila para
+    # cada equipo. Las filas que faltan copian la última foto anterior del equipo en la temporada
+    # (o empiezan a cero).
+    S = models.Standing
+    all_teams = set(db.scalars(select(models.Team.id)))
+    in_season = S.temporada_id == temporada
+    counts = dict(db.execute(
+        select(S.jornada, func.count()).where(in_season, S.jornada >= jornada).group_by(S.jornada)
+    ).all())
+    jornadas = sorted(set(counts) | {jornada})
+
+    for j in jornadas:
+        if counts.get(j, 0) >= len(all_teams):
+            continue
+        missing = all_teams - set(db.scalars(select(S.team_id).where(in_season, S.jornada == j)))
+        previous: dict[int, dict] = {}
+        for row in db.execute(
+            select(S).where(in_season, S.team_id.in_(missing), S.jornada < j).order_by(S.jornada.desc())
+        ).scalars():
+            previous.setdefault(row.team_id, {f: getattr(row, f) for f in STAT_FIELDS})
+        db.execute(insert(S), [
+            {"temporada_id": temporada, "jornada": j, "team_id": tid, **previous.get(tid, dict.fromkeys(STAT_FIELDS, 0))}
+            for tid in missing
+        ])
+    return jornadas
+
+
+def _rerank(db: Session, temporada: int, jornadas: list[int]) -> None:
+    S = models.Standing
+    rows = db.execute(
+        select(S.id, S.jornada, S.posicion)
+        .where(S.temporada_id == temporada, S.jornada.in_(jornadas))
+        .order_by(S.jornada, S.puntos.desc(), S.diferencia.desc(), S.goles_favor.desc(), S.team_id)
+    ).all()
+    changes = []
+    current, rank = None, 0
+    for row in rows:
+        if row.jornada != current:
+            current, rank = row.jornada, 0
+        rank += 1
+        if row.posicion != rank:
+            changes.append({"id": row.id, "posicion": rank})
+    if changes:
+        db.execute(update(S), changes)
+
+
+def apply_result_deltas(db: Session, deltas_by_jornada: dict[tuple[int, int], dict[int, dict]]) -> None:
+    # Aplica en la misma transacción los deltas de resultados agrupados por (temporada, jornada)
+    S = models.Standing
+    touched: dict[int, set[int]] = {}
+    for temporada, jornada in sorted(deltas_by_jornada):
+        deltas = {tid: d for tid, d in deltas_by_jornada[temporada, jornada].items() if any(d.values())}
+        if not deltas:
+            continue
+        touched.setdefault(temporada, set()).update(_ensure_rows(db, temporada, jornada))
+        for team_id, record_delta in deltas.items():
+            d = _standing_delta(record_delta)
+            db.execute(
+                update(S)
+                .where(S.team_id == team_id, S.temporada_id == temporada, S.jornada >= jornada)
+                .values({getattr(S, f): getattr(S, f) + d[f] for f in STAT_FIELDS}),
+                execution_options={"synchronize_session": False},
+            )
+    for temporada, jornadas in touched.items():
+        _rerank(db, temporada, sorted(jornadas))
+        live.publish(db, "standings", {"temporada": temporada, "jornadas": sorted(jornadas)})
+
+
+def rebuild(db: Session) -> int:
+    # Reconstrucción completa desde los partidos jugados (inicialización o comprobación). Las temporadas
+    # archivadas ya no tienen partidos aquí: su clasificación está en el fichero del archivo
+    S, Game = models.Standing, models.Game
+    db.execute(delete(S))
+    team_ids = list(db.scalars(select(models.Team.id)))
+    games = db.execute(
+        select(Game.temporada_id, Game.jornada, Game.local_id, Game.visitante_id, Game.goles_local, Game.goles_visitante)
+        .where(Game.estado == "jugado")
+        .order_by(Game.temporada_id, func.coalesce(Game.jornada, NO_JORNADA))
+    ).all()
+
+    def key(g) -> tuple:
+        return g.temporada_id, g.jornada if g.jornada is not None else NO_JORNADA
+
+    totals: dict[int, dict] = {}
+    snapshots: dict[int, list[int]] = {}
+    for i, g in enumerate(games):
+        if i == 0 or g.temporada_id != games[i - 1].temporada_id:
+            # Cada temporada empieza de cero
+            totals = {tid: dict.fromkeys(STAT_FIELDS, 0) for tid in team_ids}
+        for tid, gf, gc in ((g.local_id, g.goles_local or 0, g.goles_visitante or 0),
+                            (g.visitante_id, g.goles_visitante or 0, g.goles_local or 0)):
+            t = totals.setdefault(tid, dict.fromkeys(STAT_FIELDS, 0))
+            t["partidos"] += 1
+            t["victorias"] += int(gf > gc)
+            t["empates"] += int(gf == gc)
+            t["derrotas"] += int(gf < gc)
+            t["puntos"] += 3 if gf > gc else int(gf == gc)
+            t["goles_favor"] += gf
+            t["goles_contra"] += gc
+            t["diferencia"] += gf - gc
+        temporada, jornada = key(g)
+        if i + 1 == len(games) or key(games[i + 1]) != (temporada, jornada):
+            snapshots.setdefault(temporada, []).append(jornada)
+            db.execute(insert(S), [
+                {"temporada_id": temporada, "jornada": jornada, "team_id": tid, **dict(t)} for tid, t in totals.items()
+            ])
+    for temporada, jornadas in snapshots.items():
+        _rerank(db, temporada, jornadas)
+        live.publish(db, "standings", {"temporada": temporada, "jornadas": jornadas, "rebuild": True})
+    db.commit()
+    total = sum(len(j) for j in snapshots.values())
+    logger.info("[standings] Clasificación reconstruida: %s jornadas en %s temporadas", total, len(snapshots))
+    return total
+
+
+def _snapshot_stmt(jornada: int | None, temporada: int):
+    S = models.Standing
+    stmt = select(func.max(S.jornada)).where(S.temporada_id == temporada)
+    if jornada is not None:
+        stmt = stmt.where(S.jornada <= jornada)
+    return stmt
+
+
+def _rows_stmt(snapshot: int, temporada: int):
+    S = models.Standing
+    return (
+        select(*S.__table__.columns, models.Team.nombre)
+        .join(models.Team, models.Team.id == S.team_id)
+        .where(S.temporada_id == temporada, S.jornada == snapshot)
+        .order_by(S.posicion)
+    )
+
+
+def get_standings(db: Session, jornada: int | None = None, temporada: int | None = None) -> tuple[int | None, list]:
+    # Devuelve la foto de la última jornada <= jornada (o la más reciente) de la temporada (por defecto, la temporada en curso)
+    temporada = seasons.current() if temporada is None else temporada
+    snapshot = db.scalar(_snapshot_stmt(jornada, temporada))
+    if snapshot is None:
+        return None, []
+    return snapshot, db.execute(_rows_stmt(snapshot, temporada)).all()
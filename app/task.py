@@ -1,24 +1,30 @@
 # app/tasks.py
 import math
+from sqlalchemy import select, update, func, or_, union_all
 from .database import SessionLocal
-from . import models
+from . import cache, crud, live, metrics, models, seasons, standings
 import logging
 
 logger = logging.getLogger("liga")
 
+
 def safe_rate(ok: int, total: int) -> float:
     return (ok / total) if total and total > 0 else 0.0
 
-import math
-from .database import SessionLocal
-from . import models
-import logging
-
-logger = logging.getLogger("liga")
-
+# Pesos por posición y multiplicadores de mercado (compartidos con app/valuation.py)
+WEIGHTS = {
+    "delantero":   dict(g=6.0, a=3.0, shot=3.0, dribble=2.0, pass_=1.5, tackle=0.5, save=0.0),
+    "mediocampo":  dict(g=3.5, a=4.0, shot=1.5, dribble=2.5, pass_=3.5, tackle=1.5, save=0.0),
+    "defensa":     dict(g=1.0, a=1.0, shot=0.5, dribble=0.5, pass_=2.0, tackle=5.0, save=0.0),
+    "portero":     dict(g=0.5, a=0.5, shot=0.0, dribble=0.0, pass_=1.0, tackle=1.0, save=7.0),
+}
 
-def safe_rate(ok: int, total: int) -> float:
-    return (ok / total) if total and total > 0 else 0.0
+MULTIPLICADORES = {
+    "portero": 0.7,
+    "defensa": 0.8,
+    "mediocampo": 1.0,
+    "delantero": 1.3,
+}
 
 #Calculamos el valor de los jugadores (en esto me a ayudado la IA, de hecho, aun no entiendo del todo bien como hace el calculo)
 def valor_en_euros(valor_interno: float, posicion: str) -> float:
@@ -26,13 +32,7 @@ def valor_en_euros(valor_interno: float, posicion: str) -> float:
     valor_interno = max(0.0, min(valor_interno, 100.0))
     euros = 0.2 * (1.08 ** valor_interno) 
 
-    multiplicadores = {
-        "portero": 0.7,
-        "defensa": 0.8,
-        "mediocampo": 1.0,
-        "delantero": 1.3,
-    }
-    factor = multiplicadores.get(posicion, 1.0)
+    factor = MULTIPLICADORES.get(posicion, 1.0)
     return round(euros * factor, 2)
 
 
@@ -48,13 +48,7 @@ def compute_player_value(player: models.Player, st: models.Stats | None, partido
     asistencias = st.asistencias if st else 0
     paradas = st.paradas if st else 0
 
-    weights = {
-        "delantero":   dict(g=6.0, a=3.0, shot=3.0, dribble=2.0, pass_=1.5, tackle=0.5, save=0.0),
-        "mediocampo":  dict(g=3.5, a=4.0, shot=1.5, dribble=2.5, pass_=3.5, tackle=1.5, save=0.0),
-        "defensa":     dict(g=1.0, a=1.0, shot=0.5, dribble=0.5, pass_=2.0, tackle=5.0, save=0.0),
-        "portero":     dict(g=0.5, a=0.5, shot=0.0, dribble=0.0, pass_=1.0, tackle=1.0, save=7.0),
-    }
-    w = weights.get(player.posicion, weights["mediocampo"])
+    w = WEIGHTS.get(player.posicion, WEIGHTS["mediocampo"])
 
     comp_goles = w["g"] * goles
     comp_asist = w["a"] * asistencias
@@ -74,57 +68,215 @@ def compute_player_value(player: models.Player, st: models.Stats | None, partido
     return round(valor, 2)
 
 
-def recompute_player_value(player_id: int) -> None:
+def _count_team_games(db, team_id: int | None) -> int:
+    if not team_id:
+        return 0
+    # Solo la columna: cargar la entidad Team dispararía la subconsulta de Team.goles
+    partidos = db.scalar(select(models.Team.partidos).where(models.Team.id == team_id))
+    return int(partidos or 0)
+
+
+def _recompute_player_value(db, player_id: int) -> bool:
+    player = db.get(models.Player, player_id)
+    if not player:
+        logger.warning("[tasks] Player %s no existe al recomputar valor", player_id)
+        return False
+
+    st = db.query(models.Stats).filter(models.Stats.player_id == player_id).one_or_none()
+    partidos_equipo = _count_team_games(db, player.equipo_id)
+    new_val = compute_player_value(player, st, partidos_equipo)
+    new_market_val = valor_en_euros(new_val, player.posicion)
+
+    if player.valor != new_val or player.valor_mercado != new_market_val:
+        player.valor = new_val
+        player.valor_mercado = new_market_val
+        cache.mark_players(db, [player.id])
+        live.publish(db, "player_value", {
+            "player_id": player.id, "equipo_id": player.equipo_id,
+            "valor": new_val, "valor_mercado": new_market_val,
+        }, teams=(player.equipo_id,))
+        logger.info(
+            "[tasks] Valor jugador %s actualizado -> interno=%.2f, mercado=%.2fM€",
+            player.id, new_val, new_market_val,
+        )
+        return True
+    return False
+
+
+RECORD_FIELDS = ("partidos", "victorias", "empates", "goles_favor", "goles_contra")
+
+
+def _team_records_from_games(db, team_ids: list[int] | None = None, season_ids: list[int] | None = None) -> dict[tuple[int, int], dict]:
+    # Recuento desde partidos, por (temporada, equipo): una fila por equipo y partido jugado (como local y
+    # como visitante). Con season_ids, solo esas temporadas y los partidos que aún no tienen temporada
+    Game = models.Game
+    local = select(
+        Game.temporada_id,
+        Game.local_id.label("team_id"),
+        Game.goles_local.label("gf"),
+        Game.goles_visitante.label("gc"),
+    ).where(Game.estado == "jugado")
+    visitante = select(
+        Game.temporada_id,
+        Game.visitante_id.label("team_id"),
+        Game.goles_visitante.label("gf"),
+        Game.goles_local.label("gc"),
+    ).where(Game.estado == "jugado")
+    if team_ids is not None:
+        local = local.where(Game.local_id.in_(team_ids))
+        visitante = visitante.where(Game.visitante_id.in_(team_ids))
+    if season_ids is not None:
+        in_seasons = or_(Game.temporada_id.in_(season_ids), Game.temporada_id.is_(None))
+        local = local.where(in_seasons)
+        visitante = visitante.where(in_seasons)
+    rows = union_all(local, visitante).subquery()
+
+    stmt = select(
+        rows.c.temporada_id,
+        rows.c.team_id,
+        func.count(),
+        # Agregados con FILTER (PostgreSQL y SQLite >= 3.30) en lugar de SUM(CASE ...)
+        func.count().filter(rows.c.gf > rows.c.gc),
+        func.count().filter(rows.c.gf == rows.c.gc),
+        func.coalesce(func.sum(rows.c.gf), 0),
+        func.coalesce(func.sum(rows.c.gc), 0),
+    ).group_by(rows.c.temporada_id, rows.c.team_id)
+    return {(row[0], row[1]): dict(zip(RECORD_FIELDS, (int(v or 0) for v in row[2:]))) for row in db.execute(stmt)}
+
+
+def _frozen_team_records(db, team_ids: list[int] | None, open_seasons: list[int]) -> dict[int, dict]:
+    # Suma de los registros congelados de las temporadas cerradas o archivadas (sin recorrer sus partidos)
+    TS = models.TeamSeason
+    stmt = select(TS.team_id, *(func.sum(getattr(TS, f)) for f in RECORD_FIELDS)).where(TS.temporada_id.not_in(open_seasons))
+    if team_ids is not None:
+        stmt = stmt.where(TS.team_id.in_(team_ids))
+    return {row[0]: dict(zip(RECORD_FIELDS, (int(v or 0) for v in row[1:]))) for row in db.execute(stmt.group_by(TS.team_id))}
+
+
+def _add_records(a: dict, b: dict) -> dict:
+    return {f: a[f] + b[f] for f in RECORD_FIELDS}
+
+
+def _check_team_records(db, team_ids: list[int] | None = None, fix: bool = True) -> list[dict]:
+    # Solo se recuentan los partidos de las temporadas abiertas (y los que aún no tienen temporada);
+    # el total de Team suma además los registros congelados en equipos_temporada
+    Team, TS = models.Team, models.TeamSeason
+    open_seasons = seasons.open_ids(db)
+    by_season = _team_records_from_games(db, team_ids, open_seasons)
+    zero = dict.fromkeys(RECORD_FIELDS, 0)
+    expected = _frozen_team_records(db, team_ids, open_seasons)
+    for (_, team_id), record in by_season.items():
+        expected[team_id] = _add_records(expected.get(team_id, zero), record)
+
+    stmt = select(Team.id, *(getattr(Team, f) for f in RECORD_FIELDS))
+    if team_ids is not None:
+        stmt = stmt.where(Team.id.in_(team_ids))
+    mismatches = []
+    for row in db.execute(stmt):
+        stored = dict(zip(RECORD_FIELDS, (int(v or 0) for v in row[1:])))
+        real = expected.get(row[0], zero)
+        if stored != real:
+            mismatches.append({"team_id": row[0], "stored": stored, "expected": real})
+
+    # Registro por temporada de las temporadas abiertas
+    season_stmt = select(TS.temporada_id, TS.team_id, *(getattr(TS, f) for f in RECORD_FIELDS)).where(TS.temporada_id.in_(open_seasons))
+    if team_ids is not None:
+        season_stmt = season_stmt.where(TS.team_id.in_(team_ids))
+    stored_by_season = {(row[0], row[1]): dict(zip(RECORD_FIELDS, (int(v or 0) for v in row[2:]))) for row in db.execute(season_stmt)}
+    season_mismatches = [
+        {"temporada": key[0], "team_id": key[1], "stored": stored_by_season.get(key, zero), "expected": by_season.get(key, zero)}
+        for key in sorted(set(stored_by_season) | {k for k in by_season if k[0] is not None})
+        if stored_by_season.get(key, zero) != by_season.get(key, zero)
+    ]
+
+    if mismatches and fix:
+        db.execute(update(Team), [{"id": m["team_id"], **m["expected"]} for m in mismatches])
+        cache.mark_teams(db, [m["team_id"] for m in mismatches])
+        for m in mismatches:
+            live.publish(db, "team_record", {"team_id": m["team_id"], **m["expected"]}, teams=(m["team_id"],))
+    if season_mismatches and fix:
+        seasons.ensure(db, {m["temporada"] for m in season_mismatches})
+        db.execute(
+            crud._upsert_stmt(db, TS, ("temporada_id", "team_id"), RECORD_FIELDS),
+            [{"temporada_id": m["temporada"], "team_id": m["team_id"], **m["expected"]} for m in season_mismatches],
+        )
+    if mismatches or season_mismatches:
+        logger.warning(
+            "[tasks] Registros de equipos inconsistentes: %s, por temporada: %s (fix=%s)",
+            [m["team_id"] for m in mismatches], len(season_mismatches), fix,
+        )
+    else:
+        logger.info("[tasks] Registros de equipos consistentes")
+    return mismatches + season_mismatches
+
+
+@metrics.timed_task("check_team_records")
+def check_team_records(team_ids: list[int] | None = None, fix: bool = True) -> list[dict]:
+    # Comprobador de consistencia: compara los contadores incrementales con un recuento completo
+    db = SessionLocal()
+    try:
+        mismatches = _check_team_records(db, team_ids, fix)
+        db.commit()
+        return mismatches
+    except Exception as e:
+        db.rollback()
+        logger.exception("[tasks] Error comprobando registros de equipos: %s", e)
+        raise
+    finally:
+        db.close()
+
+
+@metrics.timed_task("reconcile_team_goals")
+def reconcile_team_goals() -> int:
+    # Recalcula Team.goles (modo "stored") y corrige solo los equipos desviados
     db = SessionLocal()
     try:
-        player = db.get(models.Player, player_id)
-        if not player:
-            logger.warning(f"[tasks] Player {player_id} no existe al recomputar valor")
-            return
-
-        st = db.query(models.Stats).filter(models.Stats.player_id == player_id).one_or_none()
-        partidos_equipo = _count_team_games(db, player.equipo_id)
-        new_val = compute_player_value(player, st, partidos_equipo)
-        new_market_val = valor_en_euros(new_val, player.posicion)
-
-        if player.valor != new_val or getattr(player, "valor_mercado", 0.0) != new_market_val:
-            player.valor = new_val
-            player.valor_mercado = new_market_val
-            db.commit()
-            logger.info(
-                f"[tasks] Valor jugador {player.id} actualizado -> "
-                f"interno={new_val:.2f}, mercado={new_market_val:.2f}M€"
-            )
+        Team, Player = models.Team, models.Player
+        total = (
+            select(func.coalesce(func.sum(Player.goles), 0))
+            .where(Player.equipo_id == Team.id)
+            .scalar_subquery()
+        )
+        fixed = db.execute(
+            update(Team).where(Team.goles != total).values(goles=total),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        if fixed:
+            cache.mark(db, "teams", cache.ALL_TEAMS)
+        db.commit()
+        logger.info("[tasks] Reconciliacion de goles de equipos: %s corregidos", fixed)
+        return fixed
     except Exception as e:
         db.rollback()
-        logger.exception(f"[tasks] Error recomputando valor de player {player_id}: {e}")
+        logger.exception("[tasks] Error reconciliando goles de equipos: %s", e)
+        raise
     finally:
         db.close()
 
-def recompute_team_record(team_id: int) -> None:
 
+def init_seasons(recount: bool = False) -> None:
+    # Partidos sin temporada (bases anteriores) y, si hay partidos jugados pero equipos_temporada está
+    # vacía (o recount, p.ej. por columnas nuevas del registro), un recuento completo de los registros
     db = SessionLocal()
     try:
-        Team, Game = models.Team, models.Game
-        team = db.get(Team, team_id)
-        if not team:
-            return
-        pj = db.query(Game).filter(
-            Game.estado == "jugado",
-            ((Game.local_id == team_id) | (Game.visitante_id == team_id))
-        ).count()
-
-        wins = db.query(Game).filter(
-            Game.estado == "jugado",
-            (
-                ((Game.local_id == team_id) & (Game.goles_local > Game.goles_visitante)) |
-                ((Game.visitante_id == team_id) & (Game.goles_visitante > Game.goles_local))
-            )
-        ).count()
-
-        team.partidos = pj
-        team.victorias = wins
+        seasons.ensure(db, [seasons.current()])
+        backfilled = seasons.backfill(db)
         db.commit()
-        logger.info(f"[tasks] Recuento equipo {team_id}: PJ={pj}, W={wins}")
+        empty = db.scalar(select(models.TeamSeason.team_id).limit(1)) is None
+        played = db.scalar(select(models.Game.id).where(models.Game.estado == "jugado").limit(1))
+    finally:
+        db.close()
+    if recount or (played is not None and (backfilled or empty)):
+        check_team_records(fix=True)
+
+
+def init_standings() -> None:
+    # Si hay partidos jugados pero la clasificación está vacía (base de datos anterior), se construye una vez
+    db = SessionLocal()
+    try:
+        empty = db.scalar(select(func.count()).select_from(models.Standing)) == 0
+        played = db.scalar(select(models.Game.id).where(models.Game.estado == "jugado").limit(1))
+        if empty and played is not None:
+            standings.rebuild(db)
     finally:
         db.close()
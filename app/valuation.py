@@ -0,0 +1,198 @@
+# app/valuation.py
+# Valoración en bloque de jugadores: misma fórmula que task.compute_player_value / task.valor_en_euros,
+# pero sobre columnas completas en NumPy en lugar de jugador a jugador.
+import logging
+import math
+import time
+from sqlalchemy import select, update, func, bindparam
+from sqlalchemy.orm import Session
+
+from . import cache, live, models, task
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy se usa la función escalar fila a fila
+    np = None
+
+logger = logging.getLogger("liga")
+
+# Jugadores por bloque: acota la memoria al revalorar ligas muy grandes
+CHUNK_SIZE = 50_000
+
+POSICIONES = list(task.WEIGHTS)
+WEIGHT_KEYS = ("g", "a", "shot", "dribble", "pass_", "tackle", "save")
+
+STAT_COLUMNS = (
+    "tiros", "tiros_a_puerta", "asistencias",
+    "regates_intentados", "regates_exitosos",
+    "pases_intentados", "pases_completados",
+    "entradas_intentadas", "entradas_exitosas",
+    "paradas",
+)
+
+
+def _load_chunk(db: Session, after_id: int, player_ids=None, team_ids=None) -> list:
+    P, S, T = models.Player, models.Stats, models.Team
+    stmt = (
+        select(
+            P.id, P.posicion,
+            func.coalesce(P.goles, 0), func.coalesce(P.tarjetas_a, 0), func.coalesce(P.tarjetas_r, 0),
+            P.valor, P.valor_mercado,
+            *(func.coalesce(getattr(S, c), 0) for c in STAT_COLUMNS),
+            func.coalesce(T.partidos, 0),
+            P.equipo_id,
+        )
+        .outerjoin(S, S.player_id == P.id)
+        .outerjoin(T, T.id == P.equipo_id)
+        .where(P.id > after_id)
+        .order_by(P.id)
+        .limit(CHUNK_SIZE)
+    )
+    if player_ids is not None:
+        stmt = stmt.where(P.id.in_(player_ids))
+    if team_ids is not None:
+        stmt = stmt.where(P.equipo_id.in_(team_ids))
+    # Filas de Core (sin pasar por el loader del ORM)
+    return db.connection().execute(stmt).all()
+
+
+def _map_exact(fn, values):
+    # Aplica una función de math sobre los valores únicos: resultado idéntico al escalar y coste O(únicos)
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return np.array([fn(v) for v in uniques.tolist()], dtype=np.float64)[inverse]
+
+
+def _round2(values) -> list[float]:
+    # round() de Python (redondeo decimal correcto), igual que la versión escalar
+    return [round(v, 2) for v in values.tolist()]
+
+
+def _rate(ok, total):
+    out = np.zeros(len(total), dtype=np.float64)
+    np.divide(ok, total, out=out, where=total > 0)
+    return out
+
+
+def compute_values(rows: list) -> tuple[list[float], list[float]]:
+    # rows: salida de _load_chunk. Devuelve (valor, valor_mercado) en el mismo orden
+    if not rows:
+        return [], []
+    if np is None:
+        return _compute_values_scalar(rows)
+
+    cols = list(zip(*rows))
+    pos_index = {p: i for i, p in enumerate(POSICIONES)}
+    default = pos_index["mediocampo"]
+    pos = np.array([pos_index.get(p, default) for p in cols[1]], dtype=np.int64)
+    goles, tarj_a, tarj_r = (np.array(c, dtype=np.float64) for c in cols[2:5])
+    st = {name: np.array(c, dtype=np.float64) for name, c in zip(STAT_COLUMNS, cols[7:17])}
+    partidos = np.maximum(np.array(cols[17], dtype=np.float64), 0.0)
+
+    table = np.array([[task.WEIGHTS[p][k] for k in WEIGHT_KEYS] for p in POSICIONES], dtype=np.float64)
+    w = {k: table[pos, i] for i, k in enumerate(WEIGHT_KEYS)}
+
+    # Mismo orden de operaciones que task.compute_player_value para obtener los mismos bits
+    comp_goles = w["g"] * goles
+    comp_asist = w["a"] * st["asistencias"]
+    comp_shots = w["shot"] * (_rate(st["tiros_a_puerta"], st["tiros"]) * 10)
+    comp_dribb = w["dribble"] * (_rate(st["regates_exitosos"], st["regates_intentados"]) * 10)
+    comp_pass = w["pass_"] * (_rate(st["pases_completados"], st["pases_intentados"]) * 10)
+    comp_tackl = w["tackle"] * (_rate(st["entradas_exitosas"], st["entradas_intentadas"]) * 10)
+    comp_save = w["save"] * _map_exact(math.log1p, st["paradas"]) * 2
+
+    base = comp_goles + comp_asist + comp_shots + comp_dribb + comp_pass + comp_tackl + comp_save
+    bonus = 1.0 + np.minimum(partidos / 100.0, 0.15)
+    cards_penalty = 1.0 - np.minimum(tarj_a * 0.01 + tarj_r * 0.05, 0.2)
+    valor = _round2(np.maximum(base * bonus * cards_penalty, 0.0))
+
+    # Una posición desconocida cae en "mediocampo", cuyo multiplicador coincide con el 1.0 por defecto
+    factor = np.array([task.MULTIPLICADORES.get(p, 1.0) for p in POSICIONES], dtype=np.float64)[pos]
+    valor_arr = np.clip(np.array(valor, dtype=np.float64), 0.0, 100.0)
+    euros = 0.2 * _map_exact(lambda v: 1.08 ** v, valor_arr)
+    mercado = _round2(euros * factor)
+    return valor, mercado
+
+
+def _compute_values_scalar(rows: list) -> tuple[list[float], list[float]]:
+    valores, mercado = [], []
+    for row in rows:
+        player = models.Player(posicion=row[1], goles=row[2], tarjetas_a=row[3], tarjetas_r=row[4])
+        st = models.Stats(**dict(zip(STAT_COLUMNS, row[7:17])))
+        v = task.compute_player_value(player, st, row[17])
+        valores.append(v)
+        mercado.append(task.valor_en_euros(v, row[1]))
+    return valores, mercado
+
+
+# UPDATE de Core con executemany: evita el coste por fila del bulk update del ORM
+_players = models.Player.__table__
+_BULK_UPDATE = (
+    update(_players)
+    .where(_players.c.id == bindparam("b_id"))
+    .values(valor=bindparam("b_valor"), valor_mercado=bindparam("b_mercado"))
+)
+
+
+def revalue(db: Session, player_ids=None, team_ids=None, commit: bool = True) -> dict:
+    # Recalcula valor y valor_mercado (todos, o filtrando por jugadores/equipos) y escribe solo los que cambian
+    start = time.perf_counter()
+    total = 0
+    changed_ids: list[int] = []
+    # Cambios por equipo para /live (solo si hay suscriptores)
+    by_team: dict = {} if live.active() else None
+    after_id = 0
+    while True:
+        rows = _load_chunk(db, after_id, player_ids=player_ids, team_ids=team_ids)
+        if not rows:
+            break
+        valores, mercado = compute_values(rows)
+        updates = [
+            {"b_id": row[0], "b_valor": v, "b_mercado": m}
+            for row, v, m in zip(rows, valores, mercado)
+            if row[5] != v or row[6] != m
+        ]
+        if updates:
+            db.execute(_BULK_UPDATE, updates)
+            if by_team is not None:
+                for row, v, m in zip(rows, valores, mercado):
+                    if row[5] != v or row[6] != m:
+                        by_team.setdefault(row[18], []).append({"player_id": row[0], "valor": v, "valor_mercado": m})
+        total += len(rows)
+        changed_ids.extend(u["b_id"] for u in updates)
+        after_id = rows[-1][0]
+        if len(rows) < CHUNK_SIZE:
+            break
+    changed = len(changed_ids)
+    cache.mark_players(db, changed_ids)
+    for team_id, players in (by_team or {}).items():
+        live.publish(db, "player_values", {"equipo_id": team_id, "players": players}, teams=(team_id,))
+    if commit:
+        db.commit()
+    elapsed = time.perf_counter() - start
+    logger.info("[valuation] Revalorados %s jugadores (%s cambios) en %.2fs", total, changed, elapsed)
+    return {"players": total, "changed": changed, "seconds": round(elapsed, 3)}
+
+
+def check_parity(db: Session, limit: int | None = None) -> list[dict]:
+    # Compara el cálculo en bloque con task.compute_player_value jugador a jugador
+    rows = []
+    after_id = 0
+    while limit is None or len(rows) < limit:
+        chunk = _load_chunk(db, after_id)
+        if not chunk:
+            break
+        rows.extend(chunk)
+        after_id = chunk[-1][0]
+    if limit is not None:
+        rows = rows[:limit]
+
+    valores, mercado = compute_values(rows)
+    mismatches = []
+    for row, v, m in zip(rows, valores, mercado):
+        player = db.get(models.Player, row[0])
+        st = db.get(models.Stats, row[0])
+        expected = task.compute_player_value(player, st, task._count_team_games(db, player.equipo_id))
+        expected_m = task.valor_en_euros(expected, player.posicion)
+        if expected != v or expected_m != m:
+            mismatches.append({"player_id": row[0], "valor": [expected, v], "valor_mercado": [expected_m, m]})
+    return mismatches
@@ -0,0 +1,179 @@
+"""Mismo escenario funcional y tiempos contra cada backend de base de datos (SQLite y PostgreSQL).
+
+Uso: python bench/backend_matrix.py [--teams 12] [--players 100] [--pg-url URL] [--pg-bin DIR] [--skip-postgres]
+
+SQLite usa un fichero temporal. Para PostgreSQL se levanta un clúster desechable con initdb/pg_ctl
+(del PATH o de --pg-bin) escuchando solo en un socket Unix dentro de un directorio temporal, salvo
+que se pase --pg-url con un servidor existente y una base vacía. initdb no se puede ejecutar como root.
+Cada backend corre en un proceso aparte con LIGA_DATABASE_URL apuntando a su base; el proceso
+sale con código 1 si alguna comprobación falla en algún backend. Los upserts e incrementos de
+crud se prueban además por backend en tests/test_backends.py (PostgreSQL con LIGA_TEST_PG_URL).
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(args) -> dict:
+    sys.path.insert(0, ROOT)
+    from fastapi.testclient import TestClient
+    from sqlalchemy import func, or_, select
+    from app import jobs, models, querycount, standings, task
+    from app.database import SessionLocal
+    from app.main import app
+
+    logging.getLogger("liga").setLevel(logging.WARNING)
+    timings: dict[str, float] = {}
+    checks: dict[str, bool] = {}
+
+    @contextlib.contextmanager
+    def timed(name: str):
+        start = time.perf_counter()
+        yield
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    with TestClient(app) as client:
+        with timed("equipos+jugadores"):
+            team_ids = [client.post("/teams", json={"nombre": f"Equipo {i}"}).json()["id"] for i in range(args.teams)]
+            player_ids = []
+            for t, team_id in enumerate(team_ids):
+                items = [
+                    {"nombre": f"Jugador {t}-{i}", "dorsal": i % 99 + 1, "posicion": "delantero", "goles": i % 7, "equipo_id": team_id}
+                    for i in range(args.players)
+                ]
+                player_ids += client.post("/players:batch", json=items).json()["created"]
+        with timed("stats:batch alta"):
+            client.put("/stats:batch", json=[{"player_id": pid, "tiros": 1} for pid in player_ids])
+        with timed("stats:batch modificación"):
+            client.put("/stats:batch", json=[{"player_id": pid, "tiros": pid % 13} for pid in player_ids])
+        with timed("partidos"):
+            games = [
+                client.post("/games", json={"local_id": a, "visitante_id": b, "jornada": j}).json()["id"]
+                for j, (a, b) in enumerate((a, b) for a in team_ids for b in team_ids if a != b)
+            ]
+        with timed("results:batch"):
+            client.patch("/games/results:batch", json=[
+                {"game_id": gid, "goles_local": gid % 4, "goles_visitante": gid % 3} for gid in games
+            ])
+        jobs.queue.drain()
+        with timed("GET mixtos x200"):
+            for i in range(200):
+                tid = team_ids[i % len(team_ids)]
+                client.get(("/teams", f"/teams/{tid}", f"/games?team_id={tid}", "/standings")[i % 4])
+
+        duplicate = client.post("/games", json={"local_id": team_ids[0], "visitante_id": team_ids[1], "jornada": 0})
+        checks["partido duplicado rechazado"] = duplicate.status_code == 400
+
+        db = SessionLocal()
+        try:
+            checks["estadísticas guardadas"] = db.scalar(select(func.sum(models.Stats.tiros))) == sum(pid % 13 for pid in player_ids)
+            checks["registros de equipos"] = task.check_team_records(fix=False) == []
+            before = [tuple(getattr(r, f) for f in ("team_id", "puntos", "posicion")) for r in standings.get_standings(db)[1]]
+            standings.rebuild(db)
+            after = [tuple(getattr(r, f) for f in ("team_id", "puntos", "posicion")) for r in standings.get_standings(db)[1]]
+            checks["clasificación incremental = reconstruida"] = bool(before) and before == after
+            checks["presupuestos de consultas"] = querycount.check_query_budgets(client, db) == []
+
+            victim = team_ids[-1]
+            client.delete(f"/teams/{victim}")
+            db.expire_all()
+            leftovers = (
+                db.scalar(select(func.count()).select_from(models.Player).where(models.Player.equipo_id == victim))
+                + db.scalar(select(func.count()).select_from(models.Game).where(
+                    or_(models.Game.local_id == victim, models.Game.visitante_id == victim)))
+                + db.scalar(select(func.count()).select_from(models.Standing).where(models.Standing.team_id == victim))
+            )
+            checks["borrado en cascada"] = leftovers == 0
+        finally:
+            db.close()
+    return {"timings": timings, "checks": checks}
+
+
+@contextlib.contextmanager
+def postgres_cluster(bin_dir: str | None, port: int):
+    def tool(name: str) -> str:
+        path = shutil.which(name, path=bin_dir) if bin_dir else shutil.which(name)
+        if path is None:
+            raise SystemExit(f"No se encuentra {name}: instala PostgreSQL o usa --pg-bin / --pg-url / --skip-postgres")
+        return path
+
+    tmp = tempfile.mkdtemp(prefix="liga-pg-")
+    data = os.path.join(tmp, "data")
+    try:
+        subprocess.run([tool("initdb"), "-D", data, "-U", "liga", "--auth=trust", "-E", "UTF8"],
+                       check=True, capture_output=True)
+        subprocess.run([tool("pg_ctl"), "-D", data, "-l", os.path.join(tmp, "postgres.log"), "-w",
+                        "-o", f"-k {tmp} -p {port} -c listen_addresses=''", "start"],
+                       check=True, capture_output=True)
+        try:
+            yield f"postgresql+psycopg://liga@/postgres?host={tmp}&port={port}"
+        finally:
+            subprocess.run([tool("pg_ctl"), "-D", data, "-m", "fast", "stop"], capture_output=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def run_backend(args, url: str) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, LIGA_DATABASE_URL=url)
+        env.pop("LIGA_ASYNC_DATABASE_URL", None)
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--teams", str(args.teams), "--players", str(args.players)],
+            cwd=tmp, env=env, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f"código {out.returncode}"}
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=12)
+    parser.add_argument("--players", type=int, default=100, help="jugadores por equipo")
+    parser.add_argument("--pg-url", default=None, help="servidor PostgreSQL existente (base vacía)")
+    parser.add_argument("--pg-bin", default=None, help="directorio con initdb y pg_ctl")
+    parser.add_argument("--pg-port", type=int, default=55432)
+    parser.add_argument("--skip-postgres", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["sqlite"] = run_backend(args, f"sqlite:///{os.path.join(tmp, 'matrix.db')}")
+    if args.pg_url:
+        results["postgresql"] = run_backend(args, args.pg_url)
+    elif not args.skip_postgres:
+        with postgres_cluster(args.pg_bin, args.pg_port) as url:
+            results["postgresql"] = run_backend(args, url)
+
+    failed = False
+    print(f"{args.teams} equipos x {args.players} jugadores, {args.teams * (args.teams - 1)} partidos")
+    for backend, r in results.items():
+        if "error" in r:
+            failed = True
+            print(f"  {backend:<11} ERROR {r['error']}")
+            continue
+        timings = "  ".join(f"{name}={ms:.0f} ms" for name, ms in r["timings"].items())
+        bad = [name for name, ok in r["checks"].items() if not ok]
+        failed |= bool(bad)
+        print(f"  {backend:<11} {timings}")
+        print(f"  {'':<11} comprobaciones: {len(r['checks']) - len(bad)}/{len(r['checks'])} correctas"
+              + (f" (fallan: {', '.join(bad)})" if bad else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Latencia y RPS de las rutas de lectura síncronas vs asíncronas con muchos clientes concurrentes.
+
+Uso: python bench/bench_async.py [--concurrency 200] [--requests 4000] [--teams 20] [--players 100]
+
+Cada modo (LIGA_ASYNC_DB=0/1) se ejecuta en un proceso aparte contra una base SQLite
+temporal con los mismos datos. Las peticiones se envían en proceso (httpx + ASGITransport),
+así que el coste medido es el de la app: en modo síncrono cada petición ocupa un hilo del
+threadpool de AnyIO mientras espera a SQLite. La caché de respuestas se desactiva para
+medir el acceso a la base de datos.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(n_teams: int, n_players: int) -> tuple[list[int], list[int]]:
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app import models
+
+    rnd = random.Random(42)
+    db = SessionLocal()
+    team_ids = list(db.scalars(
+        insert(models.Team).returning(models.Team.id),
+        [{"nombre": f"Equipo {i}"} for i in range(n_teams)],
+    ))
+    player_ids = list(db.scalars(
+        insert(models.Player).returning(models.Player.id),
+        [
+            {
+                "nombre": f"Jugador {i}",
+                "dorsal": rnd.randint(1, 99),
+                "posicion": rnd.choice(["portero", "defensa", "mediocampo", "delantero"]),
+                "goles": rnd.randint(0, 20),
+                "equipo_id": team_ids[i % n_teams],
+            }
+            for i in range(n_teams * n_players)
+        ],
+    ))
+    db.execute(insert(models.Stats), [{"player_id": pid, "tiros": rnd.randint(0, 50)} for pid in player_ids])
+    db.execute(insert(models.Game), [
+        {"local_id": a, "visitante_id": b, "jornada": j}
+        for j, (a, b) in enumerate((a, b) for a in team_ids for b in team_ids if a != b)
+    ])
+    db.commit()
+    db.close()
+    return team_ids, player_ids
+
+
+async def run_load(app, urls: list[str], concurrency: int) -> dict:
+    import httpx
+
+    timings: list[float] = []
+    errors = 0
+    pending = iter(urls)
+
+    async def client_loop(client):
+        nonlocal errors
+        for url in pending:
+            start = time.perf_counter()
+            r = await client.get(url)
+            timings.append(time.perf_counter() - start)
+            if r.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(urls[0])  # calentamiento
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    timings.sort()
+    pct = lambda p: round(timings[min(int(len(timings) * p), len(timings) - 1)] * 1000, 2)
+    return {"rps": round(len(timings) / elapsed, 1), "p50_ms": pct(0.50), "p99_ms": pct(0.99), "errors": errors}
+
+
+def run_child(args) -> dict:
+    sys.path.insert(0, ROOT)
+    from app.main import app
+
+    logging.getLogger("liga").setLevel(logging.WARNING)
+    team_ids, player_ids = seed(args.teams, args.players)
+    rnd = random.Random(7)
+    choices = [
+        lambda: "/teams",
+        lambda: f"/teams/{rnd.choice(team_ids)}",
+        lambda: f"/players?equipo_id={rnd.choice(team_ids)}&include=stats",
+        lambda: f"/playersDetail/{rnd.choice(player_ids)}",
+        lambda: f"/games?team_id={rnd.choice(team_ids)}",
+        lambda: "/standings",
+    ]
+    urls = [rnd.choice(choices)() for _ in range(args.requests)]
+    return asyncio.run(run_load(app, urls, args.concurrency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--players", type=int, default=100, help="jugadores por equipo")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = {}
+    for mode, flag in (("sync", "0"), ("async", "1")):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                LIGA_ASYNC_DB=flag,
+                LIGA_CACHE_ENABLED="0",
+                LIGA_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            )
+            env.pop("LIGA_ASYNC_DATABASE_URL", None)
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child",
+                 "--concurrency", str(args.concurrency), "--requests", str(args.requests),
+                 "--teams", str(args.teams), "--players", str(args.players)],
+                cwd=tmp, env=env, capture_output=True, text=True, check=True,
+            )
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{args.requests} GET mixtos, {args.concurrency} clientes concurrentes, {args.teams} equipos x {args.players} jugadores")
+    for mode, r in results.items():
+        print(f"  {mode:<6} {r['rps']:>8.1f} req/s  p50={r['p50_ms']:.2f} ms  p99={r['p99_ms']:.2f} ms  errores={r['errors']}")
+
+
+if __name__ == "__main__":
+    main()
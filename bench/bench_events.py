@@ -0,0 +1,97 @@
+"""Eventos de partido por segundo: ingesta NDJSON + agregación frente a un PATCH de estadísticas por evento.
+
+Uso: python bench/bench_events.py [--events 50000] [--batch 5000] [--per-event 2000] [--players 22]
+
+Se ejecuta en un proceso aparte contra una base SQLite temporal con dos equipos y un partido.
+"ingesta" envía los eventos a POST /events en cuerpos NDJSON de --batch líneas y mide el tiempo
+hasta que el agregador (cola de trabajos) los ha acumulado todos; "por evento" manda --per-event
+eventos como PATCH /players/{id}/stats, una petición y una escritura por evento.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(args) -> dict:
+    sys.path.insert(0, ROOT)
+    from fastapi.testclient import TestClient
+    from app import events, jobs
+    from app.main import app
+
+    logging.getLogger("liga").setLevel(logging.WARNING)
+    rnd = random.Random(42)
+    with TestClient(app) as client:
+        team_ids = [client.post("/teams", json={"nombre": f"Equipo {i}"}).json()["id"] for i in range(2)]
+        player_ids = []
+        for team_id in team_ids:
+            player_ids += client.post("/players:batch", json=[
+                {"nombre": f"Jugador {team_id}-{i}", "dorsal": i + 1, "posicion": "mediocampo", "equipo_id": team_id}
+                for i in range(args.players // 2)
+            ]).json()["created"]
+        game_id = client.post("/games", json={"local_id": team_ids[0], "visitante_id": team_ids[1], "jornada": 1}).json()["id"]
+        tipos = [t for t in events.EVENT_EFFECTS if t != "gol"]
+
+        lines = [
+            json.dumps({"game_id": game_id, "player_id": rnd.choice(player_ids), "tipo": rnd.choice(tipos)})
+            for _ in range(args.events)
+        ]
+        start = time.perf_counter()
+        for i in range(0, len(lines), args.batch):
+            r = client.post("/events", content="\n".join(lines[i:i + args.batch]),
+                            headers={"content-type": "application/x-ndjson"})
+            assert r.json()["accepted"] == len(lines[i:i + args.batch])
+        ingested = time.perf_counter() - start
+        jobs.queue.drain(timeout=120)
+        aggregated = time.perf_counter() - start
+        assert client.get("/admin/events").json()["pending"] == 0
+
+        start = time.perf_counter()
+        for _ in range(args.per_event):
+            client.patch(f"/players/{rnd.choice(player_ids)}/stats", json={"pases_intentados": 1})
+        per_event = time.perf_counter() - start
+        jobs.queue.drain(timeout=120)
+
+    return {
+        "ingest_events_per_s": round(args.events / ingested, 1),
+        "aggregated_events_per_s": round(args.events / aggregated, 1),
+        "per_event_per_s": round(args.per_event / per_event, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=5000, help="líneas NDJSON por petición")
+    parser.add_argument("--per-event", type=int, default=2000, help="eventos enviados como PATCH individuales")
+    parser.add_argument("--players", type=int, default=22)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, LIGA_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--events", str(args.events), "--batch", str(args.batch),
+             "--per-event", str(args.per_event), "--players", str(args.players)],
+            cwd=tmp, env=env, capture_output=True, text=True, check=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{args.events} eventos en lotes NDJSON de {args.batch}, {args.per_event} PATCH individuales, {args.players} jugadores")
+    print(f"  ingesta    {r['ingest_events_per_s']:>10.1f} eventos/s ({r['aggregated_events_per_s']:.1f} eventos/s hasta quedar acumulados)")
+    print(f"  por evento {r['per_event_per_s']:>10.1f} eventos/s")
+
+
+if __name__ == "__main__":
+    main()
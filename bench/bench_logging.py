@@ -0,0 +1,171 @@
+"""Coste del logging por petición: FileHandler síncronos y f-strings frente a la cola de app/logs.py, a nivel DEBUG e INFO.
+
+Uso: python bench/bench_logging.py [--requests 2000] [--players 2000] [--repeat 5]
+
+Primero se lanza una mezcla de peticiones (GET /players/{id}, GET /teams/{id}/players, PATCH
+/players/{id} y POST /players) contra una base SQLite temporal con TestClient y se capturan
+todas las llamadas al logger "liga" que hacen (mensaje, argumentos y nivel). Después se
+reproducen esas mismas llamadas con cada configuración y se mide el tiempo que pasan en el
+hilo que llama, que es lo que se suma a la latencia de cada petición:
+
+  antes DEBUG / INFO  handlers síncronos en el logger (consola + debug.log + warning.log) y el
+                      mensaje formateado siempre antes de llamar, como hacían las f-strings
+  cola DEBUG / INFO   logs.setup(): QueueHandler + QueueListener con ficheros rotados y
+                      formateo %-style solo si el nivel está activo
+
+"escritor" es lo que tarda después el hilo del QueueListener en vaciar la cola (fuera de la
+petición). Medirlo de extremo a extremo no sirve: el ruido de TestClient y SQLite (varios ms
+por petición) es mayor que el coste del logging. La consola se redirige a /dev/null.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.calls = []
+
+    def emit(self, record):
+        self.calls.append((record.levelno, record.msg, record.args))
+
+
+def seed(n_players: int) -> None:
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app import models
+
+    rnd = random.Random(42)
+    db = SessionLocal()
+    team_ids = list(db.scalars(insert(models.Team).returning(models.Team.id), [{"nombre": f"Equipo {i}"} for i in range(20)]))
+    db.execute(insert(models.Player), [
+        {"nombre": f"Jugador {i}", "dorsal": rnd.randint(1, 99), "posicion": rnd.choice(("portero", "defensa", "mediocampo", "delantero")),
+         "goles": rnd.randint(0, 20), "equipo_id": team_ids[i % len(team_ids)]}
+        for i in range(n_players)
+    ])
+    db.commit()
+    db.close()
+
+
+def legacy_setup(level: str, directory: str) -> None:
+    # Configuración original de main.py: handlers síncronos directamente en el logger
+    from app import logs
+
+    logger = logging.getLogger("liga")
+    logger.setLevel(level)
+    formatter = logging.Formatter(logs.FORMAT)
+    handlers = [
+        logging.StreamHandler(),
+        logging.FileHandler(os.path.join(directory, "debug.log"), encoding="utf-8"),
+        logging.FileHandler(os.path.join(directory, "warning.log"), encoding="utf-8"),
+    ]
+    handlers[2].setLevel(logging.WARNING)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+
+def legacy_teardown() -> None:
+    logger = logging.getLogger("liga")
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_logging_")
+    os.environ["LIGA_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+    os.environ["LIGA_CACHE_ENABLED"] = "0"
+    os.environ["LIGA_LOG_DIR"] = tmp
+    stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w")
+
+    from fastapi.testclient import TestClient
+    from app import logs
+    from app.main import app
+
+    logger = logging.getLogger("liga")
+    seed(args.players)
+    rnd = random.Random(7)
+    workload = []
+    for i in range(args.requests):
+        pid = rnd.randint(1, args.players)
+        kind = i % 10
+        if kind < 6:
+            workload.append(("GET", f"/players/{pid}", None))
+        elif kind < 8:
+            workload.append(("GET", f"/teams/{rnd.randint(1, 20)}/players?limit=20", None))
+        elif kind < 9:
+            workload.append(("PATCH", f"/players/{pid}", {"goles": rnd.randint(0, 30)}))
+        else:
+            workload.append(("POST", "/players", {"nombre": f"Nuevo {i}", "dorsal": 9, "posicion": "delantero"}))
+
+    # Llamadas al logger que hace la mezcla de peticiones
+    logs.stop()
+    logger.setLevel(logging.DEBUG)
+    capture = Capture()
+    logger.addHandler(capture)
+    with TestClient(app) as client:
+        for method, url, body in workload:
+            client.request(method, url, json=body)
+    logger.removeHandler(capture)
+    calls = capture.calls
+
+    def replay_fstring():
+        for level, msg, args_ in calls:
+            logger.log(level, msg % args_ if args_ else msg)
+
+    def replay_lazy():
+        for level, msg, args_ in calls:
+            logger.log(level, msg, *args_)
+
+    def queue_setup(level: str) -> None:
+        # El escritor se detiene mientras se mide el hilo que llama (con un solo núcleo le robaría
+        # tiempo) y se vuelve a arrancar para medir lo que tarda en vaciar la cola
+        logs.setup(level, tmp)
+        logs._listener.stop()
+
+    def queue_teardown() -> None:
+        logs._listener.start()
+        logs.stop()
+
+    modes = [
+        ("antes DEBUG", lambda: legacy_setup("DEBUG", tmp), replay_fstring, legacy_teardown),
+        ("antes INFO", lambda: legacy_setup("INFO", tmp), replay_fstring, legacy_teardown),
+        ("cola DEBUG", lambda: queue_setup("DEBUG"), replay_lazy, queue_teardown),
+        ("cola INFO", lambda: queue_setup("INFO"), replay_lazy, queue_teardown),
+    ]
+    results: dict[str, list] = {name: [] for name, *_ in modes}
+    for _ in range(args.repeat):
+        for name, setup, replay, teardown in modes:
+            setup()
+            start = time.perf_counter()
+            replay()
+            caller = time.perf_counter() - start
+            teardown()
+            results[name].append((caller, time.perf_counter() - start - caller))
+    sys.stderr = stderr
+
+    print(f"{args.requests} peticiones, {len(calls)} llamadas al logger ({len(calls) / args.requests:.1f} por petición), mejor de {args.repeat}")
+    print(f"  {'':<12} {'petición µs':>12} {'escritor µs':>12}")
+    for name, runs in results.items():
+        caller, writer = min(runs)
+        print(f"  {name:<12} {caller / args.requests * 1e6:>12.1f} {writer / args.requests * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
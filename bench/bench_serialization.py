@@ -0,0 +1,107 @@
+"""Coste de serializar un listado de jugadores: instancias del ORM + jsonable_encoder frente a filas + modelo de respuesta.
+
+Uso: python bench/bench_serialization.py [--players 10000] [--repeat 5] [--include stats,team]
+
+"antes" reproduce lo que hacían GET /players sin response_model: select(Player) con instancias
+del ORM, un dict por jugador y jsonable_encoder + json.dumps. "después" es el camino actual:
+filas (Row) de crud._players_stmt validadas y volcadas a JSON por schemas.PlayerPage en el
+núcleo de Pydantic, como hace FastAPI con response_model. Se mide por separado la carga
+desde la base (SQLite temporal) y la serialización; se toma el mejor de --repeat.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def best_of(repeat: int, fn) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--include", default="", help="relaciones expandidas (stats,team)")
+    args = parser.parse_args()
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic import TypeAdapter
+    from sqlalchemy import create_engine, insert, select
+    from sqlalchemy.orm import selectinload, sessionmaker
+
+    from app import crud, models, responses, schemas
+
+    include = responses.parse_include(args.include)
+    rnd = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        models.DecBase.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        team_ids = list(db.scalars(insert(models.Team).returning(models.Team.id), [{"nombre": f"Equipo {i}"} for i in range(20)]))
+        db.execute(insert(models.Player), [
+            {"nombre": f"Jugador {i}", "dorsal": rnd.randint(1, 99), "posicion": rnd.choice(("portero", "defensa", "mediocampo", "delantero")),
+             "goles": rnd.randint(0, 30), "tarjetas_a": 0, "tarjetas_r": 0, "valor": rnd.random() * 100,
+             "valor_mercado": rnd.random() * 50, "equipo_id": rnd.choice(team_ids)}
+            for i in range(args.players)
+        ])
+        db.execute(insert(models.Stats), [{"player_id": pid, "tiros": rnd.randint(0, 50)} for pid in range(1, args.players + 1)])
+        db.commit()
+
+        def load_orm():
+            db.expunge_all()
+            stmt = select(models.Player).order_by(models.Player.id.desc())
+            for name in include:
+                stmt = stmt.options(selectinload(getattr(models.Player, crud.PLAYER_INCLUDES[name])))
+            return db.scalars(stmt).all()
+
+        def encode_orm(players):
+            items = []
+            for p in players:
+                data = {key: getattr(p, key) for key in responses.columns(models.Player)}
+                if "stats" in include:
+                    data["estadisticas"] = p.estadisticas
+                if "team" in include:
+                    data["equipo"] = p.equipo
+                items.append(data)
+            return json.dumps(jsonable_encoder({"items": items, "next_cursor": None}),
+                              ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+        def load_rows():
+            return db.execute(crud._players_stmt(None, None, include).order_by(models.Player.id.desc())).all()
+
+        page_adapter = TypeAdapter(schemas.PlayerPage)
+
+        def encode_rows(rows):
+            page = page_adapter.validate_python({"items": [responses.player_row(r, include) for r in rows], "next_cursor": None})
+            return page_adapter.dump_json(page, exclude_unset=True)
+
+        orm_load, players = best_of(args.repeat, load_orm)
+        orm_encode, before = best_of(args.repeat, lambda: encode_orm(players))
+        row_load, rows = best_of(args.repeat, load_rows)
+        row_encode, after = best_of(args.repeat, lambda: encode_rows(rows))
+        db.close()
+        engine.dispose()
+
+    same = json.loads(before) == json.loads(after)
+    print(f"{args.players} jugadores, include={args.include or '-'}, mejor de {args.repeat} (mismo JSON: {'sí' if same else 'NO'})")
+    print(f"  {'':<8} {'carga':>10} {'serialización':>15} {'total':>10}")
+    for name, load, encode in (("antes", orm_load, orm_encode), ("después", row_load, row_encode)):
+        print(f"  {name:<8} {load:>7.1f} ms {encode:>12.1f} ms {load + encode:>7.1f} ms")
+    print(f"  serialización x{orm_encode / row_encode:.1f}, total x{(orm_load + orm_encode) / (row_load + row_encode):.1f}")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
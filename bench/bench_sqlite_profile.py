@@ -0,0 +1,181 @@
+"""Lecturas por segundo durante una ráfaga de escrituras con cada perfil SQLite.
+
+Uso: python bench/bench_sqlite_profile.py [--readers 8] [--writers 2] [--seconds 5] [--teams 20] [--players 500]
+
+Cada perfil (LIGA_SQLITE_PROFILE=default/production) se ejecuta en un proceso aparte contra
+una base temporal con los mismos datos. Primero solo leen los lectores (línea base) y después
+leen mientras los escritores encadenan upserts de estadísticas en bloque. Los lectores usan
+ReadSessionLocal (engine de solo lectura) y los escritores SessionLocal, igual que la API.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(n_teams: int, n_players: int) -> tuple[list[int], list[int]]:
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app import models
+
+    rnd = random.Random(42)
+    db = SessionLocal()
+    team_ids = list(db.scalars(
+        insert(models.Team).returning(models.Team.id),
+        [{"nombre": f"Equipo {i}"} for i in range(n_teams)],
+    ))
+    player_ids = list(db.scalars(
+        insert(models.Player).returning(models.Player.id),
+        [
+            {
+                "nombre": f"Jugador {i}",
+                "dorsal": rnd.randint(1, 99),
+                "posicion": rnd.choice(["portero", "defensa", "mediocampo", "delantero"]),
+                "goles": rnd.randint(0, 20),
+                "equipo_id": team_ids[i % n_teams],
+            }
+            for i in range(n_teams * n_players)
+        ],
+    ))
+    db.execute(insert(models.Stats), [{"player_id": pid, "tiros": rnd.randint(0, 50)} for pid in player_ids])
+    db.execute(insert(models.Game), [
+        {"local_id": a, "visitante_id": b, "jornada": j}
+        for j, (a, b) in enumerate((a, b) for a in team_ids for b in team_ids if a != b)
+    ])
+    db.commit()
+    db.close()
+    return team_ids, player_ids
+
+
+def run_phase(seconds: float, n_readers: int, n_writers: int, team_ids, player_ids) -> dict:
+    from app import crud
+    from app.database import ReadSessionLocal, SessionLocal
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_times: list[float] = []
+    counts = {"read_errors": 0, "writes": 0, "write_errors": 0}
+
+    def reader(seed_: int) -> None:
+        rnd = random.Random(seed_)
+        local: list[float] = []
+        errors = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            db = ReadSessionLocal()
+            try:
+                crud.get_player_with(db, rnd.choice(player_ids), include={"stats"})
+                crud.list_games(db, team_id=rnd.choice(team_ids))
+                local.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+            finally:
+                db.close()
+        with lock:
+            read_times.extend(local)
+            counts["read_errors"] += errors
+
+    def writer(seed_: int) -> None:
+        rnd = random.Random(1000 + seed_)
+        writes = errors = 0
+        while not stop.is_set():
+            items = [{"player_id": pid, "tiros": rnd.randint(0, 60)} for pid in rnd.sample(player_ids, 500)]
+            db = SessionLocal()
+            try:
+                crud.upsert_stats_bulk(db, items)
+                writes += 1
+            except Exception:
+                db.rollback()
+                errors += 1
+            finally:
+                db.close()
+        with lock:
+            counts["writes"] += writes
+            counts["write_errors"] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(n_readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(n_writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    read_times.sort()
+    p99 = read_times[min(int(len(read_times) * 0.99), len(read_times) - 1)] * 1000 if read_times else 0.0
+    return {
+        "reads_per_s": round(len(read_times) / elapsed, 1),
+        "read_p99_ms": round(p99, 2),
+        "read_errors": counts["read_errors"],
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "write_errors": counts["write_errors"],
+    }
+
+
+def run_child(args) -> dict:
+    sys.path.insert(0, ROOT)
+    from app.database import engine
+    from app.models import DecBase
+
+    logging.getLogger("liga").setLevel(logging.WARNING)
+    DecBase.metadata.create_all(bind=engine)
+    team_ids, player_ids = seed(args.teams, args.players)
+    return {
+        "baseline": run_phase(args.seconds, args.readers, 0, team_ids, player_ids),
+        "burst": run_phase(args.seconds, args.readers, args.writers, team_ids, player_ids),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duración de cada fase")
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--players", type=int, default=500, help="jugadores por equipo")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = {}
+    for profile in ("default", "production"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                LIGA_SQLITE_PROFILE=profile,
+                LIGA_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            )
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child",
+                 "--readers", str(args.readers), "--writers", str(args.writers), "--seconds", str(args.seconds),
+                 "--teams", str(args.teams), "--players", str(args.players)],
+                cwd=tmp, env=env, capture_output=True, text=True, check=True,
+            )
+            results[profile] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{args.readers} lectores, {args.writers} escritores (upsert de 500 estadísticas), {args.seconds:g}s por fase")
+    for profile, r in results.items():
+        base, burst = r["baseline"], r["burst"]
+        print(
+            f"  {profile:<10} base {base['reads_per_s']:>8.1f} lect/s p99={base['read_p99_ms']:.2f} ms | "
+            f"ráfaga {burst['reads_per_s']:>8.1f} lect/s p99={burst['read_p99_ms']:.2f} ms "
+            f"errores={burst['read_errors']} | {burst['writes_per_s']:.1f} escr/s errores={burst['write_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
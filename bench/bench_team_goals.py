@@ -0,0 +1,107 @@
+"""Coste de GET /teams con Team.goles como subconsulta vs columna mantenida.
+
+Uso: python bench/bench_team_goals.py [--teams 20] [--players 1000] [--repeat 200]
+
+Cada modo se ejecuta en un proceso aparte (el modo se fija al importar los
+modelos) contra una base SQLite temporal con los mismos datos.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(n_teams: int, n_players: int, repeat: int) -> dict:
+    sys.path.insert(0, ROOT)
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from app.main import app
+    from app.database import SessionLocal
+    from app import models
+
+    logging.getLogger("liga").setLevel(logging.WARNING)
+    rnd = random.Random(42)
+
+    db = SessionLocal()
+    team_ids = list(db.scalars(
+        insert(models.Team).returning(models.Team.id),
+        [{"nombre": f"Equipo {i}"} for i in range(n_teams)],
+    ))
+    players = [
+        {
+            "nombre": f"Jugador {i}",
+            "dorsal": rnd.randint(1, 99),
+            "posicion": rnd.choice(["portero", "defensa", "mediocampo", "delantero"]),
+            "goles": rnd.randint(0, 20),
+            "equipo_id": team_ids[i % n_teams],
+        }
+        for i in range(n_teams * n_players)
+    ]
+    db.execute(insert(models.Player), players)
+    db.commit()
+    db.close()
+
+    from app import task
+    if os.environ.get("LIGA_TEAM_GOALS_MODE") == "stored":
+        task.reconcile_team_goals()
+
+    client = TestClient(app)
+    client.get("/teams", params={"limit": n_teams})  # calentamiento
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        r = client.get("/teams", params={"limit": n_teams})
+        timings.append(time.perf_counter() - start)
+        assert r.status_code == 200
+    timings.sort()
+    total_goals = sum(t["goles"] for t in r.json()["items"])
+    return {
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1] * 1000, 3),
+        "total_goles": total_goals,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--players", type=int, default=1000, help="jugadores por equipo")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.teams, args.players, args.repeat)))
+        return
+
+    results = {}
+    for mode in ("subquery", "stored"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                LIGA_TEAM_GOALS_MODE=mode,
+                LIGA_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            )
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child",
+                 "--teams", str(args.teams), "--players", str(args.players), "--repeat", str(args.repeat)],
+                cwd=tmp, env=env, capture_output=True, text=True, check=True,
+            )
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"GET /teams con {args.teams} equipos x {args.players} jugadores ({args.repeat} peticiones)")
+    for mode, r in results.items():
+        print(f"  {mode:<9} p50={r['p50_ms']:.3f} ms  p95={r['p95_ms']:.3f} ms  goles={r['total_goles']}")
+    if results["subquery"]["total_goles"] != results["stored"]["total_goles"]:
+        sys.exit("Los totales de goles no coinciden entre modos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,444 @@
+"""Carga reproducible contra la API: liga sembrada del tamaño pedido y mezclas de lecturas y escrituras con muchos clientes.
+
+Uso: python bench/harness.py [--teams 20] [--players 30] [--jornadas 38] [--seasons 1]
+                             [--workload read|mixed|write|live] [--requests 5000] [--concurrency 50]
+                             [--serve | --url http://127.0.0.1:8000] [--save base.json] [--compare base.json]
+
+Objetivos:
+  (por defecto)  la app en proceso con httpx + ASGITransport, sobre una base SQLite temporal
+  --serve        la misma base temporal servida por uvicorn en un subproceso (--workers) y
+                 peticiones HTTP reales (requiere uvicorn)
+  --url URL      un servidor ya en marcha; no se siembra nada, los ids se leen de la propia API
+                 (para sembrar su base: --seed-only con LIGA_DATABASE_URL apuntando a ella)
+
+La siembra inserta en bloque equipos, jugadores con estadísticas y, por temporada, una liga a
+doble vuelta (app.fixtures.round_robin) de --jornadas jornadas (las temporadas quedan abiertas,
+cada una con sus jornadas desde 1, y la última es la temporada en curso): las temporadas
+anteriores jugadas y la última a medias. Después se recalculan registros,
+clasificación y valores una sola vez (app.importer). Las peticiones se generan de antemano con
+una semilla fija y se reparten entre --concurrency clientes.
+
+Se informa, por endpoint (plantilla de la ruta) y en total, de peticiones/s, percentiles p50,
+p90 y p99, máximo y errores. --save guarda el resultado en JSON; --compare lo compara con una
+línea base guardada y sale con código 1 si el rendimiento total baja o algún p50/p99 sube más
+de --tolerance (y al menos --min-delta-ms), o si aparecen errores que antes no había. Cada
+métrica es la mediana de --repeat repeticiones, y los percentiles solo se comparan en endpoints
+con muestras suficientes (50 peticiones para p50, 500 para p99).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+POSICIONES = ("portero", "defensa", "mediocampo", "delantero")
+EVENT_TYPES = ("tiro", "tiro_a_puerta", "pase", "pase_completado", "regate", "entrada", "gol", "asistencia")
+
+
+#Siembra
+
+def seed(n_teams: int, n_players: int, jornadas: int, seasons: int, rnd: random.Random) -> dict:
+    from sqlalchemy import insert
+    from app import fixtures, importer, models
+    from app import seasons as liga_seasons
+    from app.database import SessionLocal
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    team_ids = list(db.scalars(
+        insert(models.Team).returning(models.Team.id), [{"nombre": f"Equipo {i + 1}"} for i in range(n_teams)]
+    ))
+    players = [
+        {"nombre": f"Jugador {t}-{i + 1}", "dorsal": i % 99 + 1, "posicion": POSICIONES[i % 4],
+         "goles": rnd.randint(0, 15), "tarjetas_a": rnd.randint(0, 8), "tarjetas_r": rnd.randint(0, 1), "equipo_id": t}
+        for t in team_ids for i in range(n_players)
+    ]
+    player_ids = list(db.scalars(insert(models.Player).returning(models.Player.id), players))
+    db.execute(insert(models.Stats), [
+        {"player_id": pid, "tiros": rnd.randint(0, 60), "tiros_a_puerta": rnd.randint(0, 30), "asistencias": rnd.randint(0, 12),
+         "regates_intentados": rnd.randint(0, 80), "regates_exitosos": rnd.randint(0, 40), "pases_intentados": rnd.randint(100, 1500),
+         "pases_completados": rnd.randint(50, 1200), "entradas_intentadas": rnd.randint(0, 90), "entradas_exitosas": rnd.randint(0, 60),
+         "paradas": rnd.randint(0, 80)}
+        for pid in player_ids
+    ])
+    schedule = fixtures.round_robin(team_ids)
+    games = []
+    # La última temporada sembrada es la que está en curso
+    first_year = liga_seasons.current() - seasons + 1
+    for season in range(seasons):
+        kickoff = fixtures.default_kickoff(first_year)
+        played = jornadas if season < seasons - 1 else jornadas // 2
+        for j in range(jornadas):
+            for local, visitante in schedule[j % len(schedule)]:
+                game = {"local_id": local, "visitante_id": visitante, "jornada": j + 1,
+                        "fecha": kickoff + timedelta(days=7 * j), "temporada_id": first_year, "estado": "pendiente",
+                        "goles_local": 0, "goles_visitante": 0}
+                if j < played:
+                    game.update(estado="jugado", goles_local=rnd.randint(0, 4), goles_visitante=rnd.randint(0, 3))
+                games.append(game)
+        first_year += 1
+    liga_seasons.ensure(db, {g["temporada_id"] for g in games})
+    for i in range(0, len(games), 5000):
+        db.execute(insert(models.Game), games[i:i + 5000])
+    db.commit()
+    # Los registros de equipos se rellenan aquí: el aviso de "inconsistentes" es el esperado
+    logger = logging.getLogger("liga")
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    importer.Importer(db, 5000).recompute()
+    logger.setLevel(level)
+    db.close()
+    return {"teams": len(team_ids), "players": len(player_ids), "games": len(games), "seconds": round(time.perf_counter() - start, 2)}
+
+
+#Mezclas de peticiones
+
+async def discover(client, sample: int) -> dict:
+    # Ids reales leídos de la API (hasta sample por recurso), así vale también contra --url
+    async def pages(path: str) -> list[dict]:
+        items, cursor = [], None
+        while len(items) < sample:
+            r = await client.get(path, params={"limit": 500, **({"cursor": cursor} if cursor else {})})
+            r.raise_for_status()
+            body = r.json()
+            items += body["items"]
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        return items
+
+    teams = [t["id"] for t in await pages("/teams")]
+    players = await pages("/players")
+    games = await pages("/games")
+    by_team: dict[int, list[int]] = {}
+    for p in players:
+        if p["equipo_id"] is not None:
+            by_team.setdefault(p["equipo_id"], []).append(p["id"])
+    return {
+        "teams": teams,
+        "players": [p["id"] for p in players],
+        "by_team": by_team,
+        "games": [(g["id"], g["local_id"], g["visitante_id"]) for g in games if g["local_id"] in by_team],
+        "jornadas": sorted({g["jornada"] for g in games if g["jornada"] is not None}),
+    }
+
+
+def _event_body(rnd, ctx) -> bytes:
+    game_id, local, visitante = rnd.choice(ctx["games"])
+    lines = []
+    for _ in range(rnd.randint(5, 20)):
+        player_id = rnd.choice(ctx["by_team"].get(rnd.choice((local, visitante))) or ctx["by_team"][local])
+        lines.append(json.dumps({"game_id": game_id, "player_id": player_id, "tipo": rnd.choice(EVENT_TYPES), "minuto": rnd.randint(1, 90)}))
+    return ("\n".join(lines) + "\n").encode()
+
+
+# (etiqueta, peso, generador) -> (método, url, kwargs de httpx)
+READS = [
+    ("GET /teams", 8, lambda rnd, ctx: ("GET", "/teams", {})),
+    ("GET /teams/{id}", 10, lambda rnd, ctx: ("GET", f"/teams/{rnd.choice(ctx['teams'])}", {})),
+    ("GET /teams/{id}/players", 8, lambda rnd, ctx: ("GET", f"/teams/{rnd.choice(ctx['teams'])}/players", {})),
+    ("GET /players?equipo_id", 8, lambda rnd, ctx: ("GET", f"/players?equipo_id={rnd.choice(ctx['teams'])}&include=stats", {})),
+    ("GET /players/{id}", 15, lambda rnd, ctx: ("GET", f"/players/{rnd.choice(ctx['players'])}", {})),
+    ("GET /playersDetail/{id}", 10, lambda rnd, ctx: ("GET", f"/playersDetail/{rnd.choice(ctx['players'])}", {})),
+    ("GET /games?team_id", 10, lambda rnd, ctx: ("GET", f"/games?team_id={rnd.choice(ctx['teams'])}", {})),
+    ("GET /standings", 8, lambda rnd, ctx: ("GET", "/standings", {})),
+    ("GET /standings?jornada", 4, lambda rnd, ctx: ("GET", f"/standings?jornada={rnd.choice(ctx['jornadas'])}", {})),
+]
+WRITES = [
+    ("PATCH /players/{id}/stats", 10, lambda rnd, ctx: (
+        "PATCH", f"/players/{rnd.choice(ctx['players'])}/stats", {"json": {"tiros": rnd.randint(1, 3), "pases_intentados": rnd.randint(1, 10)}})),
+    ("PUT /players/{id}/stats", 3, lambda rnd, ctx: (
+        "PUT", f"/players/{rnd.choice(ctx['players'])}/stats", {"json": {"tiros": rnd.randint(0, 60), "paradas": rnd.randint(0, 40)}})),
+    ("PATCH /games/{id}/result", 5, lambda rnd, ctx: (
+        "PATCH", f"/games/{rnd.choice(ctx['games'])[0]}/result", {"json": {"goles_local": rnd.randint(0, 4), "goles_visitante": rnd.randint(0, 4)}})),
+    ("PATCH /players/{id}", 3, lambda rnd, ctx: (
+        "PATCH", f"/players/{rnd.choice(ctx['players'])}", {"json": {"goles": rnd.randint(0, 30)}})),
+    ("POST /players", 2, lambda rnd, ctx: (
+        "POST", "/players", {"json": {"nombre": f"Fichaje {rnd.randint(1, 10**9)}", "dorsal": rnd.randint(1, 99),
+                                      "posicion": rnd.choice(POSICIONES), "equipo_id": rnd.choice(ctx["teams"])}})),
+    ("POST /events", 5, lambda rnd, ctx: (
+        "POST", "/events", {"content": _event_body(rnd, ctx), "headers": {"Content-Type": "application/x-ndjson"}})),
+]
+WORKLOADS = {
+    "read": [(op, 1.0) for op in READS],
+    "mixed": [(op, 0.8) for op in READS] + [(op, 0.2) for op in WRITES],
+    "write": [(op, 1.0) for op in WRITES],
+    # Jornada en directo: eventos y resultados mientras los clientes leen partidos y clasificación
+    "live": [(op, 0.5) for op in READS if op[0].startswith(("GET /games", "GET /standings"))]
+            + [(op, 0.5) for op in WRITES if op[0] in ("POST /events", "PATCH /games/{id}/result", "PATCH /players/{id}/stats")],
+}
+
+
+def build_requests(workload: str, n: int, ctx: dict, rnd: random.Random) -> list[tuple]:
+    ops = WORKLOADS[workload]
+    # El peso de cada operación dentro de su grupo se escala por la fracción del grupo
+    group_totals: dict[float, int] = {}
+    for (_, weight, _), share in ops:
+        group_totals[share] = group_totals.get(share, 0) + weight
+    weights = [weight / group_totals[share] * share for (_, weight, _), share in ops]
+    chosen = rnd.choices([op for op, _ in ops], weights=weights, k=n)
+    return [(label, *make(rnd, ctx)) for label, _, make in chosen]
+
+
+#Ejecucion
+
+async def run_load(client, requests: list[tuple], concurrency: int) -> dict:
+    timings: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    pending = iter(requests)
+
+    async def client_loop():
+        for label, method, url, kwargs in pending:
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, url, **kwargs)
+                failed = r.status_code >= 400
+            except Exception:
+                failed = True
+            timings.setdefault(label, []).append(time.perf_counter() - start)
+            if failed:
+                errors[label] = errors.get(label, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(timings, errors, elapsed)
+
+
+def _percentiles(values: list[float], n_seconds: float) -> dict:
+    values = sorted(values)
+    pct = lambda p: round(values[min(int(len(values) * p), len(values) - 1)] * 1000, 2)
+    return {"requests": len(values), "rps": round(len(values) / n_seconds, 1),
+            "p50_ms": pct(0.50), "p90_ms": pct(0.90), "p99_ms": pct(0.99), "max_ms": round(values[-1] * 1000, 2)}
+
+
+def summarize(timings: dict, errors: dict, elapsed: float) -> dict:
+    endpoints = {
+        label: {**_percentiles(values, elapsed), "errors": errors.get(label, 0)}
+        for label, values in sorted(timings.items())
+    }
+    all_values = [v for values in timings.values() for v in values]
+    total = {**_percentiles(all_values, elapsed), "errors": sum(errors.values()), "seconds": round(elapsed, 2)}
+    return {"total": total, "endpoints": endpoints}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(url: str, process, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"uvicorn terminó con código {process.returncode}")
+            try:
+                if (await client.get("/teams?limit=1")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn no respondió a tiempo")
+
+
+async def run(args, ctx_seed: dict | None) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    process = None
+    if args.url or args.serve:
+        if args.serve:
+            port = _free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(args.workers),
+                 "--log-level", "warning", "--no-access-log", "--app-dir", ROOT],
+                env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            await _wait_ready(base_url, process)
+        else:
+            base_url = args.url.rstrip("/")
+        client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://harness", timeout=60)
+    try:
+        async with client:
+            ctx = await discover(client, args.sample)
+            if not ctx["teams"] or not ctx["games"]:
+                raise SystemExit("La base no tiene equipos con jugadores y partidos: siembra primero")
+            rnd = random.Random(args.random_seed)
+            requests = build_requests(args.workload, args.requests, ctx, rnd)
+            warmup = build_requests(args.workload, min(args.warmup, args.requests), ctx, random.Random(args.random_seed + 1))
+            await run_load(client, warmup, args.concurrency)
+            runs = [await run_load(client, requests, args.concurrency) for _ in range(args.repeat)]
+            result = median_result(runs)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(10)
+        elif not (args.url or args.serve):
+            from app import jobs
+
+            jobs.queue.stop(drain=True)
+    target = args.url or ("uvicorn" if args.serve else "asgi")
+    return {
+        "config": {
+            "target": target, "workload": args.workload, "requests": args.requests, "concurrency": args.concurrency,
+            "teams": args.teams, "players": args.players, "jornadas": args.jornadas, "seasons": args.seasons,
+            "workers": args.workers if args.serve else None,
+        },
+        "seed": ctx_seed,
+        "python": sys.version.split()[0],
+        "date": datetime.now().isoformat(timespec="seconds"),
+        **result,
+    }
+
+
+#Informe y comparacion
+
+def median_result(runs: list[dict]) -> dict:
+    # Mediana de cada métrica entre repeticiones (los errores se suman)
+    def median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    def merge(items: list[dict]) -> dict:
+        return {key: (sum(i[key] for i in items) if key == "errors" else median([i[key] for i in items])) for key in items[0]}
+
+    labels = {label for run in runs for label in run["endpoints"]}
+    return {
+        "total": merge([run["total"] for run in runs]),
+        "endpoints": {
+            label: merge([run["endpoints"][label] for run in runs if label in run["endpoints"]]) for label in sorted(labels)
+        },
+        "repeat": len(runs),
+    }
+
+
+def print_report(result: dict) -> None:
+    cfg, total = result["config"], result["total"]
+    print(f"{cfg['workload']} contra {cfg['target']}: {total['requests']} peticiones, {cfg['concurrency']} clientes, "
+          f"{cfg['teams']} equipos x {cfg['players']} jugadores, {cfg['jornadas']} jornadas x {cfg['seasons']} temporadas")
+    print(f"  {'endpoint':<28} {'n':>6} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'err':>5}")
+    rows = list(result["endpoints"].items()) + [("total", total)]
+    for label, r in rows:
+        print(f"  {label:<28} {r['requests']:>6} {r['rps']:>8.1f} {r['p50_ms']:>8.2f} {r['p90_ms']:>8.2f} "
+              f"{r['p99_ms']:>8.2f} {r['max_ms']:>8.2f} {r['errors']:>5}")
+    print(f"  (ms; mediana de {result['repeat']} repeticiones de {total['seconds']}s)")
+
+
+# Muestras mínimas por endpoint para comparar cada percentil (un p99 de 50 peticiones es una sola)
+MIN_SAMPLES = {"p50_ms": 50, "p99_ms": 500}
+
+
+def compare(result: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> list[str]:
+    # Regresiones respecto a la línea base; las diferencias por debajo de min_delta_ms se ignoran
+    problems = []
+    for key in ("target", "workload", "concurrency", "teams", "players", "jornadas", "seasons"):
+        if result["config"].get(key) != baseline["config"].get(key):
+            problems.append(f"configuración distinta: {key}={result['config'].get(key)} (base {baseline['config'].get(key)})")
+    base_total, total = baseline["total"], result["total"]
+    if total["rps"] < base_total["rps"] * (1 - tolerance):
+        problems.append(f"total: {total['rps']} req/s (base {base_total['rps']}, -{1 - total['rps'] / base_total['rps']:.0%})")
+    for label, base in baseline["endpoints"].items():
+        current = result["endpoints"].get(label)
+        if current is None:
+            continue
+        for metric, min_samples in MIN_SAMPLES.items():
+            if min(current["requests"], base["requests"]) < min_samples:
+                continue
+            if current[metric] > base[metric] * (1 + tolerance) and current[metric] - base[metric] >= min_delta_ms:
+                problems.append(f"{label}: {metric} {current[metric]} (base {base[metric]}, +{current[metric] / base[metric] - 1:.0%})")
+        if current["errors"] > base["errors"]:
+            problems.append(f"{label}: {current['errors']} errores (base {base['errors']})")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", type=int, default=20)
+    parser.add_argument("--players", type=int, default=30, help="jugadores por equipo")
+    parser.add_argument("--jornadas", type=int, default=38, help="jornadas por temporada")
+    parser.add_argument("--seasons", type=int, default=1)
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones de la carga; se informa la mediana")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sample", type=int, default=5000, help="ids leídos de la API por recurso")
+    parser.add_argument("--random-seed", type=int, default=42)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="servidor ya en marcha (no se siembra)")
+    target.add_argument("--serve", action="store_true", help="uvicorn en un subproceso sobre la base temporal")
+    target.add_argument("--seed-only", action="store_true", help="solo siembra la base de LIGA_DATABASE_URL")
+    parser.add_argument("--workers", type=int, default=1, help="procesos de uvicorn con --serve")
+    parser.add_argument("--no-cache", action="store_true", help="desactiva la caché de respuestas (LIGA_CACHE_ENABLED=0)")
+    parser.add_argument("--save", help="guarda el resultado en este JSON")
+    parser.add_argument("--compare", help="línea base JSON con la que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento relativo admitido")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="diferencia absoluta mínima para contar como regresión")
+    args = parser.parse_args()
+
+    os.environ.setdefault("LIGA_LOG_LEVEL", "WARNING")
+    if args.no_cache:
+        os.environ["LIGA_CACHE_ENABLED"] = "0"
+    seeded = None
+    tmp = None
+    if not args.url:
+        if not args.seed_only:
+            # Base y logs en un directorio temporal (también para el uvicorn de --serve)
+            tmp = tempfile.TemporaryDirectory(prefix="liga_harness_")
+            os.environ["LIGA_DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'harness.db')}"
+            os.environ.pop("LIGA_ASYNC_DATABASE_URL", None)
+            os.environ["LIGA_LOG_DIR"] = tmp.name
+        from app import models
+        from app.database import engine
+
+        logging.getLogger("liga").setLevel(logging.WARNING)
+        models.DecBase.metadata.create_all(bind=engine)
+        seeded = seed(args.teams, args.players, args.jornadas, args.seasons, random.Random(args.random_seed))
+        print(f"Sembrados {seeded['teams']} equipos, {seeded['players']} jugadores y {seeded['games']} partidos en {seeded['seconds']}s")
+        if args.seed_only:
+            return
+        if args.serve:
+            engine.dispose()
+    try:
+        result = asyncio.run(run(args, seeded))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    print_report(result)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Guardado en {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            problems = compare(result, json.load(f), args.tolerance, args.min_delta_ms)
+        if problems:
+            print(f"Regresiones respecto a {args.compare}:")
+            for problem in problems:
+                print(f"  {problem}")
+            sys.exit(1)
+        print(f"Sin regresiones respecto a {args.compare} (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import requests
 import random
-from itertools import combinations
+from datetime import date
 
 BASE_URL = "http://127.0.0.1:8000"
 
@@ -89,7 +89,7 @@ def gen_stats_for_position(pos: str) -> dict:
         "paradas": paradas,
     }
 
-def create_players():
+def create_players(team_ids=None):
     print("\n=== Creando jugadores ===")
     nombres_base = [
         "Juan", "Pedro", "Luis", "Carlos", "Miguel", "Sergio", "Diego", "Álvaro",
@@ -98,6 +98,7 @@ def create_players():
     ]
     apellidos = ["García", "López", "Martínez", "Sánchez", "Pérez", "Gómez", "Díaz", "Navarro", "Romero", "Torres"]
 
+    #Asignamos los jugadores a equipos aleatoriamente al crearlos
     players_payload = []
     for i in range(N_PLAYERS):
         nombre = f"{random.choice(nombres_base)} {random.choice(apellidos)}"
@@ -113,77 +114,67 @@ def create_players():
             "goles": goles,
             "tarjetas_a": tarjetas_a,
             "tarjetas_r": tarjetas_r,
+            "equipo_id": random.choice(team_ids) if team_ids else None,
         })
 
-    player_ids = []
-    for i, data in enumerate(players_payload, start=1):
-        r = requests.post(f"{BASE_URL}/players", json=data, timeout=10)
-        if r.status_code not in (200, 201):
-            print(f"[{i}] Error creando jugador: {r.status_code} - {r.text}")
-            continue
-
-        pj = r.json()
-        player_ids.append(pj["id"])
-        print(f"[{i}] {pj['nombre']} (id={pj['id']}, pos={pj['posicion']}, dorsal={pj['dorsal']})")
-
-        stats_payload = gen_stats_for_position(pj["posicion"])
-        rs = requests.put(f"{BASE_URL}/players/{pj['id']}/stats", json=stats_payload, timeout=10)
-        if rs.status_code not in (200, 201):
-            print(f"Error subiendo estadísticas: {rs.status_code} - {rs.text}")
-        else:
-            print(f"Estadísticas OK: {stats_payload}")
+    r = requests.post(f"{BASE_URL}/players:batch", json=players_payload, timeout=30)
+    if r.status_code not in (200, 201):
+        print(f"Error creando jugadores: {r.status_code} - {r.text}")
+        return []
+    body = r.json()
+    for err in body["errors"]:
+        print(f"[{err['index'] + 1}] Error creando jugador: {err['detail']}")
+
+    #Los ids creados vienen en el mismo orden que los elementos validos del payload
+    failed = {err["index"] for err in body["errors"]}
+    created = [data for i, data in enumerate(players_payload) if i not in failed]
+    player_ids = body["created"]
+    for pid, data in zip(player_ids, created):
+        print(f"{data['nombre']} (id={pid}, pos={data['posicion']}, dorsal={data['dorsal']}, equipo={data['equipo_id']})")
+
+    stats_payload = [
+        {"player_id": pid, **gen_stats_for_position(data["posicion"])}
+        for pid, data in zip(player_ids, created)
+    ]
+    rs = requests.put(f"{BASE_URL}/stats:batch", json=stats_payload, timeout=30)
+    if rs.status_code not in (200, 201):
+        print(f"Error subiendo estadísticas: {rs.status_code} - {rs.text}")
+    else:
+        print(f"Estadísticas OK para {len(rs.json()['updated'])} jugadores")
 
     return player_ids
 
-#Asignamos jugadores a equipos, también aleatoriamente
-def assign_players_to_teams(player_ids, team_ids):
-    print("\n=== Asignando jugadores a equipos (aleatorio) ===")
-    if not team_ids:
-        print("No hay equipos para asignar.")
-        return
-    for i, pid in enumerate(player_ids, start=1):
-        team_id = random.choice(team_ids)
-        r = requests.patch(f"{BASE_URL}/players/{pid}/team/{team_id}")
-        if r.status_code == 200:
-            print(f"[{i}] Player {pid} -> Team {team_id}")
-        else:
-            print(f"[{i}] Error asignando jugador {pid} al equipo {team_id}: {r.status_code} - {r}")
-            
 def generate_random_games(team_ids, num_games=12, assign_results=True):
-    print("\n=== Generando partidos aleatorios ===")
+    print("\n=== Generando calendario (POST /seasons/{temporada}/fixtures) ===")
     if not team_ids or len(team_ids) < 2:
         print("No hay suficientes equipos para generar partidos.")
         return []
 
-    all_pairs = list(combinations(team_ids, 2))
-    random.shuffle(all_pairs)
-
-    num_games = min(num_games, len(all_pairs))
-
-    created_game_ids = []
-    for i, (local_id, visitante_id) in enumerate(all_pairs[:num_games], start=1):
-        payload = {"local_id": local_id, "visitante_id": visitante_id}
-        r = requests.post(f"{BASE_URL}/games", json=payload, timeout=10)
-        if r.status_code not in (200, 201):
-            print(f"[{i}] Error creando partido {local_id}-{visitante_id}: {r.status_code} - {r.text}")
-            continue
-
-        game = r.json()
-        created_game_ids.append(game["id"])
-        print(f"[{i}] Partido creado id={game['id']} L:{game['local_id']} vs V:{game['visitante_id']}")
-
-        if assign_results:
-            gl = random.randint(0, 5)
-            gv = random.randint(0, 5)
-            rs = requests.patch(
-                f"{BASE_URL}/games/{game['id']}/result",
-                json={"goles_local": gl, "goles_visitante": gv},
-                timeout=10
-            )
-            if rs.status_code in (200, 201):
-                print(f" Resultado {gl}-{gv} aplicado")
-            else:
-                print(f" Error asignando resultado: {rs.status_code} - {rs.text}")
+    # Doble vuelta generada en el servidor; la primera temporada libre a partir de este año
+    year = date.today().year
+    for season in range(year, year + 10):
+        r = requests.post(f"{BASE_URL}/seasons/{season}/fixtures", json={"team_ids": team_ids}, timeout=30)
+        if r.status_code != 400 or "ya tiene partidos" not in r.text:
+            break
+    if r.status_code not in (200, 201):
+        print(f"Error generando calendario: {r.status_code} - {r.text}")
+        return []
+
+    body = r.json()
+    print(f"Temporada {body['temporada']}: {body['partidos']} partidos en {body['jornadas']} jornadas")
+    # Resultados solo para los primeros num_games partidos (las primeras jornadas)
+    created_game_ids = [game["id"] for game in body["items"][:num_games]]
+
+    if assign_results and created_game_ids:
+        results = [
+            {"game_id": gid, "goles_local": random.randint(0, 5), "goles_visitante": random.randint(0, 5)}
+            for gid in created_game_ids
+        ]
+        rs = requests.patch(f"{BASE_URL}/games/results:batch", json=results, timeout=30)
+        if rs.status_code in (200, 201):
+            print(f" {len(rs.json()['updated'])} resultados aplicados")
+        else:
+            print(f" Error asignando resultados: {rs.status_code} - {rs.text}")
 
     return created_game_ids
 
@@ -338,9 +329,9 @@ def menu_crear_jugador():
     tarjetas_r = _input_int("Tarjetas rojas (int, vacío=0): ") or 0
 
     print("\n¿A qué equipo pertenece este jugador?")
-    r_teams = requests.get(f"{BASE_URL}/teams", timeout=10)
+    r_teams = requests.get(f"{BASE_URL}/teams", params={"limit": 500}, timeout=10)
     if r_teams.status_code == 200:
-        teams = r_teams.json()
+        teams = r_teams.json()["items"]
         for t in teams:
             print(f"  {t['id']}: {t['nombre']} ({t.get('partidos', 0)} partidos, {t.get('victorias', 0)} victorias)")
     else:
@@ -609,8 +600,7 @@ def menu_listar_partidos():
 
 def main():
     team_ids = create_teams()
-    player_ids = create_players()
-    assign_players_to_teams(player_ids, team_ids)
+    create_players(team_ids)
     generate_random_games(team_ids, num_games=12, assign_results=True)
 
     while True:
@@ -0,0 +1,62 @@
+# tests/conftest.py
+# Las pruebas usan una base SQLite temporal para toda la sesión. Las variables de entorno se fijan
+# antes de importar app, porque config y database leen la URL (y crean los engines) al importarse.
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="liga-tests-")
+os.environ["LIGA_DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'liga.db')}"
+os.environ.pop("LIGA_ASYNC_DATABASE_URL", None)
+os.environ["LIGA_LOG_DIR"] = _TMP
+os.environ["LIGA_ARCHIVE_DIR"] = os.path.join(_TMP, "archivo")
+os.environ.setdefault("LIGA_LOG_LEVEL", "WARNING")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import seasons  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Un solo arranque de la app (tablas, cola de trabajos) para todas las pruebas
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def league(client):
+    # Liga pequeña de la temporada en curso: equipos con plantilla y estadísticas, calendario y
+    # las primeras jornadas jugadas
+    team_ids = [client.post("/teams", json={"nombre": f"Liga {i + 1}"}).json()["id"] for i in range(6)]
+    player_ids = []
+    for team_id in team_ids:
+        player_ids += client.post("/players:batch", json=[
+            {"nombre": f"Jugador {team_id}-{i}", "dorsal": i + 1, "posicion": posicion, "equipo_id": team_id}
+            for i, posicion in enumerate(("portero", "defensa", "mediocampo", "delantero"))
+        ]).json()["created"]
+    client.put("/stats:batch", json=[{"player_id": pid, "tiros": pid % 7, "tiros_a_puerta": pid % 3} for pid in player_ids])
+    fixtures = client.post(f"/seasons/{seasons.current()}/fixtures", json={"team_ids": team_ids}).json()
+    first = fixtures["items"][0]["jornada"]
+    client.patch("/games/results:batch", json=[
+        {"game_id": game["id"], "goles_local": game["id"] % 4, "goles_visitante": game["id"] % 3}
+        for game in fixtures["items"] if game["jornada"] < first + 3
+    ])
+    return {"teams": team_ids, "players": player_ids, "games": [game["id"] for game in fixtures["items"]]}
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP, ignore_errors=True)
@@ -0,0 +1,155 @@
+# tests/test_backends.py
+# Upserts e incrementos (crud._upsert_stmt / crud._increment_stmt) contra cada backend. SQLite usa
+# una base temporal propia; PostgreSQL solo se prueba si LIGA_TEST_PG_URL apunta a una base vacía,
+# p.ej. postgresql+psycopg://liga@/liga_test?host=/tmp&port=5432 (bench/backend_matrix.py levanta
+# un clúster desechable y mide tiempos de la API completa).
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.database import _make_engine
+
+BACKENDS = ["sqlite", "postgresql"]
+STATS_FIELDS = list(schemas.StatsIn.model_fields)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        bind = _make_engine(f"sqlite:///{tmp_path / 'backend.db'}")
+    else:
+        url = os.getenv("LIGA_TEST_PG_URL")
+        if not url:
+            pytest.skip("LIGA_TEST_PG_URL no definida")
+        bind = create_engine(url)
+    models.DecBase.metadata.create_all(bind)
+    try:
+        yield bind
+    finally:
+        models.DecBase.metadata.drop_all(bind)
+        bind.dispose()
+
+
+@pytest.fixture
+def session(backend):
+    db = Session(bind=backend, autoflush=False)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _players(db: Session, n: int) -> list[int]:
+    team_id = db.scalar(models.Team.__table__.insert().values(nombre="Backend").returning(models.Team.id))
+    return list(db.scalars(models.Player.__table__.insert().returning(models.Player.id), [
+        {"nombre": f"Jugador {i}", "dorsal": i + 1, "posicion": "delantero", "equipo_id": team_id} for i in range(n)
+    ]))
+
+
+def _stats(db: Session, player_id: int) -> dict:
+    row = db.execute(select(models.Stats.__table__).where(models.Stats.player_id == player_id)).mappings().one()
+    return dict(row)
+
+
+def test_insert_on_conflict_do_nothing(session):
+    # Como seasons.ensure o el importador: la fila repetida se ignora
+    pid, = _players(session, 1)
+    stmt = crud._dialect_insert(session, models.Stats).on_conflict_do_nothing()
+    session.execute(stmt, [{"player_id": pid, "tiros": 1}, {"player_id": pid, "tiros": 2}])
+    session.commit()
+    assert _stats(session, pid)["tiros"] == 1
+
+
+def test_upsert_alta_y_modificacion(session):
+    pid, = _players(session, 1)
+    stmt = crud._upsert_stmt(session, models.Stats, "player_id", ["tiros", "paradas"])
+    session.execute(stmt.values(player_id=pid, tiros=4, paradas=1))
+    session.execute(stmt.values(player_id=pid, tiros=9, paradas=0))
+    session.commit()
+    st = _stats(session, pid)
+    assert (st["tiros"], st["paradas"]) == (9, 0)
+
+
+def test_upsert_solo_las_columnas_dadas(session):
+    pid, = _players(session, 1)
+    session.execute(crud._upsert_stmt(session, models.Stats, "player_id", STATS_FIELDS).values(
+        player_id=pid, **dict.fromkeys(STATS_FIELDS, 3)))
+    session.execute(crud._upsert_stmt(session, models.Stats, "player_id", ["asistencias"]).values(
+        player_id=pid, asistencias=8, tiros=100))
+    session.commit()
+    st = _stats(session, pid)
+    assert st["asistencias"] == 8 and st["tiros"] == 3
+
+
+def test_upsert_en_bloque(session):
+    ids = _players(session, 50)
+    stmt = crud._upsert_stmt(session, models.Stats, "player_id", STATS_FIELDS)
+    session.execute(stmt, [{"player_id": pid, **dict.fromkeys(STATS_FIELDS, 1)} for pid in ids[:30]])
+    session.execute(stmt, [{"player_id": pid, **dict.fromkeys(STATS_FIELDS, pid % 13)} for pid in ids])
+    session.commit()
+    rows = session.execute(select(models.Stats.player_id, models.Stats.tiros, models.Stats.paradas)).all()
+    assert sorted(rows) == [(pid, pid % 13, pid % 13) for pid in ids]
+
+
+def test_increment_sin_fila_y_con_fila(session):
+    pid, = _players(session, 1)
+    stmt = crud._increment_stmt(session, models.Stats, "player_id", ["tiros", "paradas"])
+    session.execute(stmt.values(player_id=pid, tiros=2, paradas=1))
+    session.execute(stmt.values(player_id=pid, tiros=3, paradas=0))
+    session.commit()
+    st = _stats(session, pid)
+    assert (st["tiros"], st["paradas"]) == (5, 1)
+
+
+def test_increment_sobre_nulos(session):
+    # coalesce(col, 0) + delta: una columna NULL cuenta como 0
+    pid, = _players(session, 1)
+    session.execute(models.Stats.__table__.insert().values(player_id=pid, tiros=None))
+    session.execute(crud._increment_stmt(session, models.Stats, "player_id", ["tiros"]).values(player_id=pid, tiros=4))
+    session.commit()
+    assert _stats(session, pid)["tiros"] == 4
+
+
+def test_increment_clave_compuesta(session):
+    # equipos_temporada: la clave es (temporada_id, team_id)
+    team_ids = list(session.scalars(models.Team.__table__.insert().returning(models.Team.id), [
+        {"nombre": "Local"}, {"nombre": "Visitante"},
+    ]))
+    session.execute(models.Season.__table__.insert(), [
+        {"id": year, "nombre": f"{year}/{(year + 1) % 100:02d}", "inicio": datetime(year, 7, 1),
+         "fin": datetime(year + 1, 7, 1), "estado": "abierta"}
+        for year in (2024, 2025)
+    ])
+    fields = ["partidos", "victorias", "goles_favor"]
+    stmt = crud._increment_stmt(session, models.TeamSeason, ("temporada_id", "team_id"), fields)
+    session.execute(stmt, [
+        {"temporada_id": 2024, "team_id": team_ids[0], "partidos": 1, "victorias": 1, "goles_favor": 2},
+        {"temporada_id": 2025, "team_id": team_ids[0], "partidos": 1, "victorias": 0, "goles_favor": 0},
+    ])
+    session.execute(stmt, [{"temporada_id": 2024, "team_id": team_ids[0], "partidos": 1, "victorias": 0, "goles_favor": 1}])
+    session.commit()
+    TS = models.TeamSeason
+    rows = session.execute(select(TS.temporada_id, TS.partidos, TS.victorias, TS.goles_favor).order_by(TS.temporada_id)).all()
+    assert [tuple(r) for r in rows] == [(2024, 2, 1, 3), (2025, 1, 0, 0)]
+
+
+def test_crud_estadisticas(session):
+    # Las funciones de crud que usan los upserts devuelven la fila con RETURNING
+    a, b = _players(session, 2)
+    assert crud.upsert_stats_for_player(session, a, {"tiros": 5, "tiros_a_puerta": 2})["tiros"] == 5
+    assert crud.increment_stats_for_player(session, a, {"tiros": 1, "paradas": 2})["tiros"] == 6
+    assert crud.increment_stats_for_player(session, b, {"asistencias": 1})["asistencias"] == 1
+    updated, errors = crud.upsert_stats_bulk(session, [{"player_id": a, "tiros": 0}, {"player_id": 999999, "tiros": 1}])
+    assert updated == [a] and [e["index"] for e in errors] == [1]
+    assert _stats(session, a)["tiros"] == 0
+
+
+def test_dialect_insert_no_soportado(monkeypatch):
+    monkeypatch.setattr(crud, "_DIALECT_INSERTS", {"postgresql": crud.postgresql.insert})
+    with Session(bind=create_engine("sqlite://")) as db:
+        with pytest.raises(RuntimeError, match="dialecto sqlite"):
+            crud._dialect_insert(db, models.Stats)
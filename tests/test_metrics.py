@@ -0,0 +1,24 @@
+# tests/test_metrics.py
+# liga_task_duration_seconds: lotes de la cola de trabajos y recálculos completos de task
+from app import jobs
+
+
+def _task_count(client, task: str) -> int:
+    prefix = f'liga_task_duration_seconds_count{{task="{task}"}} '
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def test_lotes_de_la_cola(client, league):
+    before = _task_count(client, "player_value")
+    client.put(f"/players/{league['players'][0]}/stats", json={"tiros": 11, "tiros_a_puerta": 6})
+    assert jobs.queue.drain()
+    assert _task_count(client, "player_value") > before
+
+
+def test_recalculos_completos(client, league):
+    before = _task_count(client, "check_team_records")
+    assert client.post("/admin/team-records/check").status_code == 200
+    assert _task_count(client, "check_team_records") == before + 1
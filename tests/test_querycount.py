@@ -0,0 +1,22 @@
+# tests/test_querycount.py
+# Presupuestos de consultas SQL por endpoint (app/querycount.py): una carga N+1 hace fallar la prueba
+import pytest
+
+from app import cache, querycount
+
+
+def test_endpoints_dentro_de_presupuesto(client, db, league):
+    assert querycount.check_query_budgets(client, db) == []
+
+
+def test_presupuesto_superado(client, db, league):
+    # Un presupuesto por debajo de lo que cuesta el endpoint aparece en la lista de fallos
+    failures = querycount.check_query_budgets(client, db, {"/teams/{team_id}/players": 1, "/games": 1})
+    assert len(failures) == 1 and failures[0].startswith("GET /teams/")
+
+
+def test_assert_max_queries(client, league):
+    cache.cache.clear()
+    with pytest.raises(AssertionError, match="GET /teams: 1 consultas SQL"):
+        with querycount.assert_max_queries(0, label="GET /teams"):
+            client.get("/teams")
@@ -0,0 +1,101 @@
+# tests/test_seasons.py
+# Archivo de temporadas (seasons.archive): los partidos y eventos nuevos no reutilizan los id archivados
+import sqlite3
+
+from sqlalchemy import func, select
+
+from app import importer, models, seasons
+
+ARCHIVED, NEXT = 2001, 2002
+
+
+def _event(client, game_id: int, player_id: int) -> None:
+    body = f'{{"game_id": {game_id}, "player_id": {player_id}, "tipo": "tiro"}}\n'
+    assert client.post("/events", content=body).json()["accepted"] == 1
+
+
+def test_ids_nuevos_por_encima_de_los_archivados(client, db):
+    team_ids = [client.post("/teams", json={"nombre": f"Archivo {i + 1}"}).json()["id"] for i in range(4)]
+    player = client.post("/players", json={"nombre": "Archivado", "dorsal": 7, "posicion": "delantero", "equipo_id": team_ids[0]}).json()
+
+    archived = client.post(f"/seasons/{ARCHIVED}/fixtures", json={"team_ids": team_ids}).json()["items"]
+    updated = client.patch("/games/results:batch", json=[
+        {"game_id": game["id"], "goles_local": 1, "goles_visitante": 0} for game in archived
+    ]).json()
+    assert not updated["errors"]
+    own = next(game for game in archived if team_ids[0] in (game["local_id"], game["visitante_id"]))
+    _event(client, own["id"], player["id"])
+    max_event = db.scalar(select(func.max(models.MatchEvent.id)))
+
+    assert client.post(f"/seasons/{ARCHIVED}/close").status_code == 200
+    result = client.post(f"/seasons/{ARCHIVED}/archive").json()
+    assert result["filas"]["partidos"] == len(archived)
+    max_archived = max(game["id"] for game in archived)
+    with sqlite3.connect(result["archivo"]) as archive:
+        assert archive.execute("SELECT max(id) FROM partidos").fetchone()[0] == max_archived
+
+    created = client.post(f"/seasons/{NEXT}/fixtures", json={"team_ids": team_ids}).json()["items"]
+    assert min(game["id"] for game in created) > max_archived
+    own = next(game for game in created if team_ids[0] in (game["local_id"], game["visitante_id"]))
+    _event(client, own["id"], player["id"])
+    db.expire_all()
+    assert db.scalar(select(func.max(models.MatchEvent.id))) > max_event
+
+    # La temporada archivada se sigue leyendo desde su fichero
+    games = client.get("/games", params={"temporada": ARCHIVED, "limit": 500}).json()["items"]
+    assert sorted(game["id"] for game in games) == sorted(game["id"] for game in archived)
+    assert seasons.archive_path(db, ARCHIVED) == result["archivo"]
+
+
+def test_mismo_cruce_y_jornada_en_otra_temporada(client):
+    local, visitante = (client.post("/teams", json={"nombre": f"Cruce {i + 1}"}).json()["id"] for i in range(2))
+    game = {"local_id": local, "visitante_id": visitante, "jornada": 1}
+    assert client.post("/games", json={**game, "fecha": "2012-09-01T18:00:00"}).status_code == 200
+    assert client.post("/games", json={**game, "fecha": "2013-09-01T18:00:00"}).status_code == 200
+    # Dentro de una misma temporada sigue siendo un duplicado
+    assert client.post("/games", json={**game, "fecha": "2013-10-01T18:00:00"}).status_code == 400
+
+
+def test_jornadas_desde_uno_en_cada_temporada(client):
+    team_ids = [client.post("/teams", json={"nombre": f"Jornadas {i + 1}"}).json()["id"] for i in range(4)]
+    for season in (2010, 2011):
+        fixtures = client.post(f"/seasons/{season}/fixtures", json={"team_ids": team_ids}).json()
+        assert [fixtures["items"][0]["jornada"], fixtures["items"][-1]["jornada"]] == [1, fixtures["jornadas"]]
+    first = [game for game in fixtures["items"] if game["jornada"] == 1]
+    client.patch("/games/results:batch", json=[{"game_id": game["id"], "goles_local": 2, "goles_visitante": 0} for game in first])
+    standings = client.get("/standings", params={"temporada": 2011, "jornada": 1}).json()
+    assert standings["jornada"] == 1 and sum(row["victorias"] for row in standings["items"]) == len(first)
+
+
+def test_importar_partidos_de_temporada_cerrada(client, db, tmp_path):
+    local, visitante = (client.post("/teams", json={"nombre": f"Importados {i + 1}"}).json()["id"] for i in range(2))
+    seasons.ensure(db, [1990])
+    db.get(models.Season, 1990).estado = "cerrada"
+    db.commit()
+    path = tmp_path / "partidos.ndjson"
+    path.write_text(
+        f'{{"local_id": {local}, "visitante_id": {visitante}, "jornada": 1, "fecha": "1990-09-01T18:00:00", "goles_local": 1, "goles_visitante": 0}}\n'
+        f'{{"local_id": {local}, "visitante_id": {visitante}, "jornada": 1, "fecha": "2014-09-01T18:00:00"}}\n'
+    )
+
+    run = importer.Importer(db, 5000)
+    run._load_teams_index()
+    run.games(str(path))
+    report = run.report["partidos"]
+    assert report["written"] == 1
+    assert [(error["line"], "1990 está cerrada" in error["detail"]) for error in report["errors"]] == [(1, True)]
+    assert not db.scalar(select(func.count()).select_from(models.Game).where(models.Game.temporada_id == 1990))
+
+
+def test_dry_run_en_el_cuerpo_o_en_la_query(client):
+    team_ids = [client.post("/teams", json={"nombre": f"Ensayo {i + 1}"}).json()["id"] for i in range(4)]
+    body = {"team_ids": team_ids, "dry_run": True}
+    assert client.post("/seasons/2015/fixtures", json=body).json()["dry_run"] is True
+    assert client.get("/games", params={"temporada": 2015}).json()["items"] == []
+    # La query manda sobre el cuerpo
+    created = client.post("/seasons/2015/fixtures", params={"dry_run": "false"}, json=body).json()
+    assert created["dry_run"] is False
+    assert len(client.get("/games", params={"temporada": 2015, "limit": 500}).json()["items"]) == len(created["items"])
+    # Un campo mal escrito no genera el calendario
+    assert client.post("/seasons/2016/fixtures", json={"team_ids": team_ids, "dryrun": True}).status_code == 422
+    assert client.get("/games", params={"temporada": 2016}).json()["items"] == []
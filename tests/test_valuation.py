@@ -0,0 +1,63 @@
+# tests/test_valuation.py
+# Paridad del cálculo en bloque (valuation.compute_values) con el escalar de task jugador a jugador
+import pytest
+
+from app import models, task, valuation
+
+ZERO_STATS = dict.fromkeys(valuation.STAT_COLUMNS, 0)
+
+
+def _row(player_id, posicion, goles=0, tarjetas_a=0, tarjetas_r=0, partidos=0, **stats):
+    # Misma forma que las filas de valuation._load_chunk
+    st = {**ZERO_STATS, **stats}
+    return (player_id, posicion, goles, tarjetas_a, tarjetas_r, None, None,
+            *(st[c] for c in valuation.STAT_COLUMNS), partidos, None)
+
+
+CASES = {
+    "sin intentos": _row(1, "delantero", goles=3),
+    "sin nada": _row(2, "defensa"),
+    "posicion desconocida": _row(3, "libero", goles=2, tiros=5, tiros_a_puerta=4, asistencias=1, partidos=10),
+    "portero con paradas": _row(4, "portero", paradas=87, pases_intentados=300, pases_completados=251, partidos=38),
+    "portero sin paradas": _row(5, "portero", partidos=1),
+    "tope de tarjetas": _row(6, "mediocampo", goles=4, tarjetas_a=30, tarjetas_r=6, asistencias=9),
+    "justo en el tope de tarjetas": _row(7, "defensa", tarjetas_a=10, tarjetas_r=2, entradas_intentadas=40, entradas_exitosas=33),
+    "tope de partidos": _row(8, "delantero", goles=12, tiros=60, tiros_a_puerta=31, partidos=500),
+    "valor por encima de 100": _row(9, "delantero", goles=400, asistencias=90, partidos=38),
+    "regates": _row(10, "mediocampo", regates_intentados=7, regates_exitosos=3, pases_intentados=1, pases_completados=1),
+}
+
+
+def _expected(row):
+    player = models.Player(posicion=row[1], goles=row[2], tarjetas_a=row[3], tarjetas_r=row[4])
+    st = models.Stats(**dict(zip(valuation.STAT_COLUMNS, row[7:17])))
+    valor = task.compute_player_value(player, st, row[17])
+    return valor, task.valor_en_euros(valor, row[1])
+
+
+@pytest.mark.parametrize("row", CASES.values(), ids=CASES.keys())
+def test_compute_values_igual_que_el_escalar(row):
+    valores, mercado = valuation.compute_values([row])
+    assert (valores[0], mercado[0]) == _expected(row)
+
+
+def test_compute_values_en_bloque_igual_que_el_escalar():
+    # Todas las filas juntas: la tabla de pesos y los valores únicos se indexan por columna
+    rows = list(CASES.values())
+    valores, mercado = valuation.compute_values(rows)
+    assert list(zip(valores, mercado)) == [_expected(row) for row in rows]
+    assert valuation._compute_values_scalar(rows) == (valores, mercado)
+
+
+def test_check_parity_sobre_la_base(client, db):
+    team = client.post("/teams", json={"nombre": "Paridad"}).json()
+    players = [
+        {"nombre": "Portero", "dorsal": 1, "posicion": "portero", "equipo_id": team["id"]},
+        {"nombre": "Tarjetas", "dorsal": 4, "posicion": "defensa", "tarjetas_a": 25, "tarjetas_r": 4, "equipo_id": team["id"]},
+        {"nombre": "Sin estadísticas", "dorsal": 9, "posicion": "delantero", "goles": 7, "equipo_id": team["id"]},
+        {"nombre": "Sin equipo", "dorsal": 10, "posicion": "mediocampo"},
+    ]
+    ids = [client.post("/players", json=p).json()["id"] for p in players]
+    client.put(f"/players/{ids[0]}/stats", json={"paradas": 54, "pases_intentados": 0})
+    client.put(f"/players/{ids[1]}/stats", json={"entradas_intentadas": 0, "entradas_exitosas": 0})
+    assert valuation.check_parity(db) == []